@@ -0,0 +1,4 @@
+"""Micro-benchmarks for the blog rendering pipeline.
+
+Run from ``src/`` with ``python -m benchmarks.<module>``.
+"""
@@ -0,0 +1,56 @@
+"""Re-render a long post after a one-block edit, with and without the fragment cache."""
+
+from benchmarks.common import best_of, format_seconds, sentence, setup_django
+
+setup_django()
+
+import random  # noqa: E402
+
+from blog.models import BlogPage  # noqa: E402
+from blog.post_processing import get_block_fragment_cache, render_blog_body  # noqa: E402
+
+BLOCK_COUNTS = (20, 100, 300)
+
+
+def build_raw_body(block_count, seed=0):
+    rng = random.Random(seed)
+    raw = []
+    for index in range(block_count):
+        if index % 10 == 0:
+            raw.append({"type": "heading", "value": f"Section {index}"})
+        text = "\n\n".join(sentence(rng, 60) for _ in range(3))
+        raw.append({"type": "markdown", "value": f"{text}\n\n```python\nx = {index}\n```"})
+    return raw
+
+
+def to_stream(raw):
+    return BlogPage.body.field.stream_block.to_python(raw)
+
+
+def main():
+    cache = get_block_fragment_cache()
+    print(f"{'blocks':>7} {'cold':>12} {'one edit':>12} {'speedup':>8}")
+    for count in BLOCK_COUNTS:
+        raw = build_raw_body(count)
+
+        def cold():
+            cache.clear()
+            render_blog_body(to_stream(raw))
+
+        edited = list(raw)
+
+        def one_edit():
+            edited[-1] = {"type": "markdown", "value": f"edit {random.random()}"}
+            render_blog_body(to_stream(edited))
+
+        cold_time = best_of(cold, repeat=3)
+        render_blog_body(to_stream(raw))
+        warm_time = best_of(one_edit, repeat=3)
+        print(
+            f"{count:>7} {format_seconds(cold_time):>12} {format_seconds(warm_time):>12} "
+            f"{cold_time / warm_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
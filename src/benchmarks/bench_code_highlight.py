@@ -0,0 +1,62 @@
+"""Re-rendering a code-heavy post with and without the highlighted-code cache."""
+
+from benchmarks.common import best_of, format_seconds, setup_django
+
+setup_django()
+
+from markdown.extensions import codehilite, fenced_code  # noqa: E402
+
+from blog.markdown_extensions.codehilite_cache import (  # noqa: E402
+    CachedCodeHilite,
+    get_highlight_cache,
+)
+from blog.markdown_rendering import markdown_to_html  # noqa: E402
+
+LISTINGS = 40
+LISTING_LINES = 80
+
+
+def build_post():
+    blocks = []
+    for index in range(LISTINGS):
+        body = "\n".join(
+            f"    value_{line} = compute({index}, {line}) * 2  # step {line}"
+            for line in range(LISTING_LINES)
+        )
+        blocks.append(f"Listing {index}:\n\n```python\ndef listing_{index}():\n{body}\n```")
+    return blocks
+
+
+def render(blocks):
+    for block in blocks:
+        markdown_to_html(block)
+
+
+def main():
+    blocks = build_post()
+    render(blocks)  # build converters and install the extension
+
+    original = CachedCodeHilite.__mro__[1]
+    codehilite.CodeHilite = fenced_code.CodeHilite = original
+    uncached = best_of(lambda: render(blocks), repeat=3, number=1)
+
+    codehilite.CodeHilite = fenced_code.CodeHilite = CachedCodeHilite
+    cache = get_highlight_cache()
+    render(blocks)
+    memory = best_of(lambda: render(blocks), repeat=3, number=1)
+
+    def backend_only():
+        cache.clear_memory()
+        render(blocks)
+
+    backend = best_of(backend_only, repeat=3, number=1)
+
+    print(f"{LISTINGS} listings x {LISTING_LINES} lines")
+    print(f"  uncached highlight:   {format_seconds(uncached)}")
+    print(f"  memory tier hits:     {format_seconds(memory)} ({uncached / memory:.1f}x)")
+    print(f"  disk tier hits:       {format_seconds(backend)} ({uncached / backend:.1f}x)")
+    print(f"  hit rate:             {cache.stats()['hit_rate']:.2%}")
+
+
+if __name__ == "__main__":
+    main()
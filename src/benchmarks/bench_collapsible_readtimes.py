@@ -0,0 +1,71 @@
+"""Collapsible read-times: regex second pass vs slots filled during post-processing."""
+
+import random
+from unittest.mock import patch
+
+from benchmarks.common import best_of, format_seconds, sentence, setup_django
+
+setup_django()
+
+from benchmarks.legacy import legacy_inject_collapsible_readtimes  # noqa: E402
+from blog.post_processing import PostProcessor  # noqa: E402
+
+COLLAPSIBLES = (50, 500)
+
+
+def collapsible_post_html(collapsibles, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    for index in range(collapsibles):
+        parts.append(f"<p>{sentence(rng, 60)}</p>")
+        parts.append(
+            '<details class="collapsible-block"><summary class="collapsible-block__summary">'
+            f'<span class="collapsible-block__title">Note {index}</span>'
+            '<span class="collapsible-block__readtime" data-collapsible-readtime>-- min</span>'
+            '</summary><div class="collapsible-block__content">'
+        )
+        parts.extend(f"<p>{sentence(rng, 80)}</p>" for _ in range(rng.randint(1, 6)))
+        parts.append("</div></details>")
+    return "\n".join(parts)
+
+
+def run_post(source):
+    processor = PostProcessor({}, False)
+    processor.feed(source)
+    processor.close()
+    return processor
+
+
+def run_legacy(source):
+    with patch.object(PostProcessor, "_open_readtime_slot", lambda self, attrs: None):
+        processor = run_post(source)
+    return legacy_inject_collapsible_readtimes(
+        "".join(processor.output), processor.collapsible_word_counts
+    )
+
+
+def main():
+    print(
+        f"{'collapsibles':>12} {'html':>9} {'second pass':>12} {'total old':>12} {'total new':>12} {'speedup':>8}"
+    )
+    for collapsibles in COLLAPSIBLES:
+        source = collapsible_post_html(collapsibles)
+        assert run_legacy(source) == "".join(run_post(source).output)
+
+        with patch.object(PostProcessor, "_open_readtime_slot", lambda self, attrs: None):
+            processor = run_post(source)
+        unfilled = "".join(processor.output)
+        counts = processor.collapsible_word_counts
+        second_pass = best_of(
+            lambda: legacy_inject_collapsible_readtimes(unfilled, counts), repeat=5
+        )
+        old = best_of(lambda: run_legacy(source), repeat=5)
+        new = best_of(lambda: "".join(run_post(source).output), repeat=5)
+        print(
+            f"{collapsibles:>12} {len(source) // 1024:>7}KB {format_seconds(second_pass):>12} "
+            f"{format_seconds(old):>12} {format_seconds(new):>12} {old / new:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Glossary auto-linking as the term count grows: alternation regex vs GlossaryMatcher."""
+
+import random
+import re
+
+from benchmarks.common import WORDS, best_of, format_seconds, sentence
+from benchmarks.legacy import alternation_spans
+from blog.glossary_matching import GlossaryMatcher
+
+TERM_COUNTS = (10, 100, 500, 1_000, 5_000)
+TEXT_WORDS = 5_000
+
+
+def make_terms(count, rng):
+    terms = set()
+    while len(terms) < count:
+        words = rng.randint(1, 3)
+        terms.add(
+            " ".join(rng.choice(WORDS).title() for _ in range(words)) + str(rng.randint(0, 99))
+        )
+    return sorted(terms)
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{TEXT_WORDS} words of text")
+    print(
+        f"{'terms':>7} {'engine':>7} {'build':>10} {'regex scan':>12} {'matcher scan':>13} {'speedup':>8}"
+    )
+    for count in TERM_COUNTS:
+        terms = make_terms(count, rng)
+        pieces = [sentence(rng, 20)]
+        for _ in range(TEXT_WORDS // 25):
+            pieces.append(rng.choice(terms))
+            pieces.append(sentence(rng, 20))
+        text = " ".join(pieces)
+        assert list(GlossaryMatcher(terms).finditer(text)) == alternation_spans(terms, text)
+
+        unique = sorted(terms, key=len, reverse=True)
+        pattern = re.compile(r"\b(" + "|".join(map(re.escape, unique)) + r")\b", re.IGNORECASE)
+        matcher = GlossaryMatcher(terms)
+        engine = "regex" if count < GlossaryMatcher.REGEX_MAX_TERMS else "trie"
+        build = best_of(lambda: GlossaryMatcher(terms), repeat=3)
+        regex_scan = best_of(lambda: list(pattern.finditer(text)), repeat=3)
+        matcher_scan = best_of(lambda: list(matcher.finditer(text)), repeat=3)
+        print(
+            f"{count:>7} {engine:>7} {format_seconds(build):>10} {format_seconds(regex_scan):>12} "
+            f"{format_seconds(matcher_scan):>13} {regex_scan / matcher_scan:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Blog listing latency on shallow and deep pages: offset pagination vs keyset cursors."""
+
+from benchmarks.common import (
+    best_of,
+    create_blog_index,
+    format_seconds,
+    setup_django,
+    test_database,
+)
+
+setup_django()
+
+import datetime  # noqa: E402
+import uuid  # noqa: E402
+
+from django.test import Client, override_settings  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from wagtail.models import Page  # noqa: E402
+
+from blog import pagination  # noqa: E402
+from blog.models import BlogIndexPage, BlogPage  # noqa: E402
+
+ARCHIVE_SIZES = (10_000, 100_000)
+BATCH = 1_000
+
+
+def publish_template(index):
+    template = BlogPage(title="Template", slug="template", body=[])
+    index.add_child(instance=template)
+    template.save_revision().publish()
+    return BlogPage.objects.get(pk=template.pk)
+
+
+def bulk_add_posts(index, template, count, start):
+    """Insert published copies of template straight into the page tree, skipping signals."""
+    base = {
+        field.attname: getattr(template, field.attname)
+        for field in Page._meta.concrete_fields
+        if not field.primary_key
+    }
+    blog_fields = [field for field in BlogPage._meta.local_concrete_fields]
+    now = timezone.now()
+    for offset in range(0, count, BATCH):
+        pages = []
+        for number in range(start + offset, start + min(offset + BATCH, count)):
+            page = Page(**base)
+            page.path = Page._get_path(index.path, index.depth + 1, number + 2)
+            page.title = page.draft_title = f"Post {number}"
+            page.slug = f"post-{number}"
+            page.url_path = f"{index.url_path}post-{number}/"
+            page.translation_key = uuid.uuid4()
+            page.first_published_at = page.last_published_at = now - datetime.timedelta(
+                minutes=number
+            )
+            pages.append(page)
+        Page.objects.bulk_create(pages)
+        posts = []
+        for page in Page.objects.filter(path__in=[page.path for page in pages]).only("pk"):
+            post = BlogPage(body=[])
+            for field in blog_fields:
+                if field.attname != "page_ptr_id":
+                    setattr(post, field.attname, getattr(template, field.attname))
+            post.page_ptr_id = page.pk
+            posts.append(post)
+        BlogPage.objects._insert(posts, fields=blog_fields, raw=True)
+
+
+def deep_cursor(index, position):
+    post = index.get_posts()[position - 1]
+    return f"?after={pagination.encode_cursor(post, position // BlogIndexPage.posts_per_page + 1)}"
+
+
+def main():
+    with test_database():
+        index = create_blog_index()
+        template = publish_template(index)
+        client = Client(HTTP_HOST="localhost")
+        total = 0
+        print(
+            f"{'posts':>8} {'offset p2':>12} {'offset last':>12} {'keyset p2':>12} {'keyset last':>12}"
+        )
+        for size in ARCHIVE_SIZES:
+            bulk_add_posts(index, template, size - total, total)
+            total = size
+            count = index.get_posts().count()
+            last_page = -(-count // BlogIndexPage.posts_per_page)
+
+            def offset_view(query):
+                # Offset pagination as it was: a COUNT(*) on every request.
+                pagination.forget_post_count(index.path)
+                assert client.get(f"{index.url}{query}").status_code == 200
+
+            def keyset_view(query):
+                assert client.get(f"{index.url}{query}").status_code == 200
+
+            offset_shallow = best_of(lambda: offset_view("?page=2"), repeat=5)
+            offset_deep = best_of(lambda: offset_view(f"?page={last_page}"), repeat=5)
+            with override_settings(BLOG_INDEX_PAGINATION=pagination.KEYSET):
+                shallow = deep_cursor(index, BlogIndexPage.posts_per_page)
+                deep = deep_cursor(index, (last_page - 1) * BlogIndexPage.posts_per_page)
+                keyset_shallow = best_of(lambda: keyset_view(shallow), repeat=5)
+                keyset_deep = best_of(lambda: keyset_view(deep), repeat=5)
+            print(
+                f"{count:>8} {format_seconds(offset_shallow):>12} {format_seconds(offset_deep):>12} "
+                f"{format_seconds(keyset_shallow):>12} {format_seconds(keyset_deep):>12}"
+            )
+
+
+if __name__ == "__main__":
+    main()
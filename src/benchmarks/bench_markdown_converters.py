@@ -0,0 +1,44 @@
+"""Per-block markdown cost: wagtailmarkdown's filter vs pooled converters."""
+
+from benchmarks.common import best_of, format_seconds, sentence, setup_django
+
+setup_django()
+
+import random  # noqa: E402
+
+from wagtailmarkdown.utils import render_markdown as wagtail_render_markdown  # noqa: E402
+
+from blog.markdown_rendering import render_markdown  # noqa: E402
+
+BLOCK_COUNTS = (50, 200)
+
+
+def build_blocks(count, seed=0):
+    rng = random.Random(seed)
+    blocks = []
+    for index in range(count):
+        blocks.append(
+            f"## Section {index}\n\n{sentence(rng, 40)}\n\n- {sentence(rng, 6)}\n- {sentence(rng, 6)}"
+        )
+    return blocks
+
+
+def main():
+    print(
+        f"{'blocks':>7} {'wagtailmarkdown':>16} {'pooled':>10} {'per block saved':>16} {'speedup':>8}"
+    )
+    for count in BLOCK_COUNTS:
+        blocks = build_blocks(count)
+        assert [render_markdown(b) for b in blocks] == [wagtail_render_markdown(b) for b in blocks]
+
+        baseline = best_of(lambda: [wagtail_render_markdown(b) for b in blocks], repeat=5, number=3)
+        pooled = best_of(lambda: [render_markdown(b) for b in blocks], repeat=5, number=3)
+        saved = (baseline - pooled) / count
+        print(
+            f"{count:>7} {format_seconds(baseline):>16} {format_seconds(pooled):>10} "
+            f"{format_seconds(saved):>16} {baseline / pooled:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
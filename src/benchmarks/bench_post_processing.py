@@ -0,0 +1,33 @@
+"""Compare the streaming PostProcessor against the HTMLParser reference engine."""
+
+from benchmarks.common import best_of, format_seconds, setup_django, synthetic_post_html
+
+setup_django()
+
+from blog.post_processing import HTMLParserPostProcessor, PostProcessor  # noqa: E402
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+def run_engine(engine, source):
+    processor = engine({}, False)
+    processor.feed(source)
+    processor.close()
+    return processor
+
+
+def main():
+    print(f"{'words':>8} {'HTMLParser':>12} {'streaming':>12} {'speedup':>8}")
+    for size in SIZES:
+        source = synthetic_post_html(size)
+        reference = run_engine(HTMLParserPostProcessor, source)
+        streaming = run_engine(PostProcessor, source)
+        assert "".join(reference.output) == "".join(streaming.output)
+        repeat = 3 if size >= 100_000 else 7
+        old = best_of(lambda: run_engine(HTMLParserPostProcessor, source), repeat=repeat)
+        new = best_of(lambda: run_engine(PostProcessor, source), repeat=repeat)
+        print(f"{size:>8} {format_seconds(old):>12} {format_seconds(new):>12} {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
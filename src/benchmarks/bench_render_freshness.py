@@ -0,0 +1,59 @@
+"""Request latency for a large cached post, with and without the saved body fingerprint."""
+
+from benchmarks.common import (
+    best_of,
+    create_blog_index,
+    format_seconds,
+    sentence,
+    setup_django,
+    test_database,
+)
+
+setup_django()
+
+import random  # noqa: E402
+from unittest.mock import patch  # noqa: E402
+
+from django.test import Client  # noqa: E402
+
+from blog.models import BlogPage  # noqa: E402
+
+BLOCK_COUNTS = (50, 500, 2000)
+
+
+def build_body(block_count, seed=0):
+    rng = random.Random(seed)
+    return [
+        ("markdown", "\n\n".join(sentence(rng, 80) for _ in range(4))) for _ in range(block_count)
+    ]
+
+
+def main():
+    with test_database():
+        index = create_blog_index()
+        client = Client(HTTP_HOST="localhost")
+        print(f"{'blocks':>7} {'rehash':>12} {'fingerprint':>12} {'speedup':>8}")
+        for count in BLOCK_COUNTS:
+            page = BlogPage(title=f"Large {count}", slug=f"large-{count}", body=build_body(count))
+            index.add_child(instance=page)
+            page.save_revision().publish()
+            url = page.url
+            assert client.get(url).status_code == 200
+
+            def view():
+                client.get(url)
+
+            with (
+                patch.object(BlogPage, "_is_preview_request", return_value=True),
+                patch.object(BlogPage, "_persist_render_cache"),
+            ):
+                rehash = best_of(view, repeat=5, number=5)
+            fingerprint = best_of(view, repeat=5, number=5)
+            print(
+                f"{count:>7} {format_seconds(rehash):>12} {format_seconds(fingerprint):>12} "
+                f"{rehash / fingerprint:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Sanitizing a post with 100 raw_html embeds: fresh Cleaner vs reused Cleaner and memo."""
+
+from benchmarks.common import best_of, format_seconds, setup_django
+
+setup_django()
+
+from benchmarks.legacy import legacy_sanitize_html  # noqa: E402
+from blog.templatetags.blog_sanitize import get_sanitized_cache, sanitize_html  # noqa: E402
+
+EMBEDS = 100
+
+
+def build_embeds():
+    return [
+        f'<div class="embed embed-{index}" style="max-width: 560px">'
+        f'<iframe src="https://example.com/embed/{index}" width="560" height="315"></iframe>'
+        f'<p onclick="track({index})">Clip {index} from <a href="https://example.com/{index}">the match</a>'
+        f"<script>track({index})</script></p><!-- embed {index} --></div>"
+        for index in range(EMBEDS)
+    ]
+
+
+def main():
+    embeds = build_embeds()
+    for embed in embeds:
+        assert str(sanitize_html(embed)) == legacy_sanitize_html(embed)
+
+    def run(sanitize):
+        for embed in embeds:
+            sanitize(embed)
+
+    cache = get_sanitized_cache()
+
+    def reused_cleaner():
+        cache.clear()
+        run(sanitize_html)
+
+    legacy = best_of(lambda: run(legacy_sanitize_html), repeat=5)
+    reused = best_of(reused_cleaner, repeat=5)
+    run(sanitize_html)
+    memo = best_of(lambda: run(sanitize_html), repeat=5)
+
+    print(f"{EMBEDS} raw_html blocks")
+    print(f"  fresh Cleaner per block: {format_seconds(legacy)}")
+    print(f"  reused Cleaner:          {format_seconds(reused)} ({legacy / reused:.1f}x)")
+    print(f"  memo hits:               {format_seconds(memo)} ({legacy / memo:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
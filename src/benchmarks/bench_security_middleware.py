@@ -0,0 +1,57 @@
+"""Security headers middleware per request: per-call policy build vs compiled policy."""
+
+import time
+
+from benchmarks.common import format_seconds, setup_django
+
+setup_django()
+
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from benchmarks.legacy import LegacyFrontendSecurityHeadersMiddleware  # noqa: E402
+from blog.middleware import FrontendSecurityHeadersMiddleware  # noqa: E402
+
+REQUESTS = 20_000
+REPEAT = 7
+
+
+def time_middleware(middleware_class, render_nonce=False):
+    """Best seconds per request spent in the middleware; views hand back prebuilt responses."""
+    factory = RequestFactory()
+    requests = [factory.get(f"/blog/post-{index % 50}/") for index in range(REQUESTS)]
+    best = float("inf")
+    for _ in range(REPEAT):
+        responses = iter([HttpResponse("ok") for _ in range(REQUESTS)])
+
+        def view(request):
+            if render_nonce:
+                str(request.csp_nonce)
+            return next(responses)
+
+        middleware = middleware_class(view)
+        start = time.perf_counter()
+        for request in requests:
+            middleware(request)
+        best = min(best, (time.perf_counter() - start) / REQUESTS)
+    return best
+
+
+def main():
+    request = RequestFactory().get("/blog/post/")
+    legacy_headers = LegacyFrontendSecurityHeadersMiddleware(lambda r: HttpResponse("ok"))(request)
+    compiled_headers = FrontendSecurityHeadersMiddleware(lambda r: HttpResponse("ok"))(request)
+    assert dict(compiled_headers.headers) == dict(legacy_headers.headers)
+
+    legacy = time_middleware(LegacyFrontendSecurityHeadersMiddleware)
+    compiled = time_middleware(FrontendSecurityHeadersMiddleware)
+    nonced = time_middleware(FrontendSecurityHeadersMiddleware, render_nonce=True)
+
+    print(f"{REQUESTS} requests, time in the middleware per request")
+    print(f"  per-call policy:  {format_seconds(legacy)}")
+    print(f"  compiled policy:  {format_seconds(compiled)} ({legacy / compiled:.1f}x)")
+    print(f"  compiled + nonce: {format_seconds(nonced)} ({legacy / nonced:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Word counting on LaTeX-dense text: legacy masking cascade vs linear scanner."""
+
+import random
+from unittest.mock import patch
+
+from benchmarks.common import best_of, format_seconds, sentence, setup_django
+
+setup_django()
+
+from benchmarks.legacy import legacy_count_words  # noqa: E402
+from blog.post_processing import PostProcessor, count_words  # noqa: E402
+
+MATH = ("$x^2$", "$\\alpha_i + \\beta_j$", "$$\\sum_{k=0}^{n} k^2$$", "\\(a \\cdot b\\)")
+PARAGRAPH_WORDS = (200, 2_000, 20_000)
+
+
+def latex_paragraph(words, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    while words > 0:
+        parts.append(sentence(rng, 6))
+        parts.append(rng.choice(MATH))
+        words -= 7
+    return " ".join(parts)
+
+
+def run_post(source):
+    processor = PostProcessor({}, False)
+    processor.feed(source)
+    processor.close()
+    return processor.total_deep_words
+
+
+def main():
+    print("single text node")
+    print(f"{'words':>8} {'legacy':>12} {'scanner':>12} {'speedup':>8}")
+    for words in PARAGRAPH_WORDS:
+        text = latex_paragraph(words)
+        assert count_words(text) == legacy_count_words(text)
+        old = best_of(lambda: legacy_count_words(text), repeat=3)
+        new = best_of(lambda: count_words(text), repeat=3)
+        print(f"{words:>8} {format_seconds(old):>12} {format_seconds(new):>12} {old / new:>7.2f}x")
+
+    source = "".join(f"<p>{latex_paragraph(120, seed)}</p>" for seed in range(200))
+    new = best_of(lambda: run_post(source), repeat=5)
+    with patch.object(PostProcessor, "_count_words", lambda self, text: legacy_count_words(text)):
+        old = best_of(lambda: run_post(source), repeat=5)
+    print(
+        f"\nLaTeX-dense post (200 paragraphs): legacy {format_seconds(old)}, scanner {format_seconds(new)}"
+    )
+
+
+if __name__ == "__main__":
+    main()
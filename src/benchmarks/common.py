@@ -0,0 +1,105 @@
+import contextlib
+import os
+import random
+import time
+
+WORDS = (
+    "splat ink turf weapon special rank match team stage mode lobby squid "
+    "octoling anchor slosher roller charger dualies brella splatling shooter"
+).split()
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "splattopblog.settings")
+    os.environ.setdefault("DEBUG", "true")
+    import django
+
+    django.setup()
+
+
+@contextlib.contextmanager
+def test_database():
+    """Create a throwaway migrated database for the duration of a benchmark."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def create_blog_index(slug="blog"):
+    """Attach a live BlogIndexPage under the default site's root page."""
+    from wagtail.models import Site
+
+    from blog.models import BlogIndexPage
+
+    root = Site.objects.get(is_default_site=True).root_page
+    index = BlogIndexPage(title="Blog", slug=slug)
+    root.add_child(instance=index)
+    return index
+
+
+def best_of(func, repeat=5, number=1):
+    """Return the best wall-clock seconds per call over ``repeat`` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:8.2f} ms"
+    return f"{seconds:8.2f} s "
+
+
+def sentence(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def synthetic_post_html(word_count, seed=0):
+    """Rendered-body shaped HTML: headings, prose, math, code and collapsibles."""
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    section = 0
+    while words < word_count:
+        section += 1
+        parts.append(
+            f'<div class="markdown-content">\n<h2>Section {section} {sentence(rng, 3)}</h2>'
+        )
+        for _ in range(3):
+            text = sentence(rng, 40)
+            parts.append(
+                f"<p>{text} with <strong>{rng.choice(WORDS)}</strong> and $x_{section}^2$ math.</p>"
+            )
+            words += 45
+        parts.append(
+            f'<figure class="post-image"><img src="/media/images/{section}.png" alt="Figure"></figure>'
+        )
+        parts.append(
+            '<pre><code class="language-python">def f(x):\n    return x * 2\n</code></pre>\n</div>'
+        )
+        if section % 2 == 0:
+            parts.append(
+                '<details class="collapsible-block collapsible-block--technical">\n'
+                '<summary class="collapsible-block__summary"><span class="collapsible-block__heading">'
+                f'<span class="collapsible-block__title">Deep dive {section}</span>'
+                '<span class="collapsible-block__readtime" data-collapsible-readtime>-- min</span>'
+                '</span></summary>\n<div class="collapsible-block__content">'
+            )
+            for _ in range(2):
+                parts.append(f"<p>{sentence(rng, 60)} &amp; more.</p>")
+                words += 61
+            parts.append("</div>\n</details>")
+    return "\n".join(parts)
@@ -0,0 +1,113 @@
+"""Implementations the optimised code replaced, kept as benchmark baselines.
+
+The equivalence tests in blog/tests also check the current code against these.
+"""
+
+import os
+import re
+
+from blog.post_processing import MATH_PATTERNS, WORD_REGEX, format_minutes
+
+
+def legacy_count_words(text):
+    """The original cascade: each pattern masks its matches by string rebuilding."""
+    if not text:
+        return 0
+    working = text
+    math_words = 0
+    for pattern in MATH_PATTERNS:
+        while True:
+            match = pattern.search(working)
+            if not match:
+                break
+            compact = re.sub(r"\s+", "", match.group(1) or "")
+            if compact:
+                math_words += max(1, int((len(compact) + 7) / 8))
+            working = working[: match.start()] + " " + working[match.end() :]
+    return len(WORD_REGEX.findall(working)) + math_words
+
+
+def alternation_spans(terms, text):
+    """Spans found by the alternation regex the glossary matcher replaces."""
+    unique = list(dict.fromkeys(term for term in terms if term))
+    unique.sort(key=len, reverse=True)
+    pattern = re.compile(
+        r"\b(" + "|".join(re.escape(term) for term in unique) + r")\b", re.IGNORECASE
+    )
+    return [match.span() for match in pattern.finditer(text)]
+
+
+def legacy_inject_collapsible_readtimes(html_text, word_counts):
+    """The original second pass: a regex over the finished HTML, popping counts in order."""
+    if not word_counts:
+        return html_text
+    counts = list(word_counts)
+
+    def repl(match):
+        if not counts:
+            return match.group(0)
+        words = counts.pop(0)
+        return f"{match.group(1)}{format_minutes(words)}{match.group(3)}"
+
+    pattern = re.compile(
+        r"(<span[^>]*data-collapsible-readtime[^>]*>)(.*?)(</span>)",
+        re.DOTALL,
+    )
+    return pattern.sub(repl, html_text)
+
+
+def legacy_sanitize_html(value):
+    """sanitize_html() before it reused a Cleaner; a fresh one per call."""
+    from bleach import clean
+    from wagtailmarkdown.utils import _get_bleach_kwargs
+
+    if not value:
+        return ""
+    kwargs = dict(_get_bleach_kwargs())
+    kwargs["strip"] = True
+    kwargs["strip_comments"] = True
+    return clean(str(value), **kwargs)
+
+
+class LegacyFrontendSecurityHeadersMiddleware:
+    """FrontendSecurityHeadersMiddleware before it compiled the policy in __init__."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enforce_csp = os.environ.get("CSP_ENFORCE", "false").strip().lower() in {
+            "1",
+            "true",
+            "yes",
+            "on",
+        }
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if self._is_admin_path(request.path):
+            return response
+
+        csp_header = (
+            "Content-Security-Policy" if self.enforce_csp else "Content-Security-Policy-Report-Only"
+        )
+        csp_directives = [
+            "default-src 'self'",
+            "base-uri 'self'",
+            "object-src 'none'",
+            "frame-ancestors 'self'",
+            "img-src 'self' data: https:",
+            "font-src 'self' data: https://cdn.jsdelivr.net",
+            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net",
+            "script-src 'self' https://cdn.jsdelivr.net",
+            "connect-src 'self'",
+            "form-action 'self'",
+        ]
+        if self.enforce_csp:
+            csp_directives.append("upgrade-insecure-requests")
+        csp_policy = "; ".join(csp_directives)
+        response.setdefault(csp_header, csp_policy)
+        response.setdefault("Permissions-Policy", "camera=(), microphone=(), geolocation=()")
+        return response
+
+    @staticmethod
+    def _is_admin_path(path):
+        return path.startswith("/admin/") or path.startswith("/django-admin/")
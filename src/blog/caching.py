@@ -0,0 +1,155 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+_stats_providers = {}
+
+
+class LRUCache:
+    """Thread-safe, size-bounded in-process cache with hit/miss counters."""
+
+    def __init__(self, maxsize):
+        self.maxsize = max(0, int(maxsize))
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class TieredCache:
+    """An LRUCache in front of a shared Django cache backend, e.g. a file cache.
+
+    Values found only in the backend are promoted into memory; writes go to
+    both tiers. The backend is looked up by alias on each call so settings
+    overrides take effect.
+    """
+
+    def __init__(self, memory, backend_alias=None, prefix=""):
+        self.memory = memory
+        self.backend_alias = backend_alias
+        self.prefix = prefix
+        self.backend_hits = 0
+        self.backend_misses = 0
+
+    def _backend(self):
+        if not self.backend_alias:
+            return None
+        from django.core.cache import caches
+
+        return caches[self.backend_alias]
+
+    def get(self, key, default=None):
+        value = self.memory.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        backend = self._backend()
+        if backend is None:
+            return default
+        value = backend.get(f"{self.prefix}{key}", _MISSING)
+        if value is _MISSING:
+            self.backend_misses += 1
+            return default
+        self.backend_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    def set(self, key, value):
+        self.memory.set(key, value)
+        backend = self._backend()
+        if backend is not None:
+            backend.set(f"{self.prefix}{key}", value, None)
+
+    def clear_memory(self):
+        """Drop the in-process tier; the shared backend keeps its entries."""
+        self.memory.clear()
+
+    def stats(self):
+        memory = self.memory.stats()
+        hits = memory["hits"] + self.backend_hits
+        lookups = memory["hits"] + memory["misses"]
+        return {
+            "memory": memory,
+            "backend_hits": self.backend_hits,
+            "backend_misses": self.backend_misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def bump_version(key):
+    """Move an integer version in the default cache past the implied 1."""
+    from django.core.cache import cache
+
+    if not cache.add(key, 2, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr().
+            cache.set(key, 2, None)
+
+
+def content_hash(payload):
+    """SHA-256 of a JSON-serialisable payload, stable across key order."""
+    try:
+        encoded = json.dumps(
+            payload,
+            ensure_ascii=True,
+            separators=(",", ":"),
+            sort_keys=True,
+        )
+    except TypeError:
+        encoded = json.dumps(str(payload), ensure_ascii=True)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def register_stats(name, provider):
+    """Expose a cache's counters on the admin cache-stats endpoint."""
+    _stats_providers[name] = provider
+
+
+def collect_stats():
+    return {name: provider() for name, provider in sorted(_stats_providers.items())}
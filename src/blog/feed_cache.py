@@ -0,0 +1,93 @@
+import hashlib
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .caching import register_stats
+
+CACHE_PREFIX = "blog:feeds"
+STATE_KEY = f"{CACHE_PREFIX}:state"
+CHANGED_KEY = f"{CACHE_PREFIX}:changed-at"
+# invalidate() drops the state in this process; workers with their own cache
+# recompute it, with one aggregate query, once it expires.
+STATE_TIMEOUT = 60
+# Entries are keyed by the feed ETag, so a publish orphans them; the timeout
+# only bounds how long orphans linger.
+CACHE_TIMEOUT = 60 * 60 * 24
+
+_stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+
+def feed_cache_stats():
+    return dict(_stats)
+
+
+register_stats("feeds", feed_cache_stats)
+
+
+def invalidate():
+    """Drop cached feeds after a post is published, unpublished or deleted."""
+    # Unpublishing can leave the newest last_published_at unchanged, so the
+    # change time also moves Last-Modified forward.
+    cache.set(CHANGED_KEY, timezone.now(), CACHE_TIMEOUT)
+    cache.delete(STATE_KEY)
+
+
+def feed_state(live_posts):
+    """Last-Modified and ETag shared by every feed, computed once per change.
+
+    ``live_posts`` returns the live posts' ``count`` and ``newest``
+    last_published_at; it only runs when the cached state has been invalidated
+    or has expired. The ETag depends on those alone, so every worker derives
+    the same one, and an unpublish or delete that leaves the newest post in
+    place still changes the count.
+    """
+    state = cache.get(STATE_KEY)
+    if state is None:
+        posts = live_posts()
+        newest = posts["newest"]
+        stamps = [stamp for stamp in (newest, cache.get(CHANGED_KEY)) if stamp]
+        marker = f"{posts['count']}:{newest.isoformat() if newest else 'empty'}"
+        state = {
+            "last_modified": max(stamps) if stamps else None,
+            "etag": quote_etag(hashlib.sha256(marker.encode("utf-8")).hexdigest()[:32]),
+        }
+        cache.set(STATE_KEY, state, STATE_TIMEOUT)
+    return state
+
+
+def _set_validators(response, state):
+    response["ETag"] = state["etag"]
+    if state["last_modified"] is not None:
+        response["Last-Modified"] = http_date(state["last_modified"].timestamp())
+    return response
+
+
+def serve_feed(request, name, state, render):
+    """Answer conditional GETs with 304 and serve feed bodies from the cache."""
+    last_modified = state["last_modified"]
+    not_modified = get_conditional_response(
+        request,
+        etag=state["etag"],
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if not_modified is not None:
+        _stats["not_modified"] += 1
+        return _set_validators(not_modified, state)
+
+    location = f"{request.get_host()}:{state['etag']}".encode("utf-8")
+    key = f"{CACHE_PREFIX}:{name}:{hashlib.sha256(location).hexdigest()[:32]}"
+    cached = cache.get(key)
+    if cached is not None:
+        _stats["hits"] += 1
+        content, content_type = cached
+        return _set_validators(HttpResponse(content, content_type=content_type), state)
+
+    _stats["misses"] += 1
+    response = render()
+    if response.status_code == 200:
+        cache.set(key, (response.content, response["Content-Type"]), CACHE_TIMEOUT)
+    return _set_validators(response, state)
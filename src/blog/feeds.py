@@ -1,7 +1,15 @@
+import functools
+
 from django.contrib.syndication.views import Feed
+from django.db.models import Count, Max
 from django.utils.feedgenerator import Atom1Feed
 
-from blog.models import BlogPage
+from blog import feed_cache, pagination
+from blog.models import BlogIndexPage, BlogPage
+
+
+def _live_posts():
+    return BlogPage.objects.live().aggregate(count=Count("pk"), newest=Max("last_published_at"))
 
 
 class BlogFeed(Feed):
@@ -9,8 +17,29 @@ class BlogFeed(Feed):
     link = "/blog/"
     description = "Latest posts from the SplatTop Blog"
 
-    def items(self):
-        return BlogPage.objects.live().order_by("-first_published_at")[:20]
+    def __call__(self, request, *args, **kwargs):
+        state = feed_cache.feed_state(_live_posts)
+        return feed_cache.serve_feed(
+            request,
+            type(self).__name__,
+            state,
+            functools.partial(super().__call__, request, *args, **kwargs),
+        )
+
+    def get_object(self, request, *args, **kwargs):
+        return request
+
+    def items(self, request):
+        posts = list(
+            BlogPage.objects.live()
+            .order_by(*pagination.ORDERING)
+            .defer(*BlogIndexPage.listing_deferred_fields)[:20]
+        )
+        # Passing the request lets Wagtail resolve site root paths once for
+        # the whole feed instead of once per item.
+        for post in posts:
+            post.feed_url = post.get_full_url(request)
+        return posts
 
     def item_title(self, item):
         return item.title
@@ -19,7 +48,7 @@ class BlogFeed(Feed):
         return item.abstract or item.search_description or ""
 
     def item_link(self, item):
-        return item.full_url
+        return item.feed_url
 
     def item_pubdate(self, item):
         return item.first_published_at
@@ -0,0 +1,132 @@
+import re
+
+from .caching import LRUCache, register_stats
+
+# Characters Python's re treats as case-insensitively equal but which
+# str.casefold() keeps apart. Folding them together only widens the trie's
+# candidates; non-ASCII candidates are confirmed against re itself.
+_EXTRA_FOLDS = {"ı": "i", "İ": "i"}
+
+
+def _fold_char(char):
+    if char < "\x80":
+        return char.lower()
+    if char in _EXTRA_FOLDS:
+        return _EXTRA_FOLDS[char]
+    folded = char.casefold()
+    if len(folded) == 1:
+        return folded
+    lowered = char.lower()
+    return lowered if len(lowered) == 1 else char
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class GlossaryMatcher:
+    """Find glossary terms in text with the semantics of the old alternation regex.
+
+    That regex was ``\\b(term|...)\\b`` with terms sorted longest first, compiled
+    with re.IGNORECASE: at the leftmost word boundary, the longest term that is
+    also followed by a word boundary wins. Small glossaries still use that
+    regex; larger ones walk a trie keyed on folded characters, whose cost per
+    position does not grow with the number of terms.
+    """
+
+    _TERMINAL = object()
+    # Below this many terms the alternation regex scans faster than the trie
+    # walk (see benchmarks/bench_glossary.py), so small glossaries keep it.
+    REGEX_MAX_TERMS = 100
+
+    def __init__(self, terms):
+        self.terms = tuple(dict.fromkeys(term for term in terms if term))
+        self._pattern = None
+        self._start_pattern = None
+        if not self.terms:
+            return
+        if len(self.terms) < self.REGEX_MAX_TERMS:
+            ordered = sorted(self.terms, key=len, reverse=True)
+            alternation = "|".join(re.escape(term) for term in ordered)
+            self._pattern = re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE)
+            return
+        self._trie = {}
+        first_chars = set()
+        for term in self.terms:
+            node = self._trie
+            for char in term:
+                node = node.setdefault(_fold_char(char), {})
+            node.setdefault(self._TERMINAL, []).append(term)
+            first_chars.add(term[0])
+        # Positions where some term could start: a word boundary followed by a
+        # possible first character. Scanning for these stays in C.
+        char_class = "".join(re.escape(char) for char in sorted(first_chars))
+        self._start_pattern = re.compile(rf"\b(?=[{char_class}])", re.IGNORECASE)
+
+    def __bool__(self):
+        return bool(self.terms)
+
+    def _longest_at(self, text, start):
+        node = self._trie
+        candidates = []
+        position = start
+        length = len(text)
+        while position < length:
+            node = node.get(_fold_char(text[position]))
+            if node is None:
+                break
+            position += 1
+            terms = node.get(self._TERMINAL)
+            if terms is not None:
+                candidates.append((position, terms))
+        for end, terms in reversed(candidates):
+            if not self._boundary(text, end):
+                continue
+            found = text[start:end]
+            if any(self._same_ignoring_case(term, found) for term in terms):
+                return end
+        return None
+
+    @staticmethod
+    def _same_ignoring_case(term, found):
+        if term.isascii() and found.isascii():
+            return True
+        return re.fullmatch(re.escape(term), found, re.IGNORECASE) is not None
+
+    @staticmethod
+    def _boundary(text, position):
+        before = position > 0 and _is_word_char(text[position - 1])
+        after = position < len(text) and _is_word_char(text[position])
+        return before != after
+
+    def finditer(self, text):
+        """Yield (start, end) spans of non-overlapping matches, left to right."""
+        if not text or not self.terms:
+            return
+        if self._pattern is not None:
+            for match in self._pattern.finditer(text):
+                yield match.span()
+            return
+        last = 0
+        for match in self._start_pattern.finditer(text):
+            start = match.start()
+            if start < last:
+                continue
+            end = self._longest_at(text, start)
+            if end is not None:
+                yield start, end
+                last = end
+
+
+_matchers = LRUCache(64)
+register_stats("glossary_matchers", _matchers.stats)
+
+
+def get_glossary_matcher(terms):
+    """Return a cached GlossaryMatcher for this exact term list."""
+    key = tuple(dict.fromkeys(term for term in terms if term))
+    matcher = _matchers.get(key)
+    if matcher is None:
+        matcher = GlossaryMatcher(key)
+        _matchers.set(key, matcher)
+    return matcher
@@ -0,0 +1,184 @@
+"""Intrinsic sizes, and optional blurred placeholders, for media images in post bodies.
+
+Raw HTML and markdown images usually come without width and height, so the
+browser cannot reserve their space until each file arrives. While a body is
+rendered, the post-processor looks up the <img> tags pointing into MEDIA_URL
+here and fills in what is missing. Sizes come from the MediaImage index; names
+not indexed yet are read from Wagtail's image and rendition rows, or from the
+file itself, once, and stored; files that cannot be read are stored as such, so
+they are not opened again. Only renders inside measuring(), from publishing,
+the render queue and commands, read files; a render at request time uses the
+index as it is and leaves new names to the queue.
+"""
+
+import base64
+import contextlib
+import io
+import logging
+import threading
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from wagtail.images import get_image_model
+
+from .caching import register_stats
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_WIDTH = 16
+PLACEHOLDER_BLUR = 1
+PLACEHOLDER_QUALITY = 40
+
+_stats = {"indexed": 0, "opened": 0, "failed": 0, "placeholders": 0, "deferred": 0}
+_local = threading.local()
+
+
+def image_dimension_stats():
+    return dict(_stats)
+
+
+register_stats("image_dimensions", image_dimension_stats)
+
+
+def placeholders_enabled():
+    return bool(getattr(settings, "BLOG_IMAGE_PLACEHOLDERS", False))
+
+
+def is_measuring():
+    return getattr(_local, "measuring", False)
+
+
+@contextlib.contextmanager
+def measuring(enabled=True):
+    """Let lookup() calls on this thread read and index media files."""
+    previous = is_measuring()
+    _local.measuring = enabled
+    try:
+        yield
+    finally:
+        _local.measuring = previous
+
+
+def media_image_name(src):
+    """The storage name ``src`` points at under MEDIA_URL, or None for other images."""
+    media_url = settings.MEDIA_URL or ""
+    if not src or not media_url:
+        return None
+    path = src.strip()
+    if media_url.startswith("/") and not media_url.startswith("//"):
+        # Same-origin media may also be written out with the site's host.
+        parts = urlsplit(path)
+        if parts.scheme in {"http", "https"} or path.startswith("//"):
+            path = parts.path
+    if not path.startswith(media_url):
+        return None
+    name = unquote(path[len(media_url) :].split("?", 1)[0].split("#", 1)[0])
+    if not name or name.endswith("/"):
+        return None
+    return name
+
+
+def _placeholder(image):
+    # Transparent images would show the blur through their clear areas.
+    if image.mode in {"RGBA", "LA", "PA"} or "transparency" in image.info:
+        return ""
+    from PIL import ImageFilter
+
+    image.draft("RGB", (PLACEHOLDER_WIDTH * 2, PLACEHOLDER_WIDTH * 2))
+    thumb = image.convert("RGB")
+    thumb.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    thumb = thumb.filter(ImageFilter.GaussianBlur(PLACEHOLDER_BLUR))
+    buffer = io.BytesIO()
+    thumb.save(buffer, "JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    _stats["placeholders"] += 1
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _read_file(name, with_placeholder):
+    """(width, height, placeholder) read from the stored file, or None if it cannot be."""
+    from PIL import Image
+
+    _stats["opened"] += 1
+    try:
+        with default_storage.open(name) as handle, Image.open(handle) as image:
+            width, height = image.size
+            placeholder = _placeholder(image) if with_placeholder else None
+    except Exception:
+        _stats["failed"] += 1
+        logger.info("Could not read media image %s", name, exc_info=True)
+        return None
+    return width, height, placeholder
+
+
+def _known_sizes(names):
+    """Sizes Wagtail already recorded for original images and renditions with these names."""
+    image_model = get_image_model()
+    sizes = {}
+    for model in (image_model, image_model.get_rendition_model()):
+        for name, width, height in model.objects.filter(file__in=names).values_list(
+            "file", "width", "height"
+        ):
+            if width and height:
+                sizes[name] = (width, height)
+    return sizes
+
+
+def lookup(names):
+    """Map each indexed media name to ``{"width", "height", "placeholder"}``.
+
+    Unreadable files map to None. Inside measuring(), names missing from the
+    index are measured and stored and, with placeholders enabled, indexed rows
+    that were measured without them get one filled in; otherwise missing names
+    are left out, for the caller to render again later.
+    """
+    from .models import MediaImage
+
+    names = set(names)
+    if not names:
+        return {}
+    measure = is_measuring()
+    with_placeholder = placeholders_enabled()
+    index = {row.name: row for row in MediaImage.objects.filter(name__in=names)}
+
+    if with_placeholder and measure:
+        for row in index.values():
+            if row.placeholder is not None or not row.readable:
+                continue
+            measured = _read_file(row.name, with_placeholder=True)
+            # A failed read leaves no placeholder rather than a retry on every render.
+            row.placeholder = measured[2] if measured is not None else ""
+            row.save(update_fields=["placeholder"])
+
+    missing = names - set(index)
+    if missing and not measure:
+        _stats["deferred"] += len(missing)
+    elif missing:
+        known = _known_sizes(missing)
+        created = []
+        for name in sorted(missing):
+            if name in known and not with_placeholder:
+                measured = (*known[name], None)
+            else:
+                measured = _read_file(name, with_placeholder)
+            if measured is None:
+                created.append(MediaImage(name=name, width=0, height=0, readable=False))
+                continue
+            width, height, placeholder = measured
+            created.append(
+                MediaImage(name=name, width=width, height=height, placeholder=placeholder)
+            )
+        MediaImage.objects.bulk_create(created, ignore_conflicts=True)
+        _stats["indexed"] += len(created)
+        index.update((row.name, row) for row in created)
+
+    return {
+        name: {
+            "width": row.width,
+            "height": row.height,
+            "placeholder": (row.placeholder or "") if with_placeholder else "",
+        }
+        if row.readable
+        else None
+        for name, row in index.items()
+    }
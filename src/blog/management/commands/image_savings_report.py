@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+from blog import renditions
+from blog.management.commands.rerender_blog_bodies import _parse_since
+from blog.models import BlogPage
+
+# What each template rendered before responsive renditions: one original-format width.
+LEGACY_SPECS = {
+    renditions.BODY_IMAGE_FILTER: "width-1200",
+    renditions.FEATURED_IMAGE_FILTER: "width-800",
+}
+
+
+def _max_width(spec):
+    return max(int(base.rsplit("-", 1)[1]) for base in Filter.expand_spec(spec))
+
+
+def pick_candidate(candidates, needed_width):
+    """The rendition a browser takes from a srcset: the narrowest at least ``needed_width`` wide."""
+    candidates = sorted(candidates, key=lambda rendition: rendition.width)
+    for rendition in candidates:
+        if rendition.width >= needed_width:
+            return rendition
+    return candidates[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare image bytes per post view before and after responsive, modern-format renditions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--viewport",
+            type=int,
+            default=390,
+            help="Viewport width in CSS pixels (default: 390, a typical phone).",
+        )
+        parser.add_argument(
+            "--dpr",
+            type=float,
+            default=2.0,
+            help="Device pixel ratio (default: 2).",
+        )
+        parser.add_argument(
+            "--since",
+            help="Only pages last published on or after this ISO date or datetime.",
+        )
+        parser.add_argument(
+            "--page-ids",
+            nargs="+",
+            type=int,
+            help="Only these page ids.",
+        )
+
+    def handle(self, *args, **options):
+        pages = BlogPage.objects.live().only("body", "featured_image")
+        if options["since"]:
+            pages = pages.filter(last_published_at__gte=_parse_since(options["since"]))
+        if options["page_ids"]:
+            pages = pages.filter(pk__in=options["page_ids"])
+
+        uses = []
+        page_count = 0
+        for page in pages.iterator(chunk_size=200):
+            page_count += 1
+            uses.extend(
+                (image_id, renditions.BODY_IMAGE_FILTER)
+                for image_id in renditions.body_image_ids(page.body.raw_data)
+            )
+            if page.featured_image_id:
+                uses.append((page.featured_image_id, renditions.FEATURED_IMAGE_FILTER))
+        if not uses:
+            self.stdout.write("No blog images to compare.")
+            return
+
+        specs = {
+            spec for responsive in LEGACY_SPECS for spec in renditions.responsive_specs(responsive)
+        }
+        found = {}
+        for rendition in (
+            get_image_model()
+            .get_rendition_model()
+            .objects.filter(image_id__in={image_id for image_id, _ in uses}, filter_spec__in=specs)
+            .only("image_id", "filter_spec", "file", "width")
+        ):
+            found[(rendition.image_id, rendition.filter_spec)] = rendition
+
+        sizes = {}
+
+        def size(rendition):
+            if rendition.pk not in sizes:
+                sizes[rendition.pk] = rendition.file.size
+            return sizes[rendition.pk]
+
+        before = after = compared = skipped = 0
+        for image_id, responsive in uses:
+            legacy = found.get((image_id, LEGACY_SPECS[responsive]))
+            bases = Filter.expand_spec(responsive)
+            candidates = None
+            for image_format in renditions.modern_formats():
+                formatted = [
+                    found.get((image_id, f"{base}|format-{image_format}")) for base in bases
+                ]
+                if all(formatted):
+                    candidates = formatted
+                    break
+            if legacy is None or candidates is None:
+                skipped += 1
+                continue
+            needed = min(options["viewport"], _max_width(responsive)) * options["dpr"]
+            before += size(legacy)
+            after += size(pick_candidate(candidates, needed))
+            compared += 1
+
+        saved = (1 - after / before) * 100 if before else 0.0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{compared} image views on {page_count} pages at {options['viewport']}px x{options['dpr']:g}: "
+                f"{filesizeformat(before)} before, {filesizeformat(after)} after ({saved:.1f}% smaller)."
+            )
+        )
+        if skipped:
+            self.stdout.write(
+                f"{skipped} image views skipped for missing renditions; run warm_renditions first."
+            )
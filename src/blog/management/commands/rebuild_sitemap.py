@@ -0,0 +1,15 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import sitemap
+
+
+class Command(BaseCommand):
+    help = "Re-render every stored sitemap entry from the page tree."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = sitemap.rebuild()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"Stored {count} sitemap entries in {elapsed:.1f}s."))
@@ -0,0 +1,182 @@
+import datetime
+import difflib
+import multiprocessing
+import time
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from blog import page_cache
+from blog.models import BlogPage, GlossaryTermUsage
+from blog.render_pipeline import render_pipeline_fingerprint
+
+
+def render_pages(page_ids, include_previous=False):
+    """Render the saved bodies of the given pages; runs inside pool workers."""
+    results = []
+    for page in BlogPage.objects.filter(pk__in=page_ids):
+        fingerprint = page._compute_body_render_cache_key()
+        rendered = page._render_body(measure_images=True)
+        fields = page.render_cache_fields(fingerprint, rendered)
+        fields["body_fingerprint"] = fingerprint
+        previous = page.body_rendered_html if include_previous else None
+        results.append((page.pk, page.title, fields, previous, rendered["glossary_term_ids"]))
+    return results
+
+
+def _render_chunk_with_previous(page_ids):
+    return render_pages(page_ids, include_previous=True)
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _parse_since(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"--since expects an ISO date or datetime, got {value!r}.")
+        parsed = datetime.datetime.combine(day, datetime.time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Re-render stored blog post bodies, e.g. after a template or markdown change."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only pages last published on or after this ISO date or datetime.",
+        )
+        parser.add_argument(
+            "--page-ids",
+            nargs="+",
+            type=int,
+            help="Only these page ids.",
+        )
+        parser.add_argument(
+            "--stale-only",
+            action="store_true",
+            help="Only pages rendered by a different render pipeline than this deploy's.",
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=multiprocessing.cpu_count(),
+            help="Worker processes; 1 renders in this process (default: CPU count).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=50,
+            help="Pages rendered per worker task and per bulk_update.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print a diff of pages whose rendered HTML would change without saving.",
+        )
+
+    def handle(self, *args, **options):
+        pages = BlogPage.objects.order_by("pk")
+        if options["since"]:
+            pages = pages.filter(last_published_at__gte=_parse_since(options["since"]))
+        if options["page_ids"]:
+            pages = pages.filter(pk__in=options["page_ids"])
+        if options["stale_only"]:
+            pages = pages.exclude(body_render_pipeline=render_pipeline_fingerprint())
+
+        chunk_size = max(1, options["chunk_size"])
+        processes = max(1, options["processes"])
+        dry_run = options["dry_run"]
+        # Only ids are collected here; bodies are loaded a chunk at a time by the workers.
+        page_ids = list(pages.values_list("pk", flat=True).iterator(chunk_size=chunk_size))
+        total = len(page_ids)
+        if not total:
+            self.stdout.write("No blog pages to re-render.")
+            return
+
+        chunks = _chunked(page_ids, chunk_size)
+        started = time.perf_counter()
+        done = changed = 0
+        pool = None
+        if processes > 1 and total > chunk_size:
+            # Forked workers must not inherit this process's open DB connections.
+            connections.close_all()
+            pool = multiprocessing.Pool(processes, initializer=_init_worker)
+            worker = _render_chunk_with_previous if dry_run else render_pages
+            results = pool.imap_unordered(worker, chunks)
+        else:
+            results = (render_pages(chunk, include_previous=dry_run) for chunk in chunks)
+
+        try:
+            for rendered in results:
+                if dry_run:
+                    changed += self._report_diffs(rendered)
+                else:
+                    changed += self._save(rendered)
+                done += len(rendered)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f"Rendered {done}/{total} pages ({done / elapsed:.1f} pages/sec)")
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        elapsed = time.perf_counter() - started
+        verb = "would change" if dry_run else "updated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Re-rendered {done} pages in {elapsed:.2f}s "
+                f"({done / elapsed:.1f} pages/sec); {changed} {verb}."
+            )
+        )
+
+    def _save(self, rendered):
+        if not rendered:
+            return 0
+        pages = []
+        glossary_usage = {}
+        for page_id, _title, fields, _previous, glossary_term_ids in rendered:
+            page = BlogPage(pk=page_id)
+            for name, value in fields.items():
+                setattr(page, name, value)
+            pages.append(page)
+            glossary_usage[page_id] = glossary_term_ids
+        BlogPage.objects.bulk_update(pages, list(rendered[0][2]))
+        GlossaryTermUsage.replace_for_pages(glossary_usage)
+        for page in pages:
+            page_cache.invalidate_page(page.pk)
+        return len(pages)
+
+    def _report_diffs(self, rendered):
+        changed = 0
+        for page_id, title, fields, previous, _glossary_term_ids in rendered:
+            current = fields["body_rendered_html"]
+            if current == (previous or ""):
+                continue
+            changed += 1
+            diff = difflib.unified_diff(
+                (previous or "").splitlines(),
+                current.splitlines(),
+                fromfile=f"{page_id} {title} (stored)",
+                tofile=f"{page_id} {title} (rendered)",
+                lineterm="",
+            )
+            self.stdout.write("\n".join(diff))
+        return changed
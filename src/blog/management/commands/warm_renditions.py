@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import renditions
+from blog.management.commands.rerender_blog_bodies import _chunked, _parse_since
+from blog.models import BlogPage
+
+
+class Command(BaseCommand):
+    help = "Generate the image renditions live blog posts need but do not have yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Only pages last published on or after this ISO date or datetime.",
+        )
+        parser.add_argument(
+            "--page-ids",
+            nargs="+",
+            type=int,
+            help="Only these page ids.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Threads generating renditions (default: BLOG_RENDITION_WORKERS).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=200,
+            help="Pages whose images are collected and generated per batch.",
+        )
+
+    def handle(self, *args, **options):
+        pages = BlogPage.objects.live().order_by("pk")
+        if options["since"]:
+            pages = pages.filter(last_published_at__gte=_parse_since(options["since"]))
+        if options["page_ids"]:
+            pages = pages.filter(pk__in=options["page_ids"])
+
+        page_ids = list(pages.values_list("pk", flat=True))
+        if not page_ids:
+            self.stdout.write("No blog pages to warm.")
+            return
+
+        started = time.perf_counter()
+        totals = {"generated": 0, "existing": 0, "failed": 0}
+        for chunk in _chunked(page_ids, max(1, options["chunk_size"])):
+            result = renditions.warm_pages(
+                BlogPage.objects.filter(pk__in=chunk).only(
+                    "body", "featured_image", "social_image"
+                ),
+                workers=options["workers"],
+            )
+            for key in totals:
+                totals[key] += result[key]
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {totals['generated']} renditions for {len(page_ids)} pages in {elapsed:.1f}s; "
+                f"{totals['existing']} already existed, {totals['failed']} failed."
+            )
+        )
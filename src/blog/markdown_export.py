@@ -0,0 +1,151 @@
+"""Plain-text Markdown export of blog post bodies, served at ``<post-url>.md``."""
+
+from django.utils.html import strip_tags
+
+
+def _escape_tag_value(value):
+    if value is None:
+        return ""
+    text = str(value)
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace("]", "\\]")
+
+
+def _struct_value_get(value, key, default=None):
+    getter = getattr(value, "get", None)
+    if callable(getter):
+        try:
+            return getter(key, default)
+        except TypeError:
+            pass
+    if hasattr(value, key):
+        return getattr(value, key)
+    try:
+        return value[key]
+    except Exception:
+        return default
+
+
+def _html_to_text(html):
+    if not html:
+        return ""
+    text = strip_tags(html)
+    return text.strip()
+
+
+def _render_block(block):
+    block_type = block.block_type
+    value = block.value
+
+    if block_type == "markdown":
+        return str(value).strip()
+
+    if block_type == "paragraph":
+        html = getattr(value, "source", None)
+        if html is None:
+            html = str(value)
+        return _html_to_text(html)
+
+    if block_type == "heading":
+        return f"## {_escape_tag_value(value)}"
+
+    if block_type == "image":
+        image_obj = _struct_value_get(value, "image", value)
+        title = _escape_tag_value(getattr(image_obj, "title", "") or "")
+        caption = _escape_tag_value(_struct_value_get(value, "caption", "") or "")
+        return f"[Image; Title={title}; Caption={caption}]"
+
+    if block_type == "code":
+        language = _struct_value_get(value, "language", "") or ""
+        code = _struct_value_get(value, "code", "") or ""
+        return f"```{language}\n{code}\n```"
+
+    if block_type == "raw_html":
+        return _html_to_text(str(value))
+
+    if block_type == "quote":
+        text = str(value).strip()
+        if not text:
+            return ""
+        return "\n".join(f"> {line}" if line else ">" for line in text.splitlines())
+
+    if block_type == "glossary":
+        terms = _struct_value_get(value, "terms", []) or []
+        auto_link = _struct_value_get(value, "auto_link", False)
+        show_list = _struct_value_get(value, "show_list", False)
+        header = (
+            "[Glossary; auto_link="
+            f"{'true' if auto_link else 'false'}; show_list={'true' if show_list else 'false'}]"
+        )
+        lines = [header]
+        for entry in terms:
+            term = _escape_tag_value(_struct_value_get(entry, "term", ""))
+            definition = _escape_tag_value(_struct_value_get(entry, "definition", ""))
+            aliases = _escape_tag_value(_struct_value_get(entry, "aliases", ""))
+            if not term and not definition:
+                continue
+            if aliases:
+                lines.append(f"- {term} ({aliases}): {definition}")
+            else:
+                lines.append(f"- {term}: {definition}")
+        lines.append("[/Glossary]")
+        return "\n".join(lines)
+
+    if block_type == "takeaway":
+        title = _escape_tag_value(_struct_value_get(value, "title", "") or "Key takeaway")
+        color = _escape_tag_value(_struct_value_get(value, "color", "") or "blue")
+        body = _escape_tag_value(_struct_value_get(value, "body", ""))
+        return f"[Takeaway; title={title}; color={color}] {body}"
+
+    if block_type == "applet_embed":
+        title = _escape_tag_value(_struct_value_get(value, "title", ""))
+        src = _escape_tag_value(_struct_value_get(value, "src", ""))
+        lazy = "true" if _struct_value_get(value, "lazy_load", True) else "false"
+        full_height = "true" if _struct_value_get(value, "use_full_height", False) else "false"
+        raw_max_height = _struct_value_get(value, "max_height", "")
+        max_height = _escape_tag_value("" if raw_max_height in ("", None) else str(raw_max_height))
+        style = _escape_tag_value(_struct_value_get(value, "style_overrides", ""))
+        return (
+            "[Applet; "
+            f"title={title}; src={src}; lazy_load={lazy}; full_height={full_height}; "
+            f"max_height={max_height}; style={style}]"
+        )
+
+    if block_type == "collapsible":
+        title = _escape_tag_value(_struct_value_get(value, "title", ""))
+        category = _struct_value_get(value, "category", "") or "default"
+        default_closed = (
+            "true" if not _struct_value_get(value, "open_by_default", False) else "false"
+        )
+        inner = render_blocks(_struct_value_get(value, "content", []))
+        header = (
+            f"[collapsible; title={title}; category={category}; default_closed={default_closed}]"
+        )
+        footer = "[/collapsible]"
+        if inner:
+            return f"{header}\n{inner}\n{footer}"
+        return f"{header}\n{footer}"
+
+    return ""
+
+
+def render_blocks(blocks):
+    parts = []
+    for block in blocks:
+        rendered = _render_block(block)
+        if rendered:
+            parts.append(rendered)
+    return "\n\n".join(parts)
+
+
+def render_markdown_document(title, date, body):
+    """Assemble the .md response from a post's title, date and exported body."""
+    lines = []
+    if title:
+        lines.append(f"# {title}")
+    if date:
+        lines.append(f"*{date}*")
+    if body:
+        if lines:
+            lines.append("")
+        lines.append(body)
+    return "\n".join(lines).strip() + "\n"
@@ -0,0 +1,77 @@
+"""Cache codehilite's Pygments output by content.
+
+Python-Markdown's codehilite tree processor and fenced_code preprocessor both
+look up ``CodeHilite`` as a module global, so this extension swaps in a subclass
+that memoises ``hilite()``. The key covers the source, every option and the
+Pygments version, so the HTML is identical to an uncached highlight, also after
+an upgrade leaves the on-disk tier in place.
+"""
+
+import functools
+import hashlib
+
+import pygments
+from django.conf import settings
+from markdown.extensions import Extension, codehilite, fenced_code
+
+from blog.caching import LRUCache, TieredCache, register_stats
+
+BACKEND_ALIAS = "code_highlight"
+
+
+@functools.cache
+def get_highlight_cache():
+    memory = LRUCache(getattr(settings, "BLOG_CODE_HIGHLIGHT_CACHE_SIZE", 1024))
+    alias = BACKEND_ALIAS if BACKEND_ALIAS in settings.CACHES else None
+    return TieredCache(memory, backend_alias=alias, prefix="codehilite:")
+
+
+register_stats("code_highlights", lambda: get_highlight_cache().stats())
+
+
+def _formatter_name(formatter):
+    if isinstance(formatter, str):
+        return formatter
+    return f"{formatter.__module__}.{formatter.__qualname__}"
+
+
+class CachedCodeHilite(codehilite.CodeHilite):
+    def cache_key(self, shebang):
+        options = sorted((name, repr(value)) for name, value in self.options.items())
+        signature = repr(
+            (
+                self.src,
+                self.lang,
+                self.guess_lang,
+                self.use_pygments,
+                self.lang_prefix,
+                _formatter_name(self.pygments_formatter),
+                options,
+                shebang,
+                pygments.__version__,
+            )
+        )
+        return hashlib.sha256(signature.encode("utf-8")).hexdigest()
+
+    def hilite(self, shebang=True):
+        cache = get_highlight_cache()
+        key = self.cache_key(shebang)
+        html = cache.get(key)
+        if html is None:
+            html = super().hilite(shebang=shebang)
+            cache.set(key, html)
+        return html
+
+
+def install():
+    codehilite.CodeHilite = CachedCodeHilite
+    fenced_code.CodeHilite = CachedCodeHilite
+
+
+class CodeHiliteCacheExtension(Extension):
+    def extendMarkdown(self, md):
+        install()
+
+
+def makeExtension(**kwargs):
+    return CodeHiliteCacheExtension(**kwargs)
@@ -0,0 +1,51 @@
+import threading
+
+import markdown
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.encoding import smart_str
+from django.utils.safestring import mark_safe
+from wagtailmarkdown.utils import _get_markdown_kwargs, _sanitise_markdown_html
+
+_local = threading.local()
+_generation = 0
+
+
+@receiver(setting_changed)
+def _discard_converters(setting, **kwargs):
+    global _generation
+    if setting == "WAGTAILMARKDOWN":
+        _generation += 1
+
+
+def _converter_pool():
+    if getattr(_local, "generation", None) != _generation:
+        _local.generation = _generation
+        _local.pool = []
+    return _local.pool
+
+
+def build_converter():
+    """A Markdown instance configured exactly as wagtailmarkdown's filter builds one."""
+    return markdown.Markdown(**_get_markdown_kwargs())
+
+
+def markdown_to_html(text):
+    """Convert markdown with a reused per-thread converter instead of a fresh one per call.
+
+    Converters are checked out of a thread-local pool, so a nested conversion on
+    the same thread gets its own instance rather than clobbering the outer one.
+    """
+    pool = _converter_pool()
+    converter = pool.pop() if pool else build_converter()
+    try:
+        return converter.reset().convert(smart_str(text))
+    finally:
+        converter.reset()
+        pool.append(converter)
+
+
+def render_markdown(text):
+    """Drop-in for wagtailmarkdown.utils.render_markdown using pooled converters."""
+    # bleach has already sanitised the HTML, as in wagtailmarkdown.
+    return mark_safe(_sanitise_markdown_html(markdown_to_html(text)))  # noqa: S308
@@ -1,8 +1,62 @@
 import os
+import secrets
+
+CSP_DIRECTIVES = (
+    "default-src 'self'",
+    "base-uri 'self'",
+    "object-src 'none'",
+    "frame-ancestors 'self'",
+    "img-src 'self' data: https:",
+    "font-src 'self' data: https://cdn.jsdelivr.net",
+    # Inline style attributes (e.g. image placeholders) still need 'unsafe-inline';
+    # a nonce in this directive would make browsers ignore it.
+    "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net",
+    "script-src 'self' https://cdn.jsdelivr.net",
+    "connect-src 'self'",
+    "form-action 'self'",
+)
+# The directive that carries a response's nonce once a template asks for one.
+NONCE_DIRECTIVE = "script-src"
+PERMISSIONS_POLICY = "camera=(), microphone=(), geolocation=()"
+ADMIN_PATH_PREFIXES = ("/admin/", "/django-admin/")
+
+
+class CSPNonce:
+    """A response's script nonce, generated the first time a template renders it.
+
+    Templates write ``<script nonce="{{ request.csp_nonce }}">``; responses that
+    never do keep the precompiled policy and pay nothing for the nonce.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = None
+
+    def __str__(self):
+        if self.value is None:
+            self.value = secrets.token_urlsafe(16)
+        return self.value
+
+    __html__ = __str__
+
+    @property
+    def used(self):
+        return self.value is not None
+
+
+def nonce_used(request):
+    """Whether the response to ``request`` embeds a per-response nonce."""
+    nonce = getattr(request, "csp_nonce", None)
+    return nonce is not None and nonce.used
 
 
 class FrontendSecurityHeadersMiddleware:
-    """Attach additional frontend security headers without impacting Wagtail admin."""
+    """Attach additional frontend security headers without impacting Wagtail admin.
+
+    The policy is compiled once; a response only gets a different one when a
+    template used ``request.csp_nonce``.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -12,32 +66,35 @@ class FrontendSecurityHeadersMiddleware:
             "yes",
             "on",
         }
+        self.csp_header = (
+            "Content-Security-Policy" if self.enforce_csp else "Content-Security-Policy-Report-Only"
+        )
+        directives = list(CSP_DIRECTIVES)
+        if self.enforce_csp:
+            directives.append("upgrade-insecure-requests")
+        self.csp_policy = "; ".join(directives)
+        # Policy text either side of the nonce, so a nonced response is one concatenation.
+        marker = "\0"
+        self.csp_nonce_policy = tuple(
+            "; ".join(
+                f"{directive} 'nonce-{marker}'"
+                if directive.split(" ", 1)[0] == NONCE_DIRECTIVE
+                else directive
+                for directive in directives
+            ).split(marker)
+        )
 
     def __call__(self, request):
+        if request.path.startswith(ADMIN_PATH_PREFIXES):
+            return self.get_response(request)
+
+        nonce = request.csp_nonce = CSPNonce()
         response = self.get_response(request)
-        if self._is_admin_path(request.path):
-            return response
-
-        csp_header = "Content-Security-Policy" if self.enforce_csp else "Content-Security-Policy-Report-Only"
-        csp_directives = [
-            "default-src 'self'",
-            "base-uri 'self'",
-            "object-src 'none'",
-            "frame-ancestors 'self'",
-            "img-src 'self' data: https:",
-            "font-src 'self' data: https://cdn.jsdelivr.net",
-            "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net",
-            "script-src 'self' https://cdn.jsdelivr.net",
-            "connect-src 'self'",
-            "form-action 'self'",
-        ]
-        if self.enforce_csp:
-            csp_directives.append("upgrade-insecure-requests")
-        csp_policy = "; ".join(csp_directives)
-        response.setdefault(csp_header, csp_policy)
-        response.setdefault("Permissions-Policy", "camera=(), microphone=(), geolocation=()")
+        if nonce.value is None:
+            policy = self.csp_policy
+        else:
+            head, tail = self.csp_nonce_policy
+            policy = f"{head}{nonce.value}{tail}"
+        response.headers.setdefault(self.csp_header, policy)
+        response.headers.setdefault("Permissions-Policy", PERMISSIONS_POLICY)
         return response
-
-    @staticmethod
-    def _is_admin_path(path):
-        return path.startswith("/admin/") or path.startswith("/django-admin/")
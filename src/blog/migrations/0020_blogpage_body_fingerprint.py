@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:50
+
+from django.db import migrations, models
+
+from blog.caching import content_hash
+
+
+def backfill_body_fingerprints(apps, schema_editor):
+    # Same hash as BlogPage._compute_body_render_cache_key(); no post uses the
+    # shared glossary yet at this point in the migration history.
+    BlogPage = apps.get_model('blog', 'BlogPage')
+    pages = BlogPage.objects.filter(body_fingerprint='').only('pk', 'body')
+    batch = []
+    for page in pages.iterator(chunk_size=200):
+        raw_data = getattr(page.body, 'raw_data', page.body)
+        page.body_fingerprint = content_hash(raw_data if raw_data is not None else [])
+        batch.append(page)
+        if len(batch) >= 200:
+            BlogPage.objects.bulk_update(batch, ['body_fingerprint'])
+            batch = []
+    if batch:
+        BlogPage.objects.bulk_update(batch, ['body_fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_blogpage_body_render_cache_key_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpage',
+            name='body_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_body_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 12:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_blogpage_body_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpage',
+            name='body_render_pipeline',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0021_blogpage_body_render_pipeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GlossaryTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=255, unique=True)),
+                ('definition', models.TextField()),
+                ('aliases', models.CharField(blank=True, help_text='Optional aliases (comma-separated).', max_length=255)),
+            ],
+            options={
+                'ordering': ['term'],
+            },
+        ),
+        migrations.AddField(
+            model_name='blogpage',
+            name='use_shared_glossary',
+            field=models.BooleanField(default=False, help_text='Link terms from the shared glossary in this post.'),
+        ),
+        migrations.CreateModel(
+            name='GlossaryTermUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='glossary_usages', to='blog.blogpage')),
+                ('term', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usages', to='blog.glossaryterm')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'page'), name='unique_glossary_term_usage')],
+            },
+        ),
+    ]
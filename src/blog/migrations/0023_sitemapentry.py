@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_shared_glossary'),
+        ('wagtailcore', '0094_alter_page_locale'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SitemapEntry',
+            fields=[
+                ('page', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='wagtailcore.page')),
+                ('path', models.CharField(db_index=True, max_length=255)),
+                ('location', models.TextField()),
+                ('xml', models.TextField()),
+                ('lastmod', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['path'],
+            },
+        ),
+    ]
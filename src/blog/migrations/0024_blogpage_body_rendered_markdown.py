@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0023_sitemapentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpage',
+            name='body_rendered_markdown',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 13:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0024_blogpage_body_rendered_markdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaImage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('placeholder', models.TextField(blank=True, null=True)),
+            ],
+        ),
+    ]
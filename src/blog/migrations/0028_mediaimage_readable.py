@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0027_sitemapentry_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediaimage',
+            name='readable',
+            field=models.BooleanField(default=True),
+        ),
+    ]
@@ -1,19 +1,33 @@
-import hashlib
-import json
-
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.core.paginator import Paginator
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save, pre_delete, pre_save
 from django.dispatch import receiver
 from wagtail import blocks
 from wagtail.admin.panels import FieldPanel, HelpPanel
 from wagtail.fields import StreamField
+from wagtail.images import get_image_model
 from wagtail.images.blocks import ImageChooserBlock
-from wagtail.models import Page
-from wagtail.signals import page_published
+from wagtail.models import Page, PageViewRestriction, Site
+from wagtail.signals import page_published, page_unpublished, post_page_move
+from wagtail.snippets.models import register_snippet
 from wagtailmarkdown.blocks import MarkdownBlock
 
+from . import (
+    feed_cache,
+    image_dimensions,
+    page_cache,
+    pagination,
+    path_index,
+    render_queue,
+    renditions,
+    shared_glossary,
+    sitemap,
+)
+from .caching import content_hash
+from .markdown_export import render_blocks as render_markdown_blocks
 from .post_processing import format_minutes, render_blog_body
+from .render_pipeline import render_pipeline_fingerprint
 
 
 class CodeBlock(blocks.StructBlock):
@@ -206,6 +220,77 @@ class CollapsibleBlock(blocks.StructBlock):
         template = "blog/blocks/collapsible_block.html"
 
 
+@register_snippet
+class GlossaryTerm(models.Model):
+    """A glossary term shared by every post that opts into the shared glossary."""
+
+    term = models.CharField(max_length=255, unique=True)
+    definition = models.TextField()
+    aliases = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Optional aliases (comma-separated).",
+    )
+    # With the row count, the shared glossary's version for every worker.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    panels = [
+        FieldPanel("term"),
+        FieldPanel("definition"),
+        FieldPanel("aliases"),
+    ]
+
+    def __str__(self):
+        return self.term
+
+    def names(self):
+        return shared_glossary.term_names(self.term, self.aliases)
+
+    def affected_page_ids(self, new_names=()):
+        """Live opted-in posts that link this term now or could after an edit.
+
+        Current links come from the GlossaryTermUsage reverse index. A spelling
+        an edit adds can start linking any opted-in post, and the stored HTML
+        cannot tell which: names appear escaped, inside other terms' links or
+        with different whitespace. So new spellings re-render every opted-in
+        post; definition edits only touch the posts that link the term.
+        """
+        page_ids = set()
+        if self.pk:
+            page_ids.update(self.usages.values_list("page_id", flat=True))
+        if any(new_names):
+            opted_in = BlogPage.objects.live().filter(use_shared_glossary=True)
+            page_ids.update(opted_in.values_list("pk", flat=True))
+        return page_ids
+
+    class Meta:
+        ordering = ["term"]
+
+
+class GlossaryTermUsage(models.Model):
+    """Reverse index of which posts link which shared glossary terms."""
+
+    term = models.ForeignKey(GlossaryTerm, on_delete=models.CASCADE, related_name="usages")
+    page = models.ForeignKey("blog.BlogPage", on_delete=models.CASCADE, related_name="glossary_usages")
+
+    @classmethod
+    def replace_for_pages(cls, term_ids_by_page):
+        """Record the shared terms each rendered page links, replacing older rows."""
+        if not term_ids_by_page:
+            return
+        cls.objects.filter(page_id__in=list(term_ids_by_page)).delete()
+        cls.objects.bulk_create(
+            cls(page_id=page_id, term_id=term_id)
+            for page_id, term_ids in term_ids_by_page.items()
+            for term_id in term_ids
+        )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "page"], name="unique_glossary_term_usage"),
+        ]
+
+
 class BlogIndexPage(Page):
     """Blog listing page."""
 
@@ -218,16 +303,68 @@ class BlogIndexPage(Page):
     subpage_types = ["blog.BlogPage"]
     parent_page_types = ["home.HomePage"]
 
+    posts_per_page = 9
+    # Must match the {% image %} filter in blog_index_page.html.
+    listing_image_filter = "fill-800x360"
+    # Columns the listing never reads; loading them dominates the row size.
+    listing_deferred_fields = ("body", "body_rendered_html", "body_rendered_toc_items", "body_rendered_markdown")
+
+    def get_posts(self):
+        """Live posts for the listing, with featured images and their renditions prefetched.
+
+        Queries BlogPage directly instead of resolving .specific() on generic
+        pages, so a page of posts costs a fixed number of queries.
+        """
+        renditions = get_image_model().get_rendition_model().objects.filter(
+            filter_spec=self.listing_image_filter
+        )
+        return (
+            BlogPage.objects.child_of(self)
+            .live()
+            .order_by(*pagination.ORDERING)
+            .defer(*self.listing_deferred_fields)
+            .select_related("featured_image")
+            .prefetch_related(
+                models.Prefetch(
+                    "featured_image__renditions",
+                    queryset=renditions,
+                    to_attr="prefetched_renditions",
+                )
+            )
+        )
+
     def get_context(self, request):
         context = super().get_context(request)
-        posts = self.get_children().live().specific().order_by("-first_published_at")
-        paginator = Paginator(posts, 9)
-        page_number = request.GET.get("page")
-        page_obj = paginator.get_page(page_number)
+        posts = self.get_posts()
+        count = pagination.cached_post_count(self.path, posts)
+        if getattr(settings, "BLOG_INDEX_PAGINATION", "offset") == pagination.KEYSET:
+            paginator = None
+            page_obj = pagination.keyset_page(
+                posts,
+                self.posts_per_page,
+                count,
+                after=request.GET.get("after"),
+                before=request.GET.get("before"),
+            )
+            num_pages = page_obj.num_pages
+            previous_query = page_obj.previous_query
+            next_query = page_obj.next_query
+        else:
+            paginator = pagination.CountedPaginator(posts, self.posts_per_page, count)
+            page_obj = paginator.get_page(request.GET.get("page"))
+            num_pages = paginator.num_pages
+            previous_query = next_query = ""
+            if page_obj.has_previous() and page_obj.previous_page_number() > 1:
+                previous_query = f"?page={page_obj.previous_page_number()}"
+            if page_obj.has_next():
+                next_query = f"?page={page_obj.next_page_number()}"
         context["posts"] = page_obj
         context["page_obj"] = page_obj
         context["paginator"] = paginator
-        context["is_paginated"] = paginator.num_pages > 1
+        context["num_pages"] = num_pages
+        context["is_paginated"] = page_obj.has_other_pages()
+        context["previous_page_query"] = previous_query
+        context["next_page_query"] = next_query
         return context
 
     class Meta:
@@ -263,12 +400,28 @@ class BlogPage(Page):
         blank=True,
         use_json_field=True,
     )
+    use_shared_glossary = models.BooleanField(
+        default=False,
+        help_text="Link terms from the shared glossary in this post.",
+    )
+    body_fingerprint = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+    )
     body_render_cache_key = models.CharField(
         max_length=64,
         blank=True,
         default="",
         editable=False,
     )
+    body_render_pipeline = models.CharField(
+        max_length=64,
+        blank=True,
+        default="",
+        editable=False,
+    )
     body_rendered_html = models.TextField(
         blank=True,
         default="",
@@ -297,11 +450,17 @@ class BlogPage(Page):
         default="",
         editable=False,
     )
+    body_rendered_markdown = models.TextField(
+        blank=True,
+        default="",
+        editable=False,
+    )
 
     content_panels = Page.content_panels + [
         FieldPanel("date"),
         FieldPanel("featured_image"),
         FieldPanel("body"),
+        FieldPanel("use_shared_glossary"),
     ]
 
     promote_panels = Page.promote_panels + [
@@ -318,16 +477,22 @@ class BlogPage(Page):
 
     def _compute_body_render_cache_key(self):
         raw_data = getattr(self.body, "raw_data", self.body)
-        try:
-            payload = json.dumps(
-                raw_data if raw_data is not None else [],
-                ensure_ascii=True,
-                separators=(",", ":"),
-                sort_keys=True,
-            )
-        except TypeError:
-            payload = json.dumps(str(raw_data), ensure_ascii=True)
-        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        key = content_hash(raw_data if raw_data is not None else [])
+        if self.use_shared_glossary:
+            # Shared term edits re-render posts explicitly; the key only has to
+            # change when a post opts in or out.
+            key = content_hash(f"{key}:shared-glossary")
+        return key
+
+    def _render_body(self, measure_images=False):
+        shared_terms = shared_glossary.get_shared_terms() if self.use_shared_glossary else None
+        with (
+            renditions.resolving(renditions.RenditionResolver(renditions.body_filter_specs(self.body))),
+            image_dimensions.measuring(measure_images),
+        ):
+            rendered = render_blog_body(self.body, shared_terms=shared_terms)
+        rendered["body_markdown"] = render_markdown_blocks(self.body)
+        return rendered
 
     def _render_context_from_cache(self):
         fallback_readtime = format_minutes(0)
@@ -339,44 +504,136 @@ class BlogPage(Page):
             "readtime_deep": self.body_rendered_readtime_deep or fallback_readtime,
         }
 
-    def _persist_render_cache(self, body_cache_key, rendered):
-        if not self.pk:
-            return
-        update_fields = {
+    @staticmethod
+    def render_cache_fields(body_cache_key, rendered):
+        """Map a render_blog_body() result onto the persisted body_rendered_* fields."""
+        return {
             "body_render_cache_key": body_cache_key,
+            "body_render_pipeline": render_pipeline_fingerprint(),
             "body_rendered_html": rendered.get("body_html", ""),
             "body_rendered_toc_items": rendered.get("toc_items", []) or [],
             "body_rendered_toc_crumb": rendered.get("toc_crumb", ""),
             "body_rendered_readtime_main": rendered.get("readtime_main", ""),
             "body_rendered_readtime_deep": rendered.get("readtime_deep", ""),
+            "body_rendered_markdown": rendered.get("body_markdown", ""),
         }
+
+    def _persist_render_cache(self, body_cache_key, rendered, body_fingerprint=None):
+        if not self.pk:
+            return
+        update_fields = self.render_cache_fields(body_cache_key, rendered)
+        if body_fingerprint:
+            update_fields["body_fingerprint"] = body_fingerprint
         BlogPage.objects.filter(pk=self.pk).update(**update_fields)
         for key, value in update_fields.items():
             setattr(self, key, value)
+        GlossaryTermUsage.replace_for_pages({self.pk: rendered.get("glossary_term_ids", [])})
+        page_cache.invalidate_page(self.pk)
+        if rendered.get("images_pending"):
+            # Rendered at request time; the queue measures the new media images.
+            render_queue.get_render_queue().enqueue(self.pk, extend=False)
+
+    def refresh_render_cache(self, measure_images=True):
+        """Render the saved body and store the result, ignoring any cached copy.
+
+        Request-time callers pass ``measure_images=False``; see image_dimensions.
+        """
+        rendered = self._render_body(measure_images=measure_images)
+        body_cache_key = self.body_fingerprint or self._compute_body_render_cache_key()
+        self._persist_render_cache(body_cache_key, rendered, body_fingerprint=body_cache_key)
+        return rendered
+
+    @staticmethod
+    def _is_preview_request(request):
+        if request is None:
+            return False
+        if getattr(request, "is_preview", False):
+            return True
+        return (getattr(request, "path", "") or "").startswith("/admin/")
 
     def get_render_context(self, request=None):
-        body_cache_key = self._compute_body_render_cache_key()
+        # Live views serve the row as saved, so the fingerprint written by save()
+        # is authoritative. Previews carry unsaved body edits and must rehash.
+        is_preview = self._is_preview_request(request)
+        trusted_fingerprint = "" if is_preview else self.body_fingerprint
+        body_cache_key = trusted_fingerprint or self._compute_body_render_cache_key()
         raw_data = getattr(self.body, "raw_data", self.body)
         body_has_content = bool(raw_data)
         has_usable_cache = bool(self.body_rendered_html) or not body_has_content
         if self.body_render_cache_key == body_cache_key and has_usable_cache:
-            return self._render_context_from_cache()
-
-        rendered = render_blog_body(self.body)
-        is_admin_path = bool(request and (getattr(request, "path", "") or "").startswith("/admin/"))
-        if self.live and self.pk and not is_admin_path:
-            self._persist_render_cache(body_cache_key, rendered)
+            if self.body_render_pipeline == render_pipeline_fingerprint():
+                return self._render_context_from_cache()
+            if not is_preview:
+                # Rendered by an older deploy: keep serving it and refresh in the
+                # background, so a deploy does not re-render every post at once.
+                if self.live and self.pk:
+                    render_queue.get_render_queue().enqueue(self.pk, extend=False)
+                return self._render_context_from_cache()
+
+        rendered = self._render_body()
+        if self.live and self.pk and not is_preview:
+            self._persist_render_cache(body_cache_key, rendered, body_fingerprint=body_cache_key)
         return rendered
 
+    def get_markdown_body(self):
+        """The saved body's Markdown export, from the stored copy when it matches the body."""
+        raw_data = getattr(self.body, "raw_data", self.body)
+        has_usable_cache = bool(self.body_rendered_markdown) or not raw_data
+        body_cache_key = self.body_fingerprint or self._compute_body_render_cache_key()
+        if self.body_render_cache_key == body_cache_key and has_usable_cache:
+            if self.body_render_pipeline != render_pipeline_fingerprint() and self.live and self.pk:
+                render_queue.get_render_queue().enqueue(self.pk, extend=False)
+            return self.body_rendered_markdown
+        if self.live and self.pk:
+            return self.refresh_render_cache(measure_images=False)["body_markdown"]
+        return render_markdown_blocks(self.body)
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or {"body", "use_shared_glossary"} & set(update_fields):
+            self.body_fingerprint = self._compute_body_render_cache_key()
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "body_fingerprint"}
+        return super().save(*args, **kwargs)
+
     def get_context(self, request):
         context = super().get_context(request)
         context.update(self.get_render_context(request=request))
+        context["rendition_resolver"] = renditions.RenditionResolver(renditions.header_filter_specs(self))
         return context
 
     class Meta:
         verbose_name = "Blog Post"
 
 
+class SitemapEntry(models.Model):
+    """A live, public page's pre-rendered sitemap <url> element(s)."""
+
+    page = models.OneToOneField(Page, on_delete=models.CASCADE, primary_key=True, related_name="+")
+    # Copy of the page's tree path, so a site's entries are one ordered prefix scan.
+    path = models.CharField(max_length=255, db_index=True)
+    location = models.TextField()
+    xml = models.TextField()
+    lastmod = models.DateTimeField(null=True, blank=True)
+    # With the row count, the version that keys cached sitemap documents.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["path"]
+
+
+class MediaImage(models.Model):
+    """Intrinsic size of a media file referenced from post bodies; see image_dimensions."""
+
+    name = models.CharField(max_length=255, unique=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    # Blurred data URI placeholder: null until computed, empty for transparent images.
+    placeholder = models.TextField(null=True, blank=True)
+    # False for a file that could not be read, with zero sizes, so it is not opened again.
+    readable = models.BooleanField(default=True)
+
+
 @receiver(page_published)
 def precompute_blog_body_render_cache(sender, **kwargs):
     instance = kwargs.get("instance")
@@ -385,6 +642,146 @@ def precompute_blog_body_render_cache(sender, **kwargs):
     specific = getattr(instance, "specific", instance)
     if not isinstance(specific, BlogPage):
         return
-    rendered = render_blog_body(specific.body)
-    body_cache_key = specific._compute_body_render_cache_key()
-    specific._persist_render_cache(body_cache_key, rendered)
+    if render_queue.render_in_background():
+        page_id = specific.pk
+        transaction.on_commit(lambda: render_queue.get_render_queue().enqueue(page_id))
+        return
+    # Generate the renditions in the warmer's thread pool first; the render
+    # would otherwise create each missing one in turn.
+    renditions.warm_pages([specific])
+    specific.refresh_render_cache()
+
+
+@receiver(page_published)
+def warm_blog_page_renditions(sender, instance, **kwargs):
+    # Synchronous publishes warm them before rendering the body.
+    if not issubclass(sender, BlogPage) or not render_queue.render_in_background():
+        return
+    page_id = instance.pk
+    # Generated by the publishing request, so the first reader finds them ready.
+    transaction.on_commit(
+        lambda: renditions.warm_pages(BlogPage.objects.filter(pk=page_id).only("body", "featured_image", "social_image"))
+    )
+
+
+@receiver(page_unpublished)
+def invalidate_unpublished_blog_page(sender, **kwargs):
+    instance = kwargs.get("instance")
+    if instance is not None:
+        page_cache.invalidate_page(instance.pk)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_delete, sender=BlogPage)
+def invalidate_blog_listings(sender, **kwargs):
+    instance = kwargs.get("instance")
+    if instance is None or not issubclass(sender, BlogPage) or not instance.path:
+        return
+    pagination.forget_post_count(instance.path[: -Page.steplen])
+    feed_cache.invalidate()
+
+
+@receiver(post_page_move)
+def invalidate_moved_blog_listings(sender, parent_page_before, parent_page_after, **kwargs):
+    if not issubclass(sender, BlogPage):
+        return
+    pagination.forget_post_count(parent_page_before.path)
+    pagination.forget_post_count(parent_page_after.path)
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def invalidate_page_cache_on_restriction_change(sender, **kwargs):
+    page_cache.invalidate_all()
+
+
+@receiver(page_published)
+def refresh_sitemap_entry(sender, instance, **kwargs):
+    sitemap.refresh_page(instance)
+
+
+@receiver(page_unpublished)
+def remove_sitemap_entry(sender, instance, **kwargs):
+    sitemap.remove_page(instance)
+
+
+@receiver(post_page_move)
+def refresh_moved_sitemap_entries(sender, instance, **kwargs):
+    sitemap.refresh_subtree(instance)
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def refresh_restricted_sitemap_entries(sender, instance, **kwargs):
+    page = Page.objects.filter(pk=instance.page_id).first()
+    if page is not None:
+        sitemap.refresh_subtree(page)
+
+
+@receiver(pre_save, sender=Site)
+def remember_previous_site_root(sender, instance, **kwargs):
+    previous = Site.objects.filter(pk=instance.pk).values_list("root_page_id", flat=True)
+    instance._previous_root_page_id = previous.first() if instance.pk else None
+
+
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def refresh_site_sitemap_entries(sender, instance, **kwargs):
+    # Entries hold absolute URLs built from the site's hostname, port and root.
+    # Wagtail's own receiver may not have dropped the cached root paths yet.
+    Site.clear_site_root_paths_cache()
+    root_ids = {instance.root_page_id, getattr(instance, "_previous_root_page_id", None)}
+    for root in Page.objects.filter(pk__in=[pk for pk in root_ids if pk]):
+        sitemap.refresh_subtree(root)
+
+
+@receiver(post_delete, sender=Page)
+def drop_deleted_sitemap_entries(sender, **kwargs):
+    # Entries cascade with their page, which changes the version; only
+    # Last-Modified needs moving.
+    sitemap.changed()
+
+
+@receiver(post_migrate)
+def build_sitemap_after_migrate(sender, **kwargs):
+    if sender.label == "blog":
+        sitemap.rebuild_if_empty()
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+@receiver(post_page_move)
+@receiver(post_delete, sender=Page)
+@receiver(post_save, sender=Site)
+@receiver(post_delete, sender=Site)
+def invalidate_path_index(sender, **kwargs):
+    path_index.changed()
+
+
+@receiver(pre_save, sender=GlossaryTerm)
+def remember_previous_glossary_names(sender, instance, **kwargs):
+    previous = GlossaryTerm.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._previous_names = previous.names() if previous else []
+
+
+@receiver(pre_delete, sender=GlossaryTerm)
+def remember_glossary_term_pages(sender, instance, **kwargs):
+    instance._affected_page_ids = instance.affected_page_ids()
+
+
+@receiver(post_save, sender=GlossaryTerm)
+@receiver(post_delete, sender=GlossaryTerm)
+def rerender_pages_using_glossary_term(sender, instance, **kwargs):
+    page_ids = getattr(instance, "_affected_page_ids", None)
+    if page_ids is None:
+        previous = {name.lower() for name in getattr(instance, "_previous_names", ())}
+        added = [name for name in instance.names() if name.lower() not in previous]
+        page_ids = instance.affected_page_ids(added)
+
+    def enqueue_renders():
+        queue = render_queue.get_render_queue()
+        for page_id in sorted(page_ids):
+            queue.enqueue(page_id)
+
+    transaction.on_commit(enqueue_renders)
@@ -0,0 +1,133 @@
+"""Full-response cache for anonymous blog post views.
+
+Invalidation bumps version keys in the default cache, so it only reaches every
+worker when that cache is shared (CACHE_BACKEND=file). With the per-process
+locmem backend, other workers keep serving a post's old response until it
+expires after BLOG_PAGE_CACHE_TIMEOUT seconds.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+
+from .caching import bump_version, register_stats
+from .middleware import nonce_used
+
+CACHE_PREFIX = "blog:page-cache"
+STAT_NAMES = ("hits", "misses", "stores", "bypasses")
+
+
+def is_enabled():
+    return bool(getattr(settings, "BLOG_PAGE_CACHE_ENABLED", False))
+
+
+def _timeout():
+    return int(getattr(settings, "BLOG_PAGE_CACHE_TIMEOUT", 600))
+
+
+def _record(stat):
+    key = f"{CACHE_PREFIX}:stats:{stat}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def page_cache_stats():
+    values = cache.get_many([f"{CACHE_PREFIX}:stats:{stat}" for stat in STAT_NAMES])
+    stats = {stat: values.get(f"{CACHE_PREFIX}:stats:{stat}", 0) for stat in STAT_NAMES}
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+register_stats("page_responses", page_cache_stats)
+
+
+def _version_key(page_id):
+    return f"{CACHE_PREFIX}:version:{page_id}"
+
+
+def _generation_key():
+    return f"{CACHE_PREFIX}:generation"
+
+
+def invalidate_page(page_id):
+    """Orphan every cached response for one page."""
+    if page_id:
+        bump_version(_version_key(page_id))
+
+
+def invalidate_all():
+    """Orphan every cached page response, e.g. after view restrictions change."""
+    bump_version(_generation_key())
+
+
+def _response_key(page, request):
+    versions = cache.get_many([_generation_key(), _version_key(page.pk)])
+    generation = versions.get(_generation_key(), 1)
+    version = versions.get(_version_key(page.pk), 1)
+    # The scheme is part of the page: og:image and schema URLs are absolute.
+    location = f"{request.scheme}://{request.get_host()}{request.path}".encode("utf-8")
+    digest = hashlib.sha256(location).hexdigest()[:32]
+    return f"{CACHE_PREFIX}:{page.pk}:{generation}:{version}:{digest}"
+
+
+def is_cacheable_request(request):
+    if request.method not in {"GET", "HEAD"}:
+        return False
+    if request.GET or getattr(request, "is_preview", False):
+        return False
+    user = getattr(request, "user", None)
+    return not (user is not None and user.is_authenticated)
+
+
+def is_cacheable_page(page):
+    if not getattr(page, "live", False) or not page.pk:
+        return False
+    return not page.get_view_restrictions().exists()
+
+
+def serve_cached(page, request, serve):
+    """Serve an anonymous page view from the cache, storing the response on a miss.
+
+    Only the rendered body and content type are stored; per-response headers
+    (CSP, cookies, Vary) are added fresh by the middleware stack on every hit.
+    Bodies carrying a CSP nonce are not stored, since each hit gets a new one.
+    Callers must run this after view restrictions have been enforced.
+    """
+    if not is_enabled() or not is_cacheable_request(request):
+        return serve()
+
+    key = _response_key(page, request)
+    cached = cache.get(key)
+    if cached is not None:
+        _record("hits")
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+        response["X-Blog-Page-Cache"] = "hit"
+        return response
+
+    response = serve()
+    if request.method != "GET" or response.status_code != 200 or not is_cacheable_page(page):
+        _record("bypasses")
+        return response
+
+    _record("misses")
+    response["X-Blog-Page-Cache"] = "miss"
+
+    def store(rendered):
+        if rendered.cookies or nonce_used(request):
+            return
+        cache.set(key, (rendered.content, rendered["Content-Type"]), _timeout())
+        _record("stores")
+
+    if isinstance(response, SimpleTemplateResponse) and not response.is_rendered:
+        response.add_post_render_callback(store)
+    else:
+        store(response)
+    return response
@@ -0,0 +1,151 @@
+"""Blog listing pagination: offset pages with a cached count, or keyset cursors.
+
+Offset pages (``?page=N``) need ``COUNT(*)`` and an ``OFFSET`` scan that both
+grow with the archive. Keyset pages (``?after=<cursor>``/``?before=<cursor>``)
+seek on (first_published_at, id) instead, so page 500 costs the same as page 2.
+"""
+
+import base64
+import binascii
+import math
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+ORDERING = ("-first_published_at", "-pk")
+KEYSET = "keyset"
+# Publishes, unpublishes and moves forget the count in this process; other
+# workers with their own cache serve theirs until it expires.
+COUNT_TIMEOUT = 60
+
+
+def post_count_key(parent_path):
+    return f"blog:index:{parent_path}:post-count"
+
+
+def cached_post_count(parent_path, posts):
+    """Live post count under a listing, kept for COUNT_TIMEOUT seconds or until a change drops it."""
+    key = post_count_key(parent_path)
+    count = cache.get(key)
+    if count is None:
+        count = posts.count()
+        cache.set(key, count, COUNT_TIMEOUT)
+    return count
+
+
+def forget_post_count(parent_path):
+    cache.delete(post_count_key(parent_path))
+
+
+class CountedPaginator(Paginator):
+    """A Paginator that trusts a count computed elsewhere instead of running COUNT(*)."""
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._count = count
+
+    @cached_property
+    def count(self):
+        return self._count
+
+
+def encode_cursor(post, number):
+    raw = f"{post.first_published_at.isoformat()}|{post.pk}|{number}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    """Return (first_published_at, pk, page number), or None for a malformed cursor."""
+    if not value:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        published, pk, number = raw.split("|")
+        published = parse_datetime(published)
+        pk, number = int(pk), int(number)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if published is None:
+        return None
+    return published, pk, number
+
+
+class KeysetPage:
+    """One page of posts, shaped like django.core.paginator.Page for the listing template."""
+
+    def __init__(self, object_list, number, num_pages, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.num_pages = num_pages
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    @property
+    def previous_query(self):
+        if not self._has_previous or not self.object_list:
+            return ""
+        if self.number - 1 <= 1:
+            # The newest page lives at the listing's own URL.
+            return ""
+        return f"?before={encode_cursor(self.object_list[0], self.number - 1)}"
+
+    @property
+    def next_query(self):
+        if not self._has_next:
+            return ""
+        return f"?after={encode_cursor(self.object_list[-1], self.number + 1)}"
+
+
+def keyset_page(posts, per_page, count, after=None, before=None):
+    """Fetch the page after or before a cursor, newest first.
+
+    ``posts`` must be ordered by ORDERING. One query of per_page + 1 rows tells
+    whether a further page exists; the page number carried in the cursor is
+    only used for display.
+    """
+    num_pages = max(1, math.ceil(count / per_page))
+    # The cursor's page number is a hint; keep it within what the count allows.
+    last_number = max(num_pages, 2)
+    after_cursor = decode_cursor(after)
+    before_cursor = None if after_cursor else decode_cursor(before)
+
+    if after_cursor is not None:
+        published, pk, number = after_cursor
+        # The leading bound is redundant but gives the planner an index range.
+        older = Q(first_published_at__lte=published) & (
+            Q(first_published_at__lt=published) | Q(pk__lt=pk)
+        )
+        rows = list(posts.filter(older)[: per_page + 1])
+        number = min(max(number, 2), last_number)
+        return KeysetPage(rows[:per_page], number, num_pages, True, len(rows) > per_page)
+
+    if before_cursor is not None:
+        published, pk, number = before_cursor
+        newer = Q(first_published_at__gte=published) & (
+            Q(first_published_at__gt=published) | Q(pk__gt=pk)
+        )
+        rows = list(posts.filter(newer).reverse()[: per_page + 1])
+        has_previous = len(rows) > per_page
+        number = min(max(number, 2), last_number) if has_previous else 1
+        return KeysetPage(rows[:per_page][::-1], number, num_pages, has_previous, True)
+
+    rows = list(posts[: per_page + 1])
+    return KeysetPage(rows[:per_page], 1, num_pages, False, len(rows) > per_page)
@@ -0,0 +1,93 @@
+"""In-process url_path -> page id index for the .md route.
+
+Routing through ``site.root_page.route()`` costs a query per tree level. The
+index maps every live page's url_path to its id with one query, and is
+reloaded when its shared version moves after a publish, unpublish, move,
+delete or Site change. A stale entry can only cause a miss, because the page
+row is re-checked against the url_path it was found under; misses fall back to
+routing.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.http.request import split_domain_port
+from wagtail.models import Page, Site
+
+from .caching import bump_version, register_stats
+
+VERSION_KEY = "blog:path-index:version"
+INDEX_TIMEOUT = 60
+
+_lock = threading.Lock()
+_index = {"version": None, "loaded_at": 0.0, "paths": {}, "sites": {}, "reloads": 0}
+_stats = {"hits": 0, "misses": 0}
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 1)
+
+
+def changed():
+    """Make processes sharing the cache reload the index once the current transaction commits."""
+    transaction.on_commit(lambda: bump_version(VERSION_KEY))
+
+
+def _current_index():
+    version = current_version()
+    now = time.monotonic()
+    if _index["version"] != version or now - _index["loaded_at"] > INDEX_TIMEOUT:
+        paths = dict(Page.objects.live().values_list("url_path", "pk"))
+        with _lock:
+            _index.update(
+                version=version,
+                loaded_at=now,
+                paths=paths,
+                sites={},
+                reloads=_index["reloads"] + 1,
+            )
+    return _index["paths"], _index["sites"]
+
+
+def _site_root_path(request, sites):
+    # Keyed like Site.find_for_request() matches, so a warm lookup skips its query.
+    key = (split_domain_port(request.get_host())[0], request.get_port())
+    root_path = sites.get(key)
+    if root_path is None:
+        site = Site.find_for_request(request)
+        if site is None:
+            return None
+        root_path = sites[key] = site.root_page.url_path
+    return root_path
+
+
+def find_page(request, page_path, queryset):
+    """The live page in ``queryset`` at ``page_path`` under the request's site, or None."""
+    paths, sites = _current_index()
+    root_path = _site_root_path(request, sites)
+    page = None
+    if root_path is not None:
+        url_path = root_path + "".join(
+            f"{component}/" for component in page_path.split("/") if component
+        )
+        page_id = paths.get(url_path)
+        if page_id is not None:
+            page = queryset.live().filter(pk=page_id, url_path=url_path).first()
+    _stats["hits" if page is not None else "misses"] += 1
+    return page
+
+
+def path_index_stats():
+    lookups = _stats["hits"] + _stats["misses"]
+    return {
+        "version": _index["version"],
+        "paths": len(_index["paths"]),
+        "reloads": _index["reloads"],
+        **_stats,
+        "hit_rate": round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+    }
+
+
+register_stats("path_index", path_index_stats)
@@ -1,9 +1,15 @@
+import functools
 import html
 import re
 from html.parser import HTMLParser
 
+from django.conf import settings
 from django.template.loader import render_to_string
 
+from . import image_dimensions
+from .caching import LRUCache, content_hash, register_stats
+from .glossary_matching import get_glossary_matcher
+
 WORD_REGEX = re.compile(r"[A-Za-z0-9]+(?:'[A-Za-z0-9]+)?")
 MATH_PATTERNS = [
     re.compile(r"\[latex\](.+?)\[/latex\]", re.DOTALL),
@@ -12,6 +18,32 @@ MATH_PATTERNS = [
     re.compile(r"\\\((.+?)\\\)", re.DOTALL),
     re.compile(r"\$(.+?)\$", re.DOTALL),
 ]
+# Substring each MATH_PATTERNS entry needs before it can match. Masking a match
+# with a space never creates one, so the audit of the original text is final.
+MATH_TRIGGERS = ("[latex]", "$$", "\\[", "\\(", "$")
+
+# Markup the streaming tokenizer understands. Anything else that starts with
+# "<" (declarations, processing instructions, unquoted attribute values,
+# malformed tags) makes PostProcessor replay the document through HTMLParser.
+TOKEN_REGEX = re.compile(
+    r"<(?:"
+    r"([a-zA-Z][a-zA-Z0-9-]*)"
+    r"((?:\s+[a-zA-Z_:][-a-zA-Z0-9_:.]*(?:\s*=\s*(?:\"[^\"]*\"|'[^']*'))?)*)"
+    r"\s*(/?)>"
+    r"|/([a-zA-Z][-.a-zA-Z0-9:_]*)\s*>"
+    r"|!--((?:[^-]|-(?!-))*)-->"
+    r"|(?![a-zA-Z/!?])"
+    r")"
+)
+ATTR_REGEX = re.compile(
+    r"\s+([a-zA-Z_:][-a-zA-Z0-9_:.]*)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'))?"
+)
+# A start tag is canonical when re-serialising its parsed attributes would
+# reproduce the source text exactly, so it can be copied through verbatim.
+CANONICAL_TAG_REGEX = re.compile(
+    r"<[a-z][a-z0-9-]*(?: [a-z_:][-a-z0-9_:.]*(?:=\"[^\"&<>']*\")?)*(?: /)?>"
+)
+CDATA_TAGS = frozenset({"script", "style"})
 
 
 def _struct_value_get(value, key, default=None):
@@ -88,9 +120,51 @@ class HeadingSlugger:
         return candidate
 
 
-class PostProcessor(HTMLParser):
+def _math_weight(segment):
+    compact = len("".join(segment.split()))
+    return max(1, int((compact + 7) / 8)) if compact else 0
+
+
+def count_words(text):
+    """Count prose words plus weighted math, in one linear pass for typical text.
+
+    Each math span counts as one word per eight non-space characters and is
+    treated as a separator. Matches are equivalent to applying MATH_PATTERNS in
+    order, each masking its matches before the next runs; only text that could
+    match more than one pattern needs that cascade.
+    """
+    if not text:
+        return 0
+    candidates = [
+        pattern for trigger, pattern in zip(MATH_TRIGGERS, MATH_PATTERNS) if trigger in text
+    ]
+    if not candidates:
+        return len(WORD_REGEX.findall(text))
+    if len(candidates) == 1:
+        words = 0
+        position = 0
+        for match in candidates[0].finditer(text):
+            words += len(WORD_REGEX.findall(text, position, match.start()))
+            words += _math_weight(match.group(1))
+            position = match.end()
+        return words + len(WORD_REGEX.findall(text, position))
+
+    math_words = 0
+
+    def mask(match):
+        nonlocal math_words
+        math_words += _math_weight(match.group(1))
+        return " "
+
+    for pattern in candidates:
+        text = pattern.sub(mask, text)
+    return len(WORD_REGEX.findall(text)) + math_words
+
+
+class BasePostProcessor:
+    """Shared post-processing state; subclasses decide how markup is tokenized."""
+
     def __init__(self, glossary_terms, auto_link):
-        super().__init__(convert_charrefs=True)
         self.glossary_terms = glossary_terms or {}
         self.auto_link = bool(auto_link) and bool(self.glossary_terms)
         self.slugger = HeadingSlugger()
@@ -99,13 +173,17 @@ class PostProcessor(HTMLParser):
         self.total_main_words = 0
         self.total_deep_words = 0
         self.collapsible_word_counts = []
+        self.used_glossary_keys = set()
+        self.media_images = []
+        self._placeholders = image_dimensions.placeholders_enabled()
         self._heading = None
         self._skip_depth = 0
         self._skip_stack = []
         self._details_stack = []
         self._summary_depth = 0
+        self._readtime_slot = None
         self._manual_pattern = re.compile(r"\[\[([^\]]+)\]\]")
-        self._auto_pattern = self._build_auto_pattern()
+        self._auto_matcher = self._build_auto_matcher()
         self._skip_tags = {
             "script",
             "style",
@@ -122,16 +200,13 @@ class PostProcessor(HTMLParser):
             "post-sidebar",
         }
 
-    def _build_auto_pattern(self):
+    def _build_auto_matcher(self):
         if not self.auto_link:
             return None
         terms = [entry["term"] for entry in self.glossary_terms.values() if entry.get("term")]
         if not terms:
             return None
-        unique = list(dict.fromkeys(terms))
-        unique.sort(key=len, reverse=True)
-        escaped = [re.escape(term) for term in unique]
-        return re.compile(r"\b(" + "|".join(escaped) + r")\b", re.IGNORECASE)
+        return get_glossary_matcher(terms)
 
     def _write(self, text):
         if self._heading is not None:
@@ -172,26 +247,13 @@ class PostProcessor(HTMLParser):
         return False
 
     def _count_words(self, text):
-        if not text:
-            return 0
-        working = text
-        math_words = 0
-        for pattern in MATH_PATTERNS:
-            while True:
-                match = pattern.search(working)
-                if not match:
-                    break
-                segment = match.group(1) or ""
-                compact = re.sub(r"\s+", "", segment)
-                if compact:
-                    math_words += max(1, int((len(compact) + 7) / 8))
-                working = working[: match.start()] + " " + working[match.end() :]
-        word_count = len(WORD_REGEX.findall(working))
-        return word_count + math_words
+        return count_words(text)
 
     def _linkify_text(self, text):
         if not text:
             return ""
+        if not self._auto_matcher and "[[" not in text:
+            return html.escape(text)
         segments = []
         last = 0
         for match in self._manual_pattern.finditer(text):
@@ -207,6 +269,7 @@ class PostProcessor(HTMLParser):
                 entry = self.glossary_terms.get(key)
                 if entry:
                     label = label_raw or entry["term"]
+                    self.used_glossary_keys.add(key)
                     segments.append(("glossary", (label, key, entry["definition"])))
                 else:
                     segments.append(("text", match.group(0)))
@@ -223,25 +286,25 @@ class PostProcessor(HTMLParser):
                 output.append(self._glossary_button(label, key, definition))
                 continue
             chunk = payload
-            if self._auto_pattern:
+            if self._auto_matcher:
                 output.append(self._auto_linkify_chunk(chunk))
             else:
                 output.append(html.escape(chunk))
         return "".join(output)
 
     def _auto_linkify_chunk(self, text):
-        if not text or not self._auto_pattern:
+        if not text or not self._auto_matcher:
             return html.escape(text or "")
         output = []
         last = 0
-        for match in self._auto_pattern.finditer(text):
-            start, end = match.span()
+        for start, end in self._auto_matcher.finditer(text):
             if start > last:
                 output.append(html.escape(text[last:start]))
-            term_match = match.group(1)
+            term_match = text[start:end]
             key = term_match.lower()
             entry = self.glossary_terms.get(key)
             if entry:
+                self.used_glossary_keys.add(key)
                 output.append(self._glossary_button(term_match, key, entry["definition"]))
             else:
                 output.append(html.escape(term_match))
@@ -259,15 +322,17 @@ class PostProcessor(HTMLParser):
             f'title="{safe_def}">{safe_label}</button>'
         )
 
-    def handle_starttag(self, tag, attrs):
+    def handle_starttag(self, tag, attrs, raw=None):
         skip_tag = self._is_skip_tag(tag, attrs)
         self._skip_stack.append(skip_tag)
         if skip_tag:
             self._skip_depth += 1
         attrs = list(attrs)
+        attr_count = len(attrs)
         if tag == "img":
             self._ensure_attr(attrs, "loading", "lazy")
             self._ensure_attr(attrs, "decoding", "async")
+            self._track_media_image(attrs, self_closing=False)
         if tag in {"h1", "h2", "h3", "h4", "h5", "h6"} and self._heading is None:
             self._heading = {"tag": tag, "attrs": list(attrs), "buffer": [], "text": []}
             return
@@ -283,10 +348,108 @@ class PostProcessor(HTMLParser):
             if class_attr and "collapsible-block" in class_attr.split():
                 is_collapsible = True
             if is_collapsible:
-                self._details_stack.append({"open": open_attr, "words": 0})
+                self._details_stack.append({"open": open_attr, "words": 0, "readtime_slots": []})
         if tag == "summary" and self._details_stack:
             self._summary_depth += 1
-        self._write(f"<{tag}{self._format_attrs(attrs)}>")
+        if raw is not None and len(attrs) == attr_count:
+            self._write(raw)
+        else:
+            self._write(f"<{tag}{self._format_attrs(attrs)}>")
+        if tag == "span":
+            self._open_readtime_slot(attrs)
+
+    def _track_media_image(self, attrs, self_closing):
+        """Remember where an <img> from MEDIA_URL is written, for fill_media_images().
+
+        Call before the tag is written; images inside headings and read-time
+        placeholders are written elsewhere and left alone.
+        """
+        if self._heading is not None or self._readtime_slot is not None:
+            return
+        values = dict(attrs)
+        if "width" in values and "height" in values and not self._placeholders:
+            return
+        name = image_dimensions.media_image_name(values.get("src"))
+        if name is None:
+            return
+        self.media_images.append(
+            {
+                "position": len(self.output),
+                "attrs": attrs,
+                "self_closing": self_closing,
+                "name": name,
+            }
+        )
+
+    def fill_media_images(self, index):
+        """Add missing width/height, and placeholders, from image_dimensions.lookup() results."""
+        for image in self.media_images:
+            found = index.get(image["name"])
+            if found is None:
+                continue
+            attrs = image["attrs"]
+            values = dict(attrs)
+            width, height = values.get("width"), values.get("height")
+            changed = False
+            if width is None and height is None:
+                attrs.extend([("width", str(found["width"])), ("height", str(found["height"]))])
+                changed = True
+            elif height is None and width.isdigit():
+                scaled = round(int(width) * found["height"] / found["width"])
+                attrs.append(("height", str(scaled)))
+                changed = True
+            elif width is None and height.isdigit():
+                scaled = round(int(height) * found["width"] / found["height"])
+                attrs.append(("width", str(scaled)))
+                changed = True
+            style = values.get("style") or ""
+            if found["placeholder"] and "background" not in style:
+                placeholder = (
+                    f"background-size:cover;background-image:url({found['placeholder']})"
+                )
+                style = f"{style.rstrip().rstrip(';')};{placeholder}" if style.strip() else placeholder
+                attrs[:] = [(key, value) for key, value in attrs if key != "style"]
+                attrs.append(("style", style))
+                changed = True
+            if changed:
+                end = " />" if image["self_closing"] else ">"
+                self.output[image["position"]] = f"<img{self._format_attrs(attrs)}{end}"
+
+    def _open_readtime_slot(self, attrs):
+        """Remember where a collapsible's read-time placeholder sits in the output.
+
+        The count is only known once the <details> closes, so the placeholder's
+        output range is filled in then rather than by a second pass over the HTML.
+        """
+        if self._readtime_slot is not None:
+            self._readtime_slot["depth"] += 1
+            return
+        if not self._details_stack or self._heading is not None:
+            return
+        if not any(key == "data-collapsible-readtime" for key, _ in attrs):
+            return
+        slot = {"start": len(self.output), "end": None, "depth": 1}
+        self.output.append("")
+        self._details_stack[-1]["readtime_slots"].append(slot)
+        self._readtime_slot = slot
+
+    def _close_readtime_slot(self):
+        slot = self._readtime_slot
+        slot["depth"] -= 1
+        if slot["depth"] == 0:
+            slot["end"] = len(self.output)
+            self._readtime_slot = None
+
+    def _fill_readtime_slots(self, details):
+        readtime = format_minutes(details["words"])
+        for slot in details["readtime_slots"]:
+            if slot is self._readtime_slot:
+                self._readtime_slot = None
+            if slot["end"] is None:
+                continue
+            self.output[slot["start"]] = readtime
+            for index in range(slot["start"] + 1, slot["end"]):
+                self.output[index] = ""
 
     def handle_endtag(self, tag):
         if self._heading is not None and tag == self._heading["tag"]:
@@ -313,31 +476,42 @@ class PostProcessor(HTMLParser):
                 if self._skip_stack.pop():
                     self._skip_depth = max(0, self._skip_depth - 1)
             return
+        if tag == "span" and self._readtime_slot is not None:
+            self._close_readtime_slot()
         self._write(f"</{tag}>")
         if tag == "summary" and self._summary_depth > 0:
             self._summary_depth -= 1
         if tag == "details" and self._details_stack:
             details = self._details_stack.pop()
             self.collapsible_word_counts.append(details["words"])
+            self._fill_readtime_slots(details)
         if self._skip_stack:
             if self._skip_stack.pop():
                 self._skip_depth = max(0, self._skip_depth - 1)
 
-    def handle_startendtag(self, tag, attrs):
+    def handle_startendtag(self, tag, attrs, raw=None):
         skip_tag = self._is_skip_tag(tag, attrs)
         if skip_tag:
             self._skip_depth += 1
         attrs = list(attrs)
+        attr_count = len(attrs)
         if tag == "img":
             self._ensure_attr(attrs, "loading", "lazy")
             self._ensure_attr(attrs, "decoding", "async")
-        self._write(f"<{tag}{self._format_attrs(attrs)} />")
+            self._track_media_image(attrs, self_closing=True)
+        if raw is not None and len(attrs) == attr_count:
+            self._write(raw)
+        else:
+            self._write(f"<{tag}{self._format_attrs(attrs)} />")
         if skip_tag:
             self._skip_depth = max(0, self._skip_depth - 1)
 
     def handle_data(self, data):
         if data is None:
             return
+        if self._heading is None and data.isspace():
+            self._write(data)
+            return
         word_count = self._count_words(data) if self._skip_depth == 0 else 0
         if self._summary_depth == 0 and word_count and self._details_stack:
             for details in self._details_stack:
@@ -365,27 +539,115 @@ class PostProcessor(HTMLParser):
         self._write(f"<!--{data}-->")
 
 
-def format_minutes(words, words_per_minute=220):
-    minutes = max(1, round(words / words_per_minute))
-    return f"{minutes} min"
+class _HTMLParserDriver(HTMLParser):
+    """Feeds stdlib HTMLParser callbacks into a post-processor's handlers."""
 
+    def __init__(self, handler):
+        super().__init__(convert_charrefs=True)
+        self.handle_starttag = handler.handle_starttag
+        self.handle_endtag = handler.handle_endtag
+        self.handle_startendtag = handler.handle_startendtag
+        self.handle_data = handler.handle_data
+        self.handle_entityref = handler.handle_entityref
+        self.handle_charref = handler.handle_charref
+        self.handle_comment = handler.handle_comment
 
-def inject_collapsible_readtimes(html_text, word_counts):
-    if not word_counts:
-        return html_text
-    counts = list(word_counts)
 
-    def repl(match):
-        if not counts:
-            return match.group(0)
-        words = counts.pop(0)
-        return f"{match.group(1)}{format_minutes(words)}{match.group(3)}"
+class HTMLParserPostProcessor(BasePostProcessor):
+    """Reference engine that tokenizes with the stdlib HTMLParser."""
 
-    pattern = re.compile(
-        r"(<span[^>]*data-collapsible-readtime[^>]*>)(.*?)(</span>)",
-        re.DOTALL,
-    )
-    return pattern.sub(repl, html_text)
+    def __init__(self, glossary_terms, auto_link):
+        super().__init__(glossary_terms, auto_link)
+        self._driver = _HTMLParserDriver(self)
+
+    def feed(self, data):
+        self._driver.feed(data)
+
+    def close(self):
+        self._driver.close()
+
+
+class PostProcessor(BasePostProcessor):
+    """Single-pass post-processor.
+
+    Tokenizes the rendered body with one regex scan and copies canonical tags
+    through verbatim instead of re-escaping their attributes. Output is
+    byte-identical to HTMLParserPostProcessor; markup the tokenizer does not
+    model (declarations, script/style bodies, unquoted attributes, stray
+    "<") makes the whole document replay through HTMLParser instead.
+    """
+
+    def __init__(self, glossary_terms, auto_link):
+        super().__init__(glossary_terms, auto_link)
+        self._glossary_args = (glossary_terms, auto_link)
+        self._chunks = []
+
+    def feed(self, data):
+        self._chunks.append(data)
+
+    def close(self):
+        source = "".join(self._chunks)
+        self._chunks = []
+        if not self._stream(source):
+            BasePostProcessor.__init__(self, *self._glossary_args)
+            driver = _HTMLParserDriver(self)
+            driver.feed(source)
+            driver.close()
+
+    def _stream(self, source):
+        handle_data = self.handle_data
+        unescape = html.unescape
+        pos = 0
+        for match in TOKEN_REGEX.finditer(source):
+            start = match.start()
+            if start > pos:
+                text = source[pos:start]
+                if "<" in text:
+                    return False
+                handle_data(unescape(text) if "&" in text else text)
+            pos = match.end()
+            tag, attr_text, self_closing, end_tag, comment = match.groups()
+            if tag is not None:
+                raw = match.group(0)
+                if CANONICAL_TAG_REGEX.fullmatch(raw) is None:
+                    tag = tag.lower()
+                    raw = None
+                if tag in CDATA_TAGS and not self_closing:
+                    return False
+                attrs = self._parse_attrs(attr_text) if attr_text else []
+                if self_closing:
+                    self.handle_startendtag(tag, attrs, raw)
+                else:
+                    self.handle_starttag(tag, attrs, raw)
+            elif end_tag is not None:
+                self.handle_endtag(end_tag.lower())
+            elif comment is not None:
+                self.handle_comment(comment)
+            else:
+                handle_data("<")
+        if pos < len(source):
+            text = source[pos:]
+            if "<" in text:
+                return False
+            handle_data(unescape(text))
+        return True
+
+    @staticmethod
+    def _parse_attrs(attr_text):
+        attrs = []
+        for match in ATTR_REGEX.finditer(attr_text):
+            value = match.group(2)
+            if value is None:
+                value = match.group(3)
+            if value:
+                value = html.unescape(value)
+            attrs.append((match.group(1).lower(), value))
+        return attrs
+
+
+def format_minutes(words, words_per_minute=220):
+    minutes = max(1, round(words / words_per_minute))
+    return f"{minutes} min"
 
 
 def build_toc_hierarchy(toc_items):
@@ -414,7 +676,97 @@ def build_toc_hierarchy(toc_items):
     return items
 
 
-def render_blog_body(body):
+@functools.cache
+def get_block_fragment_cache():
+    return LRUCache(getattr(settings, "BLOG_BLOCK_RENDER_CACHE_SIZE", 2048))
+
+
+register_stats("block_fragments", lambda: get_block_fragment_cache().stats())
+
+
+def _image_signatures(block):
+    """Identify the image files and titles a block renders, so replaced files miss the cache.
+
+    The title is the alt text fallback for captionless images.
+    """
+    signatures = []
+
+    def visit(items):
+        for item in items:
+            block_type = getattr(item, "block_type", "")
+            value = getattr(item, "value", None)
+            if block_type == "image":
+                image = _struct_value_get(value, "image", None)
+                if image is not None:
+                    file_name = getattr(getattr(image, "file", None), "name", "")
+                    focal_point = [
+                        getattr(image, attr, None)
+                        for attr in (
+                            "focal_point_x",
+                            "focal_point_y",
+                            "focal_point_width",
+                            "focal_point_height",
+                        )
+                    ]
+                    signatures.append(
+                        [
+                            getattr(image, "pk", None),
+                            file_name,
+                            getattr(image, "title", ""),
+                            focal_point,
+                        ]
+                    )
+            elif block_type == "collapsible":
+                visit(_struct_value_get(value, "content", []) or [])
+
+    visit([block])
+    return signatures
+
+
+def block_fragment_key(raw_block, block):
+    return content_hash(
+        {
+            "type": raw_block.get("type"),
+            "value": raw_block.get("value"),
+            "images": _image_signatures(block),
+        }
+    )
+
+
+def render_body_blocks(body):
+    """Render each top-level block to HTML, reusing fragments whose content is unchanged."""
+    raw_blocks = getattr(body, "raw_data", None)
+    cache = get_block_fragment_cache()
+    fragments = []
+    for index, block in enumerate(body):
+        key = None
+        if raw_blocks is not None:
+            key = block_fragment_key(raw_blocks[index], block)
+            fragment = cache.get(key)
+            if fragment is not None:
+                fragments.append(fragment)
+                continue
+        fragment = render_to_string("blog/blocks/render_block.html", {"block": block})
+        if key is not None:
+            cache.set(key, fragment)
+        fragments.append(fragment)
+    return fragments
+
+
+def _shared_glossary_html(entries):
+    """Tooltip data for the shared terms a post links; post-local terms ship their own."""
+    terms = [
+        {"term": entry["term"], "definition": entry["definition"], "aliases": entry.get("aliases", "")}
+        for entry in entries
+    ]
+    return render_to_string(
+        "blog/blocks/glossary_block.html",
+        {"value": {"terms": terms, "auto_link": False, "show_list": False}},
+    )
+
+
+def render_blog_body(body, shared_terms=None):
+    """Render a post body; shared_terms are merged under the post's own glossary."""
     if not body:
         return {
             "body_html": "",
@@ -422,18 +774,31 @@ def render_blog_body(body):
             "toc_crumb": "",
             "readtime_main": format_minutes(0),
             "readtime_deep": format_minutes(0),
+            "glossary_term_ids": [],
         }
     glossary_terms, auto_link = collect_glossary_terms(body)
-    blocks_html = []
-    for block in body:
-        blocks_html.append(render_to_string("blog/blocks/render_block.html", {"block": block}))
-    raw_html = "\n".join(blocks_html)
+    if shared_terms:
+        glossary_terms = {**shared_terms, **glossary_terms}
+    raw_html = "\n".join(render_body_blocks(body))
 
     processor = PostProcessor(glossary_terms, auto_link)
     processor.feed(raw_html)
     processor.close()
+    images_pending = False
+    if processor.media_images:
+        index = image_dimensions.lookup(image["name"] for image in processor.media_images)
+        processor.fill_media_images(index)
+        images_pending = any(image["name"] not in index for image in processor.media_images)
     html_out = "".join(processor.output)
-    html_out = inject_collapsible_readtimes(html_out, processor.collapsible_word_counts)
+
+    shared_used = {}
+    for key in processor.used_glossary_keys:
+        entry = glossary_terms[key]
+        if entry.get("shared_id") is not None:
+            shared_used[entry["shared_id"]] = entry
+    if shared_used:
+        html_out += _shared_glossary_html(shared_used[pk] for pk in sorted(shared_used))
+
     toc_items = build_toc_hierarchy(processor.toc_items)
     return {
         "body_html": html_out,
@@ -441,4 +806,7 @@ def render_blog_body(body):
         "toc_crumb": toc_items[0]["text"] if toc_items else "",
         "readtime_main": format_minutes(processor.total_main_words),
         "readtime_deep": format_minutes(processor.total_deep_words),
+        "glossary_term_ids": sorted(shared_used),
+        # Media images left unsized because this render could not measure them.
+        "images_pending": images_pending,
     }
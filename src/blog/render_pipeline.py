@@ -0,0 +1,82 @@
+import functools
+import hashlib
+from importlib import metadata
+from pathlib import Path
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+
+from .caching import content_hash
+
+# Bump when rendering output changes in a way the hashed sources below miss.
+RENDER_PIPELINE_VERSION = 1
+
+APP_DIR = Path(__file__).resolve().parent
+BLOCK_TEMPLATE_DIR = "blog/blocks"
+PIPELINE_SOURCES = (
+    "post_processing.py",
+    "glossary_matching.py",
+    "shared_glossary.py",
+    "renditions.py",
+    "image_dimensions.py",
+    "markdown_rendering.py",
+    "markdown_export.py",
+    "markdown_extensions/*.py",
+    "templatetags/*.py",
+)
+PIPELINE_PACKAGES = ("markdown", "pygments", "bleach", "wagtail-markdown", "wagtail")
+
+
+def _file_digest(path):
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def _block_template_digests():
+    digests = {}
+    for path in sorted((APP_DIR / "templates" / BLOCK_TEMPLATE_DIR).glob("*.html")):
+        name = f"{BLOCK_TEMPLATE_DIR}/{path.name}"
+        try:
+            # Resolve through the loaders so project-level overrides are hashed.
+            origin = get_template(name).origin.name
+        except TemplateDoesNotExist:
+            origin = path
+        digests[name] = _file_digest(origin)
+    return digests
+
+
+def _source_digests():
+    digests = {}
+    for pattern in PIPELINE_SOURCES:
+        for path in sorted(APP_DIR.glob(pattern)):
+            digests[str(path.relative_to(APP_DIR))] = _file_digest(path)
+    return digests
+
+
+def _package_versions():
+    versions = {}
+    for package in PIPELINE_PACKAGES:
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = ""
+    return versions
+
+
+@functools.cache
+def render_pipeline_fingerprint():
+    """Hash everything besides the body that shapes rendered post HTML.
+
+    Computed once per process: templates and code only change on deploy, and a
+    deploy restarts the process.
+    """
+    return content_hash(
+        {
+            "version": RENDER_PIPELINE_VERSION,
+            "templates": _block_template_digests(),
+            "sources": _source_digests(),
+            "packages": _package_versions(),
+            "markdown": getattr(settings, "WAGTAILMARKDOWN", {}),
+            "image_placeholders": getattr(settings, "BLOG_IMAGE_PLACEHOLDERS", False),
+        }
+    )
@@ -0,0 +1,147 @@
+import functools
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .caching import register_stats
+
+logger = logging.getLogger(__name__)
+
+
+def render_in_background():
+    return bool(getattr(settings, "BLOG_RENDER_IN_BACKGROUND", False))
+
+
+def _render_page(page_id):
+    from .models import BlogPage
+
+    page = BlogPage.objects.filter(pk=page_id, live=True).first()
+    if page is not None:
+        page.refresh_render_cache()
+
+
+class RenderQueue:
+    """Single-worker queue that re-renders blog bodies off the request thread.
+
+    Each page is queued at most once: publishing it again before the worker
+    picks it up pushes its deadline back by ``debounce`` seconds, so a burst of
+    publishes collapses into one render of the latest saved body.
+    """
+
+    def __init__(self, render=_render_page, debounce=0.5):
+        self.render = render
+        self.debounce = max(0.0, float(debounce))
+        self._pending = {}
+        self._active = None
+        self._condition = threading.Condition()
+        self._worker = None
+        self.enqueued = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_seconds = 0.0
+
+    def enqueue(self, page_id, extend=True):
+        """Queue a render; ``extend=False`` keeps an already-queued page's deadline.
+
+        Page views that find a stale render pass ``extend=False`` so steady
+        traffic to a popular post cannot keep postponing its refresh.
+        """
+        if not page_id:
+            return
+        with self._condition:
+            if page_id in self._pending or (not extend and page_id == self._active):
+                self.coalesced += 1
+                if not extend:
+                    return
+            else:
+                self.enqueued += 1
+            self._pending[page_id] = time.monotonic() + self.debounce
+            self._ensure_worker()
+            self._condition.notify()
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="blog-render-queue", daemon=True)
+            self._worker.start()
+
+    def _next_job(self):
+        with self._condition:
+            while True:
+                if not self._pending:
+                    self._condition.wait()
+                    continue
+                page_id, deadline = min(self._pending.items(), key=lambda item: item[1])
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                del self._pending[page_id]
+                self._active = page_id
+                return page_id
+
+    def _run(self):
+        while True:
+            page_id = self._next_job()
+            started = time.perf_counter()
+            try:
+                close_old_connections()
+                self.render(page_id)
+            except Exception:
+                logger.exception("Background render of blog page %s failed", page_id)
+                succeeded = False
+            else:
+                succeeded = True
+            finally:
+                connection.close()
+            self._finish(time.perf_counter() - started, succeeded)
+
+    def _finish(self, elapsed, succeeded):
+        with self._condition:
+            self._active = None
+            if succeeded:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.last_seconds = elapsed
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            self._condition.notify_all()
+
+    def wait_until_idle(self, timeout=None):
+        """Block until every queued render has finished; returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending or self._active is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def stats(self):
+        with self._condition:
+            renders = self.completed + self.failed
+            return {
+                "depth": len(self._pending) + (self._active is not None),
+                "enqueued": self.enqueued,
+                "coalesced": self.coalesced,
+                "completed": self.completed,
+                "failed": self.failed,
+                "last_seconds": round(self.last_seconds, 4),
+                "avg_seconds": round(self.total_seconds / renders, 4) if renders else 0.0,
+                "max_seconds": round(self.max_seconds, 4),
+            }
+
+
+@functools.cache
+def get_render_queue():
+    return RenderQueue(debounce=getattr(settings, "BLOG_RENDER_QUEUE_DEBOUNCE", 0.5))
+
+
+register_stats("render_queue", lambda: get_render_queue().stats())
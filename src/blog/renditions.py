@@ -0,0 +1,300 @@
+"""Generate the image renditions a blog post's templates will ask for.
+
+Templates create renditions lazily, so the first reader after a publish would
+otherwise pay for resizing every image, and on S3 for uploading the results.
+The warmer collects every (image, filter spec) pair the post, listing and
+social templates use, including images nested in collapsibles, skips the
+renditions that already exist and generates the rest in a thread pool.
+
+While a page renders, a RenditionResolver fetches the renditions it will use in
+one query and builds each storage URL once; the ``{% rendition %}`` tag in
+blog_images reads from it instead of resolving every image on its own.
+"""
+
+import contextlib
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from wagtail.images import get_image_model
+from wagtail.images.models import Filter
+
+from .caching import register_stats
+
+logger = logging.getLogger(__name__)
+
+# Filter specs used by blog/blocks/render_block.html, blog/blog_page.html and base.html.
+# Responsive specs expand to each width, in the original format and in every
+# format from modern_formats().
+BODY_IMAGE_FILTER = "width-{480,800,1200}"
+FEATURED_IMAGE_FILTER = "width-{480,800}"
+SOCIAL_IMAGE_FILTER = "fill-1200x630"
+MIME_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+_stats = {"generated": 0, "existing": 0, "failed": 0, "resolved": 0, "resolver_fallbacks": 0}
+_local = threading.local()
+
+
+def rendition_stats():
+    return dict(_stats)
+
+
+register_stats("renditions", rendition_stats)
+
+
+def _workers():
+    return max(1, int(getattr(settings, "BLOG_RENDITION_WORKERS", 4)))
+
+
+@functools.cache
+def modern_formats():
+    """Formats offered ahead of the original, best first; AVIF only where Pillow can encode it."""
+    from PIL import features
+
+    return ("avif", "webp") if features.check("avif") else ("webp",)
+
+
+def responsive_specs(spec):
+    """Every rendition a responsive spec like ``width-{480,800}`` stands for."""
+    specs = []
+    for base in Filter.expand_spec(spec):
+        specs.append(base)
+        specs.extend(f"{base}|format-{image_format}" for image_format in modern_formats())
+    return specs
+
+
+def body_image_ids(raw_blocks):
+    """Ids of the images in a body's raw stream data, including nested collapsibles."""
+    image_ids = []
+    for block in raw_blocks or []:
+        value = block.get("value") or {}
+        if block.get("type") == "image" and isinstance(value, dict) and value.get("image"):
+            image_ids.append(value["image"])
+        elif block.get("type") == "collapsible" and isinstance(value, dict):
+            image_ids.extend(body_image_ids(value.get("content")))
+    return image_ids
+
+
+def _want(wanted, image_id, *specs):
+    if image_id:
+        wanted.setdefault(image_id, set()).update(specs)
+    return wanted
+
+
+def body_filter_specs(body):
+    """Map image id -> filter specs for rendering a body's blocks."""
+    wanted = {}
+    for image_id in body_image_ids(getattr(body, "raw_data", body)):
+        _want(wanted, image_id, *responsive_specs(BODY_IMAGE_FILTER))
+    return wanted
+
+
+def header_filter_specs(page):
+    """Map image id -> filter specs for the post template around the body."""
+    wanted = _want({}, page.featured_image_id, *responsive_specs(FEATURED_IMAGE_FILTER))
+    # Schema and social meta fall back to the featured image without a social image.
+    return _want(wanted, page.social_image_id or page.featured_image_id, SOCIAL_IMAGE_FILTER)
+
+
+def page_filter_specs(page):
+    """Map image id -> filter specs for everything rendering ``page`` touches."""
+    from .models import BlogIndexPage
+
+    wanted = body_filter_specs(page.body)
+    for image_id, specs in header_filter_specs(page).items():
+        _want(wanted, image_id, *specs)
+    return _want(wanted, page.featured_image_id, BlogIndexPage.listing_image_filter)
+
+
+def missing_renditions(wanted):
+    """(image, specs) pairs for the renditions in ``wanted`` that do not exist yet."""
+    image_model = get_image_model()
+    images = image_model.objects.in_bulk(list(wanted))
+    existing = set(
+        image_model.get_rendition_model()
+        .objects.filter(image_id__in=list(images))
+        .values_list("image_id", "filter_spec", "focal_point_key")
+    )
+    jobs = []
+    for image_id, specs in sorted(wanted.items()):
+        image = images.get(image_id)
+        if image is None:
+            continue
+        missing = sorted(
+            spec
+            for spec in specs
+            if (image_id, spec, Filter(spec).get_cache_key(image)) not in existing
+        )
+        _stats["existing"] += len(specs) - len(missing)
+        if missing:
+            jobs.append((image, missing))
+    return jobs
+
+
+def _generate(image, specs):
+    try:
+        image.get_renditions(*specs)
+    except Exception:
+        _stats["failed"] += len(specs)
+        logger.exception("Could not generate renditions %s for image %s", specs, image.pk)
+        return 0
+    _stats["generated"] += len(specs)
+    return len(specs)
+
+
+def _generate_in_thread(image, specs):
+    try:
+        return _generate(image, specs)
+    finally:
+        connection.close()
+
+
+def generate(jobs, workers=None):
+    """Create the renditions for ``jobs``; returns how many were generated."""
+    workers = min(workers or _workers(), len(jobs))
+    if workers <= 1:
+        return sum(_generate(image, specs) for image, specs in jobs)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="renditions") as pool:
+        return sum(pool.map(lambda job: _generate_in_thread(*job), jobs))
+
+
+def warm_pages(pages, workers=None):
+    """Generate every missing rendition the given blog pages need."""
+    wanted = {}
+    for page in pages:
+        for image_id, specs in page_filter_specs(page).items():
+            wanted.setdefault(image_id, set()).update(specs)
+    jobs = missing_renditions(wanted)
+    missing = sum(len(specs) for _, specs in jobs)
+    generated = generate(jobs, workers) if jobs else 0
+    return {
+        "images": len(wanted),
+        "existing": sum(len(specs) for specs in wanted.values()) - missing,
+        "generated": generated,
+        "failed": missing - generated,
+    }
+
+
+class ResolvedRendition:
+    """The parts of a rendition the templates use, with its storage URL built once."""
+
+    __slots__ = ("rendition", "url", "width", "height")
+
+    def __init__(self, rendition):
+        self.rendition = rendition
+        self.url = rendition.url
+        self.width = rendition.width
+        self.height = rendition.height
+
+
+def _srcset(renditions):
+    by_width = {}
+    for rendition in renditions:
+        # width-N never upscales, so small images repeat a width; keep the first.
+        by_width.setdefault(rendition.width, rendition)
+    return ", ".join(f"{rendition.url} {width}w" for width, rendition in sorted(by_width.items()))
+
+
+class ResponsiveRendition:
+    """A <picture>'s renditions: modern-format sources and an original-format <img>.
+
+    ``fallback`` is the widest original-format rendition, for the <img> src and
+    its width and height; ``sources`` are ``{"type", "srcset"}`` dicts, best
+    format first.
+    """
+
+    __slots__ = ("fallback", "srcset", "sources")
+
+    def __init__(self, widths, formats):
+        # Ties go to the later spec, so a small image keeps the widest spec's file.
+        self.fallback = max(reversed(widths), key=lambda rendition: rendition.width)
+        self.srcset = _srcset(widths)
+        self.sources = [
+            {"type": MIME_TYPES[image_format], "srcset": _srcset(renditions)}
+            for image_format, renditions in formats.items()
+        ]
+
+
+class RenditionResolver:
+    """Renditions for one page render, fetched together on first use.
+
+    ``wanted`` maps image id -> the filter specs the render is expected to use.
+    Pairs outside it, or not generated yet, fall back to Image.get_rendition().
+    """
+
+    def __init__(self, wanted=None):
+        self.wanted = wanted or {}
+        self._resolved = {}
+        self._prefetched = False
+
+    def _prefetch(self):
+        self._prefetched = True
+        if not self.wanted:
+            return
+        filters = {spec: Filter(spec) for specs in self.wanted.values() for spec in specs}
+        found = (
+            get_image_model()
+            .get_rendition_model()
+            .objects.filter(image_id__in=list(self.wanted), filter_spec__in=list(filters))
+            .select_related("image")
+        )
+        for rendition in found:
+            spec = rendition.filter_spec
+            if spec not in self.wanted[rendition.image_id]:
+                continue
+            # Renditions made before a focal point change linger under the old key.
+            if rendition.focal_point_key == filters[spec].get_cache_key(rendition.image):
+                self._resolved[(rendition.image_id, spec)] = ResolvedRendition(rendition)
+
+    def resolve(self, image, spec):
+        key = (image.pk, spec)
+        if key not in self._resolved and not self._prefetched:
+            self._prefetch()
+        resolved = self._resolved.get(key)
+        if resolved is None:
+            _stats["resolver_fallbacks"] += 1
+            resolved = self._resolved[key] = ResolvedRendition(image.get_rendition(spec))
+        else:
+            _stats["resolved"] += 1
+        return resolved
+
+    def resolve_responsive(self, image, spec):
+        """The ResponsiveRendition for a spec like ``width-{480,800}``."""
+        specs = responsive_specs(spec)
+        if not self._prefetched:
+            self._prefetch()
+        missing = [item for item in specs if (image.pk, item) not in self._resolved]
+        if missing:
+            # One batched call instead of a lookup per width and format.
+            _stats["resolver_fallbacks"] += len(missing)
+            for item, rendition in image.get_renditions(*missing).items():
+                self._resolved[(image.pk, item)] = ResolvedRendition(rendition)
+        _stats["resolved"] += len(specs) - len(missing)
+
+        bases = Filter.expand_spec(spec)
+        widths = [self._resolved[(image.pk, base)] for base in bases]
+        formats = {
+            image_format: [
+                self._resolved[(image.pk, f"{base}|format-{image_format}")] for base in bases
+            ]
+            for image_format in modern_formats()
+        }
+        return ResponsiveRendition(widths, formats)
+
+
+def current_resolver():
+    return getattr(_local, "resolver", None)
+
+
+@contextlib.contextmanager
+def resolving(resolver):
+    """Serve ``{% rendition %}`` tags rendered on this thread from ``resolver``."""
+    previous = current_resolver()
+    _local.resolver = resolver
+    try:
+        yield resolver
+    finally:
+        _local.resolver = previous
@@ -0,0 +1,72 @@
+import threading
+
+from django.db.models import Count, Max
+
+from .caching import register_stats
+
+_lock = threading.Lock()
+_index = {"version": None, "terms": {}, "reloads": 0}
+
+
+def split_aliases(aliases):
+    return [alias.strip() for alias in (aliases or "").split(",") if alias.strip()]
+
+
+def term_names(term, aliases):
+    """Every spelling of a shared term that can appear in post text."""
+    return [name for name in [term.strip(), *split_aliases(aliases)] if name]
+
+
+def current_version():
+    """The glossary's (row count, last edit) from the database, shared by every worker.
+
+    Additions and edits move the newest updated_at; deletions change the count.
+    """
+    from .models import GlossaryTerm
+
+    version = GlossaryTerm.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+    return (version["count"], version["updated"])
+
+
+def build_terms(rows):
+    """Map (pk, term, definition, aliases) rows to collect_glossary_terms() entries."""
+    terms = {}
+    for pk, term, definition, aliases in rows:
+        term = (term or "").strip()
+        definition = (definition or "").strip()
+        if not term or not definition:
+            continue
+        entry = {"term": term, "definition": definition, "aliases": aliases or "", "shared_id": pk}
+        terms[term.lower()] = entry
+        for alias in split_aliases(aliases):
+            terms.setdefault(alias.lower(), entry)
+    return terms
+
+
+def get_shared_terms():
+    """The shared glossary as glossary entries, reloaded when its version moves.
+
+    Each call costs one aggregate query; it runs when opted-in posts render,
+    not on views of stored HTML.
+    """
+    version = current_version()
+    if _index["version"] == version:
+        return _index["terms"]
+    from .models import GlossaryTerm
+
+    rows = GlossaryTerm.objects.order_by("term").values_list("pk", "term", "definition", "aliases")
+    terms = build_terms(rows)
+    with _lock:
+        _index.update(version=version, terms=terms, reloads=_index["reloads"] + 1)
+    return terms
+
+
+def shared_glossary_stats():
+    return {
+        "version": str(_index["version"]),
+        "terms": len(_index["terms"]),
+        "reloads": _index["reloads"],
+    }
+
+
+register_stats("shared_glossary", shared_glossary_stats)
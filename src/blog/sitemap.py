@@ -0,0 +1,265 @@
+"""Pre-generated sitemap.
+
+Each live, public page's ``<url>`` element is rendered when the page is
+published, moved or has its view restrictions changed, or its site changes,
+and stored as a SitemapEntry. Serving joins the stored fragments in tree order
+and caches the bytes under the entries' version, read from the database so
+every worker sees a change; a crawl never walks the page tree or calls
+get_sitemap_urls(). Past MAX_URLS entries, /sitemap.xml becomes a sitemap
+index over /sitemap-<n>.xml sections.
+"""
+
+import hashlib
+import html
+import math
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+from wagtail.models import Page, Site
+
+from .caching import register_stats
+
+MAX_URLS = 50_000
+CACHE_PREFIX = "blog:sitemap"
+CHANGED_KEY = f"{CACHE_PREFIX}:changed-at"
+# Documents are keyed by the sitemap version, so a change orphans them; the
+# timeout only bounds how long orphans linger.
+CACHE_TIMEOUT = 60 * 60 * 24
+CONTENT_TYPE = "application/xml"
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+URLSET_CLOSE = "</urlset>\n"
+INDEX_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_CLOSE = "</sitemapindex>\n"
+
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "entries_written": 0}
+
+
+def sitemap_stats():
+    return dict(_stats)
+
+
+register_stats("sitemap", sitemap_stats)
+
+
+def _local(value):
+    if hasattr(value, "tzinfo") and timezone.is_aware(value):
+        return timezone.localtime(value)
+    return value
+
+
+def url_xml(url_info):
+    """One <url> element, matching django.contrib.sitemaps' sitemap.xml template."""
+    parts = [f"<url><loc>{html.escape(url_info['location'])}</loc>"]
+    if url_info.get("lastmod"):
+        parts.append(f"<lastmod>{_local(url_info['lastmod']):%Y-%m-%d}</lastmod>")
+    if url_info.get("changefreq"):
+        parts.append(f"<changefreq>{html.escape(str(url_info['changefreq']))}</changefreq>")
+    if url_info.get("priority"):
+        parts.append(f"<priority>{html.escape(str(url_info['priority']))}</priority>")
+    for alternate in url_info.get("alternates") or ():
+        parts.append(
+            f'<xhtml:link rel="alternate" hreflang="{html.escape(alternate["lang_code"])}" '
+            f'href="{html.escape(alternate["location"])}"/>'
+        )
+    parts.append("</url>")
+    return "".join(parts)
+
+
+def _build_entries(pages):
+    from .models import SitemapEntry
+
+    entries = []
+    for page in pages.live().public().order_by("path").defer_streamfields().specific():
+        urls = [url for url in page.get_sitemap_urls() if url.get("location")]
+        if not urls:
+            continue
+        lastmods = [url["lastmod"] for url in urls if url.get("lastmod")]
+        entries.append(
+            SitemapEntry(
+                page_id=page.pk,
+                path=page.path,
+                location=urls[0]["location"],
+                xml="".join(url_xml(url) for url in urls),
+                lastmod=max(lastmods, default=None),
+            )
+        )
+    return entries
+
+
+def _mark_changed():
+    # Removals leave every remaining lastmod unchanged, so the change time
+    # also moves Last-Modified forward.
+    cache.set(CHANGED_KEY, timezone.now(), CACHE_TIMEOUT)
+
+
+def changed():
+    """Move Last-Modified forward once the current transaction commits."""
+    transaction.on_commit(_mark_changed)
+
+
+def current_version():
+    """The entries' (row count, last write) from the database, shared by every worker.
+
+    Writes move the newest updated_at; removals change the count.
+    """
+    from .models import SitemapEntry
+
+    version = SitemapEntry.objects.aggregate(count=Count("pk"), updated=Max("updated_at"))
+    return version["count"], version["updated"]
+
+
+def _replace(pages):
+    from .models import SitemapEntry
+
+    entries = _build_entries(pages)
+    with transaction.atomic():
+        SitemapEntry.objects.filter(page_id__in=pages.values("pk")).delete()
+        SitemapEntry.objects.bulk_create(entries, batch_size=1000)
+    _stats["entries_written"] += len(entries)
+    changed()
+
+
+def refresh_subtree(page):
+    """Re-render the entries for a page and everything below it."""
+    _replace(Page.objects.descendant_of(page, inclusive=True))
+
+
+def refresh_page(page):
+    """Re-render one page's entry, or its subtree when its URL moved."""
+    from .models import SitemapEntry
+
+    previous = (
+        SitemapEntry.objects.filter(page_id=page.pk).values_list("location", flat=True).first()
+    )
+    if previous is not None and previous != page.get_full_url():
+        refresh_subtree(page)
+        return
+    _replace(Page.objects.filter(pk=page.pk))
+
+
+def remove_page(page):
+    from .models import SitemapEntry
+
+    SitemapEntry.objects.filter(page_id=page.pk).delete()
+    changed()
+
+
+def rebuild():
+    """Render every entry from scratch; the one full tree walk, run from migrate or a command."""
+    from .models import SitemapEntry
+
+    with transaction.atomic():
+        SitemapEntry.objects.all().delete()
+        root = Page.get_first_root_node()
+        if root is not None:
+            refresh_subtree(root)
+    return SitemapEntry.objects.count()
+
+
+def rebuild_if_empty():
+    from .models import SitemapEntry
+
+    if not SitemapEntry.objects.exists():
+        rebuild()
+
+
+def _section_url(site, number):
+    return f"{site.root_url}{reverse('sitemap-section', args=[number])}"
+
+
+def _document(site, section):
+    from .models import SitemapEntry
+
+    entries = SitemapEntry.objects.filter(path__startswith=site.root_page.path).order_by("path")
+    count = entries.count()
+    sections = max(1, math.ceil(count / MAX_URLS))
+
+    if section is None and sections > 1:
+        lastmods = list(entries.values_list("lastmod", flat=True))
+        parts = [INDEX_OPEN]
+        for number in range(1, sections + 1):
+            chunk = [
+                stamp for stamp in lastmods[(number - 1) * MAX_URLS : number * MAX_URLS] if stamp
+            ]
+            lastmod = f"<lastmod>{_local(max(chunk)).isoformat()}</lastmod>" if chunk else ""
+            parts.append(
+                f"<sitemap><loc>{html.escape(_section_url(site, number))}</loc>{lastmod}</sitemap>\n"
+            )
+        parts.append(INDEX_CLOSE)
+        last_modified = max((stamp for stamp in lastmods if stamp), default=None)
+    else:
+        number = section or 1
+        if number > sections:
+            return None
+        rows = list(
+            entries.values_list("xml", "lastmod")[(number - 1) * MAX_URLS : number * MAX_URLS]
+        )
+        parts = [URLSET_OPEN, *(f"{xml}\n" for xml, _ in rows), URLSET_CLOSE]
+        last_modified = max((stamp for _, stamp in rows if stamp), default=None)
+
+    content = "".join(parts).encode("utf-8")
+    return {
+        "content": content,
+        "etag": quote_etag(hashlib.sha256(content).hexdigest()[:32]),
+        "last_modified": last_modified,
+    }
+
+
+def get_document(site, section=None):
+    count, updated = current_version()
+    stamp = updated.timestamp() if updated else 0
+    key = f"{CACHE_PREFIX}:{site.pk}:{section or 0}:{count}:{stamp}"
+    document = cache.get(key)
+    if document is None:
+        _stats["misses"] += 1
+        document = _document(site, section)
+        cache.set(key, document or {}, CACHE_TIMEOUT)
+    else:
+        _stats["hits"] += 1
+    if not document:
+        return None
+    # A removal can bring back an earlier version and its cached document, so
+    # the change time is applied when serving rather than stored with it.
+    changed_at = cache.get(CHANGED_KEY)
+    last_modified = document["last_modified"]
+    if changed_at is not None and (last_modified is None or changed_at > last_modified):
+        document = {**document, "last_modified": changed_at}
+    return document
+
+
+def sitemap_view(request, section=None):
+    site = Site.find_for_request(request)
+    if site is None:
+        site = Site.objects.select_related("root_page").get(is_default_site=True)
+    document = get_document(site, section)
+    if document is None:
+        raise Http404("No such sitemap section.")
+
+    last_modified = document["last_modified"]
+    response = get_conditional_response(
+        request,
+        etag=document["etag"],
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+    if response is not None:
+        _stats["not_modified"] += 1
+    else:
+        response = HttpResponse(document["content"], content_type=CONTENT_TYPE)
+    response["ETag"] = document["etag"]
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    response["X-Robots-Tag"] = "noindex, noodp, noarchive"
+    return response
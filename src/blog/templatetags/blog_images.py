@@ -0,0 +1,32 @@
+from django import template
+
+from blog import renditions
+
+register = template.Library()
+
+
+def _resolver(context):
+    # The render's resolver from the context, then the one active on this
+    # thread, and otherwise one that resolves this tag's image on its own.
+    resolver = context.get("rendition_resolver") or renditions.current_resolver()
+    return resolver if resolver is not None else renditions.RenditionResolver()
+
+
+@register.simple_tag(takes_context=True)
+def rendition(context, image, spec):
+    """``{% rendition image "width-800" as img %}``: the render's resolver's copy of a rendition."""
+    if not image:
+        return None
+    return _resolver(context).resolve(image, spec)
+
+
+@register.simple_tag(takes_context=True)
+def responsive_rendition(context, image, spec):
+    """``{% responsive_rendition image "width-{480,800}" as pic %}``: the renditions for a <picture>.
+
+    Each width comes in the original format plus WebP, and AVIF where Pillow
+    supports it; see renditions.ResponsiveRendition.
+    """
+    if not image:
+        return None
+    return _resolver(context).resolve_responsive(image, spec)
@@ -0,0 +1,10 @@
+from django import template
+
+from blog.markdown_rendering import render_markdown
+
+register = template.Library()
+
+
+@register.filter(name="markdown")
+def markdown(value):
+    return render_markdown(value)
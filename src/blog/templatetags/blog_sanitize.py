@@ -1,16 +1,65 @@
-from bleach import clean
+import functools
+import threading
+
+from bleach.sanitizer import Cleaner
 from django import template
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.utils.safestring import mark_safe
 from wagtailmarkdown.utils import _get_bleach_kwargs
 
+from blog.caching import LRUCache, content_hash, register_stats
+
 register = template.Library()
 
+# Cleaner holds an html5lib parser and serializer that are not thread-safe,
+# so each thread builds its own once and reuses it.
+_local = threading.local()
+_config = {"generation": 0, "cleaners_built": 0}
+
+
+@functools.cache
+def get_sanitized_cache():
+    return LRUCache(getattr(settings, "BLOG_SANITIZE_CACHE_SIZE", 1024))
+
+
+def sanitizer_stats():
+    return {**get_sanitized_cache().stats(), "cleaners_built": _config["cleaners_built"]}
+
+
+register_stats("sanitized_html", sanitizer_stats)
+
+
+@receiver(setting_changed)
+def reset_sanitizer(setting, **kwargs):
+    if setting in {"WAGTAILMARKDOWN", "BLOG_SANITIZE_CACHE_SIZE"}:
+        _config["generation"] += 1
+        get_sanitized_cache.cache_clear()
+
+
+def get_cleaner():
+    """This thread's Cleaner, built from the wagtailmarkdown allowlists."""
+    cleaner = getattr(_local, "cleaner", None)
+    if cleaner is None or _local.generation != _config["generation"]:
+        kwargs = dict(_get_bleach_kwargs())
+        kwargs["strip"] = True
+        kwargs["strip_comments"] = True
+        cleaner = _local.cleaner = Cleaner(**kwargs)
+        _local.generation = _config["generation"]
+        _config["cleaners_built"] += 1
+    return cleaner
+
 
 @register.filter(name="sanitize_html")
 def sanitize_html(value):
     if not value:
         return ""
-    kwargs = dict(_get_bleach_kwargs())
-    kwargs["strip"] = True
-    kwargs["strip_comments"] = True
-    return mark_safe(clean(str(value), **kwargs))
+    text = str(value)
+    cache = get_sanitized_cache()
+    key = content_hash(text)
+    cleaned = cache.get(key)
+    if cleaned is None:
+        cleaned = get_cleaner().clean(text)
+        cache.set(key, cleaned)
+    return mark_safe(cleaned)
@@ -0,0 +1,175 @@
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from blog import pagination
+from blog.models import BlogIndexPage, BlogPage
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp())
+class TestBlogIndexListing(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.post_count = 0
+
+    def _add_posts(self, count):
+        for _ in range(count):
+            self.post_count += 1
+            image = get_image_model().objects.create(
+                title=f"Image {self.post_count}",
+                file=get_test_image_file(),
+            )
+            page = BlogPage(
+                title=f"Post {self.post_count}",
+                slug=f"post-{self.post_count}",
+                featured_image=image,
+                body=[("markdown", "Words " * 50)],
+            )
+            self.index.add_child(instance=page)
+            page.save_revision().publish()
+
+    def _listing_queries(self):
+        # The first view creates the listing renditions; count the steady state.
+        self.client.get(self.index.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.index.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_query_count_does_not_grow_with_posts(self):
+        self._add_posts(1)
+        one_post, _ = self._listing_queries()
+        self._add_posts(BlogIndexPage.posts_per_page - 1)
+        full_page, response = self._listing_queries()
+
+        self.assertEqual(full_page, one_post)
+        self.assertEqual(response.content.count(b'class="post-card"'), BlogIndexPage.posts_per_page)
+
+    def test_listing_skips_body_columns_and_prefetches_renditions(self):
+        self._add_posts(1)
+        self.client.get(self.index.url)
+        post = self.index.get_posts().get()
+
+        self.assertEqual(
+            post.get_deferred_fields() & set(BlogIndexPage.listing_deferred_fields),
+            set(BlogIndexPage.listing_deferred_fields),
+        )
+        self.assertEqual(
+            [rendition.filter_spec for rendition in post.featured_image.prefetched_renditions],
+            [BlogIndexPage.listing_image_filter],
+        )
+
+
+class TestBlogIndexPagination(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.posts = []
+        for number in range(20):
+            page = BlogPage(title=f"Post {number}", slug=f"post-{number}", body=[])
+            self.index.add_child(instance=page)
+            page.save_revision().publish()
+            self.posts.append(page)
+        # Equal timestamps force the id tie-breaker to keep pages stable.
+        tied = BlogPage.objects.get(pk=self.posts[5].pk).first_published_at
+        BlogPage.objects.filter(pk__in=[post.pk for post in self.posts[5:15]]).update(
+            first_published_at=tied
+        )
+        self.expected = list(self.index.get_posts().values_list("title", flat=True))
+
+    def _titles(self, context):
+        return [post.title for post in context["posts"]]
+
+    def _get(self, query=""):
+        response = self.client.get(f"{self.index.url}{query}")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    @override_settings(BLOG_INDEX_PAGINATION="keyset")
+    def test_keyset_pages_walk_forward_and_back(self):
+        seen = []
+        pages = []
+        query = ""
+        while True:
+            response = self._get(query)
+            pages.append((query, self._titles(response.context)))
+            seen.extend(pages[-1][1])
+            query = response.context["next_page_query"]
+            if not query:
+                break
+        self.assertEqual(seen, self.expected)
+        self.assertEqual([len(titles) for _, titles in pages], [9, 9, 2])
+
+        response = self._get(pages[-1][0])
+        self.assertEqual(response.context["page_obj"].number, 3)
+        self.assertContains(response, "Page 3 of 3")
+        back = self._get(response.context["previous_page_query"])
+        self.assertEqual(self._titles(back.context), pages[1][1])
+        self.assertEqual(back.context["previous_page_query"], "")
+        self.assertContains(back, f'<link rel="prev" href="{self.index.full_url}">', html=True)
+
+    @override_settings(BLOG_INDEX_PAGINATION="keyset")
+    def test_keyset_malformed_cursor_serves_first_page(self):
+        response = self._get("?after=not-a-cursor")
+        self.assertEqual(self._titles(response.context), self.expected[:9])
+        self.assertFalse(response.context["page_obj"].has_previous())
+
+    @override_settings(BLOG_INDEX_PAGINATION="keyset")
+    def test_keyset_page_query_count_is_flat(self):
+        response = self._get()
+        second = response.context["next_page_query"]
+        third = self._get(second).context["next_page_query"]
+        with CaptureQueriesContext(connection) as shallow:
+            self._get(second)
+        with CaptureQueriesContext(connection) as deep:
+            self._get(third)
+        self.assertEqual(len(deep), len(shallow))
+        self.assertFalse(any("COUNT(" in query["sql"].upper() for query in deep.captured_queries))
+
+    def test_offset_pages_use_cached_count(self):
+        self._get()
+        with CaptureQueriesContext(connection) as queries:
+            response = self._get("?page=2")
+        self.assertEqual(self._titles(response.context), self.expected[9:18])
+        self.assertFalse(
+            any("COUNT(" in query["sql"].upper() for query in queries.captured_queries)
+        )
+        self.assertEqual(response.context["previous_page_query"], "")
+        self.assertEqual(response.context["next_page_query"], "?page=3")
+
+    def test_count_refreshes_on_publish_and_unpublish(self):
+        self.assertContains(self._get(), "Page 1 of 3")
+        self.posts[0].unpublish()
+        self.posts[1].unpublish()
+        self.assertContains(self._get(), "Page 1 of 2")
+        self.posts[0].save_revision().publish()
+        self.posts[1].save_revision().publish()
+        self.assertContains(self._get(), "Page 1 of 3")
+
+    def test_count_refreshes_when_posts_move(self):
+        other = BlogIndexPage(title="Other", slug="other")
+        Site.objects.get(is_default_site=True).root_page.add_child(instance=other)
+        self.assertContains(self._get(), "Page 1 of 3")
+        self.client.get(other.url)
+        for post in self.posts[:2]:
+            post.move(other, pos="last-child")
+        self.assertContains(self._get(), "Page 1 of 2")
+        self.assertEqual(self.client.get(other.url).context["posts"].paginator.count, 2)
+
+    def test_count_expires_for_other_workers(self):
+        with patch("blog.pagination.cache.set") as cache_set:
+            self._get()
+        cache_set.assert_called_once_with(
+            pagination.post_count_key(self.index.path), 20, pagination.COUNT_TIMEOUT
+        )
@@ -0,0 +1,37 @@
+import unittest
+
+from blog.caching import LRUCache, content_hash
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_zero_size_disables_storage(self):
+        cache = LRUCache(0)
+        cache.set("a", 1)
+        self.assertEqual(len(cache), 0)
+
+
+class TestContentHash(unittest.TestCase):
+    def test_stable_across_key_order(self):
+        self.assertEqual(content_hash({"a": 1, "b": 2}), content_hash({"b": 2, "a": 1}))
+
+    def test_differs_on_content(self):
+        self.assertNotEqual(content_hash({"a": 1}), content_hash({"a": 2}))
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, override_settings
+from markdown.extensions import codehilite
+
+from blog.caching import LRUCache, TieredCache
+from blog.markdown_extensions import codehilite_cache
+from blog.markdown_extensions.codehilite_cache import CachedCodeHilite
+from blog.markdown_rendering import markdown_to_html
+
+ORIGINAL_CODEHILITE = CachedCodeHilite.__mro__[1]
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "code_highlight": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "code-highlight-tests",
+    },
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestCachedCodeHilite(SimpleTestCase):
+    def setUp(self):
+        self.cache = TieredCache(LRUCache(16), backend_alias="code_highlight", prefix="test:")
+        patcher = patch.object(codehilite_cache, "get_highlight_cache", return_value=self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _pair(self, src, **options):
+        return (
+            CachedCodeHilite(src, **options).hilite(),
+            ORIGINAL_CODEHILITE(src, **options).hilite(),
+        )
+
+    def test_matches_uncached_output(self):
+        cases = [
+            ("def f(x):\n    return x\n", {"lang": "python", "linenums": True}),
+            (":::python\nprint(1)\n", {"linenums": None}),
+            ("#!/bin/sh\necho hi\n", {}),
+            ("plain text", {"lang": "nope", "guess_lang": False}),
+            ("x = 1", {"lang": "python", "hl_lines": [1], "css_class": "other"}),
+        ]
+        for src, options in cases:
+            with self.subTest(src=src, options=options):
+                cached, original = self._pair(src, **options)
+                self.assertEqual(cached, original)
+                self.assertEqual(CachedCodeHilite(src, **options).hilite(), original)
+
+    def test_options_are_part_of_the_key(self):
+        plain = CachedCodeHilite("x = 1", lang="python").hilite()
+        numbered = CachedCodeHilite("x = 1", lang="python", linenums=True).hilite()
+        self.assertNotEqual(plain, numbered)
+
+    def test_pygments_version_is_part_of_the_key(self):
+        key = CachedCodeHilite("x = 1", lang="python").cache_key(True)
+        with patch.object(codehilite_cache.pygments, "__version__", "0.0"):
+            self.assertNotEqual(CachedCodeHilite("x = 1", lang="python").cache_key(True), key)
+
+    def test_memory_then_backend_tier(self):
+        CachedCodeHilite("x = 1", lang="python").hilite()
+        CachedCodeHilite("x = 1", lang="python").hilite()
+        self.assertEqual(self.cache.stats()["memory"]["hits"], 1)
+
+        self.cache.clear_memory()
+        CachedCodeHilite("x = 1", lang="python").hilite()
+        stats = self.cache.stats()
+        self.assertEqual(stats["backend_hits"], 1)
+        self.assertEqual(stats["backend_misses"], 1)
+
+    def test_markdown_fences_use_cached_highlighter(self):
+        text = "```python\nprint('hi')\n```"
+        first = markdown_to_html(text)
+        self.assertIs(codehilite.CodeHilite, CachedCodeHilite)
+        self.assertEqual(markdown_to_html(text), first)
+        self.assertGreaterEqual(self.cache.stats()["memory"]["hits"], 1)
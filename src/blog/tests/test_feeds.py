@@ -0,0 +1,91 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from wagtail.models import Site
+
+from blog import feed_cache
+from blog.models import BlogIndexPage, BlogPage
+
+
+class TestCachedFeeds(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.first = self._publish("first")
+
+    def _publish(self, slug):
+        page = BlogPage(title=slug.title(), slug=slug, body=[], abstract=f"About {slug}")
+        self.index.add_child(instance=page)
+        page.save_revision().publish()
+        return page
+
+    def test_items_link_to_full_urls(self):
+        response = self.client.get("/feed/")
+
+        self.assertContains(response, f"<link>{self.first.full_url}</link>")
+        self.assertContains(response, "About first")
+
+    def test_repeat_requests_are_served_without_queries(self):
+        first = self.client.get("/feed/atom/")
+
+        with self.assertNumQueries(0):
+            second = self.client.get("/feed/atom/")
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_conditional_requests_get_not_modified(self):
+        response = self.client.get("/feed/")
+        etag = response["ETag"]
+        last_modified = response["Last-Modified"]
+
+        with self.assertNumQueries(0):
+            by_etag = self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+        by_date = self.client.get("/feed/", HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_etag["ETag"], etag)
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_publish_invalidates_feeds(self):
+        etag = self.client.get("/feed/")["ETag"]
+        second = self._publish("second")
+
+        response = self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertContains(response, second.full_url)
+
+    def test_unpublish_invalidates_feeds(self):
+        self._publish("second")
+        etag = self.client.get("/feed/")["ETag"]
+        self.first.unpublish()
+
+        response = self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.first.full_url)
+
+    def test_other_workers_see_an_unpublish(self):
+        self._publish("second")
+        # Another worker's cache never sees invalidate().
+        cache.clear()
+        etag = self.client.get("/feed/")["ETag"]
+        self.first.unpublish()
+        cache.clear()
+
+        response = self.client.get("/feed/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.first.full_url)
+
+    def test_state_expires_for_other_workers(self):
+        with patch("blog.feed_cache.cache.set") as cache_set:
+            self.client.get("/feed/")
+
+        timeouts = {call.args[0]: call.args[2] for call in cache_set.call_args_list}
+        self.assertEqual(timeouts[feed_cache.STATE_KEY], feed_cache.STATE_TIMEOUT)
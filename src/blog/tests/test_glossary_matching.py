@@ -0,0 +1,74 @@
+import random
+import unittest
+from unittest.mock import patch
+
+from benchmarks.legacy import alternation_spans
+from blog.glossary_matching import GlossaryMatcher, get_glossary_matcher
+
+
+class TestGlossaryMatcher(unittest.TestCase):
+    ALPHABET = list("abAB _-.+'1") + [
+        "ß",
+        "ẞ",
+        "ſ",
+        "s",
+        "ı",
+        "İ",
+        "i",
+        "K",
+        "k",
+        "ς",
+        "Σ",
+        "é",
+        "É",
+    ]
+
+    def _spans(self, terms, text, trie=True):
+        with patch.object(GlossaryMatcher, "REGEX_MAX_TERMS", 0 if trie else 10**6):
+            matcher = GlossaryMatcher(terms)
+        return list(matcher.finditer(text))
+
+    def test_prefers_longest_term(self):
+        text = "The API Gateway and the API."
+        self.assertEqual(self._spans(["API", "API Gateway"], text), [(4, 15), (24, 27)])
+
+    def test_requires_word_boundaries(self):
+        self.assertEqual(self._spans(["cat"], "concat cat cats"), [(7, 10)])
+
+    def test_falls_back_to_shorter_term_at_boundary(self):
+        self.assertEqual(self._spans(["ab", "abc"], "abcd ab"), [(5, 7)])
+
+    def test_is_case_insensitive(self):
+        self.assertEqual(self._spans(["splat"], "SPLAT Splat"), [(0, 5), (6, 11)])
+
+    def test_terms_with_punctuation(self):
+        text = "Use C++ or .NET today"
+        self.assertEqual(
+            self._spans(["C++", ".NET"], text), alternation_spans(["C++", ".NET"], text)
+        )
+
+    def test_empty_matcher_is_falsy(self):
+        self.assertFalse(GlossaryMatcher([]))
+        self.assertEqual(self._spans([], "anything"), [])
+
+    def test_matches_alternation_regex_on_random_input(self):
+        rng = random.Random(42)
+        for _ in range(3000):
+            terms = [
+                "".join(rng.choice(self.ALPHABET) for _ in range(rng.randint(1, 4)))
+                for _ in range(rng.randint(1, 8))
+            ]
+            text = "".join(rng.choice(self.ALPHABET + terms) for _ in range(rng.randint(0, 30)))
+            self.assertEqual(
+                self._spans(terms, text), alternation_spans(terms, text), (terms, text)
+            )
+
+    def test_small_glossaries_use_the_same_semantics(self):
+        text = "The API Gateway and the API, concat cat."
+        terms = ["API", "API Gateway", "cat"]
+        self.assertEqual(self._spans(terms, text, trie=False), self._spans(terms, text))
+
+    def test_matchers_are_cached_per_term_list(self):
+        first = get_glossary_matcher(["Alpha", "Beta", "Alpha"])
+        self.assertIs(get_glossary_matcher(["Alpha", "Beta"]), first)
+        self.assertIsNot(get_glossary_matcher(["Alpha"]), first)
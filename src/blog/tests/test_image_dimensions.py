@@ -0,0 +1,195 @@
+import io
+import tempfile
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from PIL import Image
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from blog import image_dimensions
+from blog.models import BlogIndexPage, BlogPage, MediaImage
+from blog.post_processing import PostProcessor, get_block_fragment_cache, render_blog_body
+from blog.tests.test_post_processing import FakeStreamValue
+
+
+def _image_file(name, size=(300, 200), mode="RGB"):
+    buffer = io.BytesIO()
+    Image.new(mode, size, (200, 40, 40, 128) if mode == "RGBA" else (200, 40, 40)).save(
+        buffer, "PNG"
+    )
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+class _Block:
+    block_type = "raw_html"
+
+    def __init__(self, value):
+        self.value = value
+
+
+class TestMediaImageName(SimpleTestCase):
+    @override_settings(MEDIA_URL="/media/")
+    def test_same_origin_sources(self):
+        name = image_dimensions.media_image_name
+        self.assertEqual(name("/media/uploads/a%20b.png?v=2#x"), "uploads/a b.png")
+        self.assertEqual(name("https://splat.top/media/uploads/a.png"), "uploads/a.png")
+        self.assertIsNone(name("https://cdn.example.com/a.png"))
+        self.assertIsNone(name("/static/a.png"))
+        self.assertIsNone(name("/media/"))
+
+    @override_settings(MEDIA_URL="https://cdn.example.com/media/")
+    def test_absolute_media_url(self):
+        name = image_dimensions.media_image_name
+        self.assertEqual(name("https://cdn.example.com/media/uploads/a.png"), "uploads/a.png")
+        self.assertIsNone(name("/media/uploads/a.png"))
+
+
+class TestFillMediaImages(SimpleTestCase):
+    def _fill(self, source, index):
+        proc = PostProcessor({}, False)
+        proc.feed(source)
+        proc.close()
+        proc.fill_media_images(index)
+        return "".join(proc.output)
+
+    def test_missing_sizes_are_added(self):
+        index = {"a.png": {"width": 300, "height": 200, "placeholder": ""}}
+
+        html = self._fill('<p><img src="/media/a.png" alt=""></p>', index)
+
+        self.assertIn(
+            '<img src="/media/a.png" alt="" loading="lazy" decoding="async" width="300" height="200">',
+            html,
+        )
+
+    def test_one_given_size_keeps_the_aspect_ratio(self):
+        index = {"a.png": {"width": 300, "height": 200, "placeholder": ""}}
+
+        html = self._fill('<img src="/media/a.png" width="150" />', index)
+
+        self.assertIn('width="150"', html)
+        self.assertIn('height="100"', html)
+
+    def test_heading_images_and_unknown_files_are_untouched(self):
+        index = {"a.png": {"width": 300, "height": 200, "placeholder": ""}}
+
+        html = self._fill('<h2><img src="/media/a.png">Title</h2><img src="/media/b.png">', index)
+
+        self.assertNotIn("width=", html)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), MEDIA_URL="/media/")
+class TestImageDimensionIndex(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_block_fragment_cache().clear()
+
+    def _render(self, html):
+        with image_dimensions.measuring():
+            return render_blog_body(FakeStreamValue([_Block(html)]))["body_html"]
+
+    def test_wagtail_images_use_recorded_sizes(self):
+        image = get_image_model().objects.create(title="A", file=get_test_image_file())
+        opened = image_dimensions.image_dimension_stats()["opened"]
+
+        html = self._render(f'<img src="{image.file.url}" alt="A">')
+
+        self.assertIn(f'width="{image.width}" height="{image.height}"', html)
+        self.assertEqual(image_dimensions.image_dimension_stats()["opened"], opened)
+        self.assertTrue(MediaImage.objects.filter(name=image.file.name).exists())
+
+    def test_other_files_are_measured_once(self):
+        name = _image_file("uploads/chart.png")
+        source = f'<img src="/media/{name}"><img src="https://example.com/x.png">'
+
+        first = self._render(source)
+        opened = image_dimensions.image_dimension_stats()["opened"]
+        get_block_fragment_cache().clear()
+        with self.assertNumQueries(1):
+            second = self._render(source)
+
+        self.assertEqual(first, second)
+        self.assertIn('width="300" height="200"', first)
+        self.assertEqual(first.count("width="), 1)
+        self.assertEqual(image_dimensions.image_dimension_stats()["opened"], opened)
+
+    def test_unreadable_files_are_recorded_and_not_reopened(self):
+        opened = image_dimensions.image_dimension_stats()["opened"]
+
+        html = self._render('<img src="/media/uploads/missing.png">')
+        get_block_fragment_cache().clear()
+        again = self._render('<img src="/media/uploads/missing.png">')
+
+        self.assertNotIn("width=", html)
+        self.assertEqual(again, html)
+        self.assertEqual(image_dimensions.image_dimension_stats()["opened"], opened + 1)
+        self.assertFalse(MediaImage.objects.get(name="uploads/missing.png").readable)
+
+    def test_request_time_renders_do_not_read_files(self):
+        name = _image_file("uploads/later.png")
+        opened = image_dimensions.image_dimension_stats()["opened"]
+
+        rendered = render_blog_body(FakeStreamValue([_Block(f'<img src="/media/{name}">')]))
+
+        self.assertNotIn("width=", rendered["body_html"])
+        self.assertTrue(rendered["images_pending"])
+        self.assertEqual(image_dimensions.image_dimension_stats()["opened"], opened)
+        self.assertFalse(MediaImage.objects.exists())
+
+    def test_request_time_render_queues_a_measuring_render(self):
+        name = _image_file("uploads/queued.png")
+        root = Site.objects.get(is_default_site=True).root_page
+        index = root.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        page = index.add_child(
+            instance=BlogPage(
+                title="Post", slug="post", body=[("raw_html", f'<img src="/media/{name}">')]
+            )
+        )
+
+        with patch("blog.render_queue.get_render_queue") as queue_mock:
+            page.get_render_context(request=RequestFactory().get("/blog/post/"))
+
+        queue_mock.return_value.enqueue.assert_called_once_with(page.pk, extend=False)
+        self.assertFalse(MediaImage.objects.exists())
+
+        page.refresh_render_cache()
+
+        self.assertIn('width="300" height="200"', page.body_rendered_html)
+
+    @override_settings(BLOG_IMAGE_PLACEHOLDERS=True)
+    def test_failed_placeholder_reads_are_not_retried(self):
+        # Indexed before placeholders were enabled; the file has since gone.
+        MediaImage.objects.create(name="uploads/gone.png", width=300, height=200)
+        opened = image_dimensions.image_dimension_stats()["opened"]
+
+        self._render('<img src="/media/uploads/gone.png">')
+        get_block_fragment_cache().clear()
+        html = self._render('<img src="/media/uploads/gone.png">')
+
+        self.assertIn('width="300" height="200"', html)
+        self.assertEqual(image_dimensions.image_dimension_stats()["opened"], opened + 1)
+        self.assertEqual(MediaImage.objects.get(name="uploads/gone.png").placeholder, "")
+
+    @override_settings(BLOG_IMAGE_PLACEHOLDERS=True)
+    def test_placeholders_for_opaque_images(self):
+        opaque = _image_file("uploads/opaque.png")
+        clear = _image_file("uploads/clear.png", mode="RGBA")
+        # Indexed before placeholders were enabled.
+        MediaImage.objects.create(name=opaque, width=300, height=200)
+
+        html = self._render(
+            f'<img src="/media/{opaque}" style="border: 0;"><img src="/media/{clear}">'
+        )
+
+        self.assertIn(
+            'style="border: 0;background-size:cover;background-image:url(data:image/jpeg;base64,',
+            html,
+        )
+        self.assertEqual(html.count("data:image/jpeg"), 1)
+        self.assertEqual(MediaImage.objects.get(name=clear).placeholder, "")
+        self.assertTrue(MediaImage.objects.get(name=opaque).placeholder.startswith("data:"))
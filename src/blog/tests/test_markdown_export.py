@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from wagtail.models import PageViewRestriction, Site
+
+from blog.models import BlogIndexPage, BlogPage
+
+
+class TestMarkdownExport(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.page = BlogPage(
+            title="First",
+            slug="first",
+            body=[("markdown", "Some *words*."), ("raw_html", "<p>Raw <b>bits</b></p>")],
+        )
+        self.index.add_child(instance=self.page)
+        self.page.save_revision().publish()
+
+    def test_publish_stores_the_export(self):
+        self.page.refresh_from_db()
+
+        self.assertEqual(self.page.body_rendered_markdown, "Some *words*.\n\nRaw bits")
+
+    def test_serves_stored_export_without_walking_blocks(self):
+        with patch("blog.markdown_export._render_block", side_effect=AssertionError("block walk")):
+            response = self.client.get("/blog/first.md")
+
+        self.assertEqual(response["Content-Type"], "text/markdown; charset=utf-8")
+        self.assertEqual(response.content.decode(), "# First\n\nSome *words*.\n\nRaw bits\n")
+
+    def test_missing_export_is_rendered_and_stored(self):
+        BlogPage.objects.filter(pk=self.page.pk).update(body_rendered_markdown="")
+
+        response = self.client.get("/blog/first.md")
+
+        self.assertContains(response, "Raw bits")
+        self.assertEqual(
+            BlogPage.objects.get(pk=self.page.pk).body_rendered_markdown,
+            "Some *words*.\n\nRaw bits",
+        )
+
+    def test_republished_body_replaces_the_export(self):
+        page = BlogPage.objects.get(pk=self.page.pk)
+        page.body = [("markdown", "New words.")]
+        page.save_revision().publish()
+
+        response = self.client.get("/blog/first.md")
+
+        self.assertContains(response, "New words.")
+        self.assertNotContains(response, "Raw bits")
+
+    def test_conditional_requests_get_not_modified(self):
+        response = self.client.get("/blog/first.md")
+
+        by_etag = self.client.get("/blog/first.md", HTTP_IF_NONE_MATCH=response["ETag"])
+        by_date = self.client.get(
+            "/blog/first.md", HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_restrictions_apply_before_the_stored_export(self):
+        PageViewRestriction.objects.create(
+            page=self.page, restriction_type=PageViewRestriction.LOGIN
+        )
+
+        response = self.client.get("/blog/first.md")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertNotIn(b"Some", response.content)
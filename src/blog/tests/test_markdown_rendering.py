@@ -0,0 +1,62 @@
+import threading
+
+from django.test import SimpleTestCase, override_settings
+from wagtailmarkdown.utils import render_markdown as wagtail_render_markdown
+
+from blog import markdown_rendering
+from blog.markdown_rendering import render_markdown
+
+SAMPLES = [
+    "# Heading\n\nSome *emphasis* and `code`.",
+    "Text with a footnote[^1].\n\n[^1]: The note.",
+    "| a | b |\n|---|---|\n| 1 | 2 |",
+    "```python\ndef f(x):\n    return x\n```",
+    "[latex]\nx^2 + y^2\n[/latex]\n\nInline $a$ math.",
+    "Pick [random:red|green|blue] today.\n\n[random]\n- one\n- two\n[/random]",
+    '## Same\n\n## Same\n\n"Smart" quotes -- and dashes...',
+    "<script>alert(1)</script> and <b>bold</b>",
+    "Line one\nline two",
+    "",
+]
+
+
+class TestPooledMarkdownRendering(SimpleTestCase):
+    def test_matches_wagtailmarkdown_filter(self):
+        for _ in range(2):
+            for sample in SAMPLES:
+                with self.subTest(sample=sample):
+                    self.assertEqual(render_markdown(sample), wagtail_render_markdown(sample))
+
+    def test_reuses_converter_within_a_thread(self):
+        render_markdown("first")
+        pool = markdown_rendering._converter_pool()
+        converter = pool[-1]
+        render_markdown("second")
+        self.assertIs(pool[-1], converter)
+        self.assertEqual(len(pool), 1)
+
+    def test_footnotes_do_not_leak_between_conversions(self):
+        render_markdown("Note[^1].\n\n[^1]: Leaky.")
+        self.assertNotIn("Leaky", render_markdown("Plain text."))
+
+    def test_threads_get_their_own_converters(self):
+        converters = []
+
+        def work():
+            render_markdown("hello")
+            converters.append(markdown_rendering._converter_pool()[-1])
+
+        threads = [threading.Thread(target=work) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertIsNot(converters[0], converters[1])
+
+    def test_rebuilds_converters_when_settings_change(self):
+        render_markdown("hello")
+        with override_settings(
+            WAGTAILMARKDOWN={"extensions": [], "extensions_settings_mode": "override"}
+        ):
+            self.assertEqual(render_markdown("# Hi"), wagtail_render_markdown("# Hi"))
+        self.assertEqual(render_markdown("# Hi"), wagtail_render_markdown("# Hi"))
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from blog import page_cache
+from blog.middleware import FrontendSecurityHeadersMiddleware
+
+
+def make_page(pk=1, restricted=False, live=True):
+    restrictions = Mock()
+    restrictions.exists.return_value = restricted
+    return SimpleNamespace(pk=pk, live=live, get_view_restrictions=lambda: restrictions)
+
+
+def make_request(path="/blog/post/", user=None, secure=False):
+    request = RequestFactory().get(path, secure=secure)
+    request.user = user or AnonymousUser()
+    return request
+
+
+@override_settings(BLOG_PAGE_CACHE_ENABLED=True)
+class TestPageCache(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.serve = Mock(side_effect=lambda: HttpResponse("<p>post</p>"))
+
+    def test_anonymous_views_are_served_from_cache(self):
+        page = make_page()
+        first = page_cache.serve_cached(page, make_request(), self.serve)
+        second = page_cache.serve_cached(page, make_request(), self.serve)
+        self.assertEqual(self.serve.call_count, 1)
+        self.assertEqual(first["X-Blog-Page-Cache"], "miss")
+        self.assertEqual(second["X-Blog-Page-Cache"], "hit")
+        self.assertEqual(second.content, b"<p>post</p>")
+        stats = page_cache.page_cache_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+
+    def test_hits_still_receive_security_headers(self):
+        page = make_page()
+        middleware = FrontendSecurityHeadersMiddleware(
+            lambda request: page_cache.serve_cached(page, request, self.serve)
+        )
+        middleware(make_request())
+        response = middleware(make_request())
+        self.assertEqual(response["X-Blog-Page-Cache"], "hit")
+        self.assertIn("Content-Security-Policy-Report-Only", response)
+
+    def test_nonced_responses_are_not_stored(self):
+        page = make_page()
+
+        def serve_with_nonce(request):
+            return page_cache.serve_cached(
+                page, request, lambda: HttpResponse(f'<script nonce="{request.csp_nonce}">')
+            )
+
+        middleware = FrontendSecurityHeadersMiddleware(serve_with_nonce)
+        first = middleware(make_request())
+        second = middleware(make_request())
+        self.assertEqual(second["X-Blog-Page-Cache"], "miss")
+        self.assertNotEqual(first.content, second.content)
+
+    def test_authenticated_users_bypass_cache(self):
+        user = Mock(is_authenticated=True)
+        page = make_page()
+        page_cache.serve_cached(page, make_request(user=user), self.serve)
+        page_cache.serve_cached(page, make_request(user=user), self.serve)
+        self.assertEqual(self.serve.call_count, 2)
+
+    def test_restricted_pages_are_not_stored(self):
+        page = make_page(restricted=True)
+        page_cache.serve_cached(page, make_request(), self.serve)
+        page_cache.serve_cached(page, make_request(), self.serve)
+        self.assertEqual(self.serve.call_count, 2)
+
+    def test_schemes_are_cached_separately(self):
+        page = make_page()
+        page_cache.serve_cached(page, make_request(), self.serve)
+        secure = make_request(secure=True)
+        response = page_cache.serve_cached(page, secure, self.serve)
+        self.assertEqual(response["X-Blog-Page-Cache"], "miss")
+        self.assertEqual(self.serve.call_count, 2)
+
+    def test_query_strings_bypass_cache(self):
+        page = make_page()
+        page_cache.serve_cached(page, make_request("/blog/post/?utm=x"), self.serve)
+        page_cache.serve_cached(page, make_request("/blog/post/?utm=x"), self.serve)
+        self.assertEqual(self.serve.call_count, 2)
+
+    def test_invalidation_forces_rerender(self):
+        page = make_page()
+        page_cache.serve_cached(page, make_request(), self.serve)
+        page_cache.invalidate_page(page.pk)
+        page_cache.serve_cached(page, make_request(), self.serve)
+        page_cache.invalidate_all()
+        page_cache.serve_cached(page, make_request(), self.serve)
+        self.assertEqual(self.serve.call_count, 3)
+
+    @override_settings(BLOG_PAGE_CACHE_ENABLED=False)
+    def test_disabled_by_default(self):
+        page = make_page()
+        page_cache.serve_cached(page, make_request(), self.serve)
+        page_cache.serve_cached(page, make_request(), self.serve)
+        self.assertEqual(self.serve.call_count, 2)
@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from wagtail.models import Page, Site
+
+from blog import path_index
+from blog.models import BlogIndexPage, BlogPage
+
+
+class TestPathIndex(TestCase):
+    def setUp(self):
+        cache.clear()
+        path_index._index["version"] = None
+        self.root = Site.objects.get(is_default_site=True).root_page
+        self.index = self._add(self.root, BlogIndexPage(title="Blog", slug="blog"))
+        self.first = self._add(self.index, BlogPage(title="First", slug="first", body=[]))
+
+    def _add(self, parent, page):
+        parent.add_child(instance=page)
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+        return page
+
+    def _find(self, page_path, host="localhost"):
+        request = RequestFactory().get(f"/{page_path}.md", HTTP_HOST=host)
+        return path_index.find_page(request, page_path, BlogPage.objects.all())
+
+    def test_resolves_without_routing(self):
+        with patch.object(Page, "route", side_effect=AssertionError("routed")):
+            response = self.client.get("/blog/first.md")
+
+        self.assertContains(response, "# First")
+
+    def test_warm_lookup_is_a_single_query(self):
+        self._find("blog/first")
+
+        with self.assertNumQueries(1):
+            page = self._find("blog/first")
+
+        self.assertEqual(page.pk, self.first.pk)
+
+    @override_settings(ALLOWED_HOSTS=["localhost", "other.example.com"])
+    def test_resolves_under_each_sites_root(self):
+        other_root = self._add(self.root, BlogIndexPage(title="Other", slug="other"))
+        other_post = self._add(other_root, BlogPage(title="Elsewhere", slug="elsewhere", body=[]))
+        with self.captureOnCommitCallbacks(execute=True):
+            Site.objects.create(hostname="other.example.com", root_page=other_root)
+
+        self.assertEqual(self._find("elsewhere", host="other.example.com").pk, other_post.pk)
+        self.assertIsNone(self._find("elsewhere"))
+        self.assertEqual(self._find("blog/first").pk, self.first.pk)
+
+    def test_move_and_unpublish_invalidate_the_index(self):
+        archive = self._add(self.root, BlogIndexPage(title="Archive", slug="archive"))
+        self._find("blog/first")
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPage.objects.get(pk=self.first.pk).move(archive, pos="last-child")
+
+        self.assertIsNone(self._find("blog/first"))
+        self.assertEqual(self._find("archive/first").pk, self.first.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlogPage.objects.get(pk=self.first.pk).unpublish()
+
+        self.assertIsNone(self._find("archive/first"))
+
+    def test_other_workers_reload_after_the_timeout(self):
+        self._find("blog/first")
+        # A Site change made by another worker: no signal reaches this process.
+        Site.objects.filter(is_default_site=True).update(root_page=self.index)
+        loaded_at = path_index._index["loaded_at"]
+
+        self.assertEqual(self._find("blog/first").pk, self.first.pk)
+        with patch.object(
+            path_index.time, "monotonic", return_value=loaded_at + path_index.INDEX_TIMEOUT + 1
+        ):
+            self.assertIsNone(self._find("blog/first"))
+            self.assertEqual(self._find("first").pk, self.first.pk)
+
+    def test_stale_entries_fall_back_to_routing(self):
+        self._find("blog/first")
+        # A change committed elsewhere that has not bumped the version yet.
+        BlogPage.objects.filter(pk=self.first.pk).update(url_path="/home/blog/renamed/")
+
+        self.assertIsNone(self._find("blog/first"))
+        self.assertEqual(self.client.get("/blog/missing.md").status_code, 404)
@@ -1,12 +1,19 @@
+import random
 import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
 
+from benchmarks.legacy import legacy_count_words, legacy_inject_collapsible_readtimes
 from blog.post_processing import (
     HeadingSlugger,
+    HTMLParserPostProcessor,
     PostProcessor,
     build_toc_hierarchy,
     collect_glossary_terms,
+    count_words,
     format_minutes,
-    inject_collapsible_readtimes,
+    get_block_fragment_cache,
+    render_body_blocks,
 )
 
 
@@ -97,30 +104,59 @@ class TestBuildTocHierarchy(unittest.TestCase):
         self.assertEqual(build_toc_hierarchy([]), [])
 
 
-class TestInjectCollapsibleReadtimes(unittest.TestCase):
-    def test_replaces_placeholder(self):
-        html = '<span data-collapsible-readtime>--</span>'
-        result = inject_collapsible_readtimes(html, [440])
-        self.assertIn("2 min", result)
+def collapsible(words, open_by_default=False):
+    open_attr = " open" if open_by_default else ""
+    return (
+        f'<details class="collapsible-block"{open_attr}><summary>'
+        '<span class="collapsible-block__readtime" data-collapsible-readtime>-- min</span>'
+        f"</summary><p>{' '.join(['word'] * words)}</p></details>"
+    )
 
-    def test_multiple_placeholders(self):
-        html = (
-            '<span data-collapsible-readtime>--</span>'
-            '<span data-collapsible-readtime>--</span>'
-        )
-        result = inject_collapsible_readtimes(html, [220, 660])
-        self.assertIn("1 min", result)
-        self.assertIn("3 min", result)
 
-    def test_empty_counts(self):
-        html = '<span data-collapsible-readtime>--</span>'
-        result = inject_collapsible_readtimes(html, [])
-        self.assertEqual(result, html)
+class TestCollapsibleReadtimes(unittest.TestCase):
+    def _process(self, source):
+        proc = PostProcessor({}, False)
+        proc.feed(source)
+        proc.close()
+        return "".join(proc.output)
+
+    def test_replaces_placeholder(self):
+        result = self._process(collapsible(440))
+        self.assertIn("data-collapsible-readtime>2 min</span>", result)
+        self.assertNotIn("-- min", result)
 
-    def test_no_placeholders(self):
-        html = "<p>No collapsibles here</p>"
-        result = inject_collapsible_readtimes(html, [220])
-        self.assertEqual(result, html)
+    def test_multiple_placeholders(self):
+        result = self._process(collapsible(220) + collapsible(660))
+        self.assertLess(result.index(">1 min<"), result.index(">3 min<"))
+
+    def test_nested_collapsibles_get_their_own_counts(self):
+        inner = collapsible(660)
+        outer = collapsible(220).replace("</p></details>", f"</p>{inner}</details>")
+        result = self._process(outer)
+        self.assertLess(result.index(">4 min<"), result.index(">3 min<"))
+
+    def test_placeholder_outside_collapsible_untouched(self):
+        source = "<p><span data-collapsible-readtime>-- min</span></p>"
+        self.assertEqual(self._process(source), source)
+
+    def test_unclosed_collapsible_keeps_placeholder(self):
+        source = '<details class="collapsible-block"><summary><span data-collapsible-readtime>-- min</span>'
+        self.assertEqual(self._process(source), source)
+
+    def test_matches_legacy_second_pass(self):
+        rng = random.Random(1234)
+        for _ in range(200):
+            source = "".join(
+                collapsible(rng.randint(0, 1500), rng.random() < 0.5) if rng.random() < 0.5 else "<p>plain text</p>"
+                for _ in range(rng.randint(0, 12))
+            )
+            proc = PostProcessor({}, False)
+            proc.feed(source)
+            proc.close()
+            self.assertEqual(
+                "".join(proc.output),
+                legacy_inject_collapsible_readtimes(source, proc.collapsible_word_counts),
+            )
 
 
 class TestPostProcessorWordCount(unittest.TestCase):
@@ -153,6 +189,42 @@ class TestPostProcessorWordCount(unittest.TestCase):
         self.assertGreater(count, 0)
 
 
+class TestCountWordsMatchesLegacyCascade(unittest.TestCase):
+    TOKENS = [
+        "$", "$$", "\\[", "\\]", "\\(", "\\)", "[latex]", "[/latex]", "[LATEX]",
+        "x^2", "\\frac{a}{b}", "word", "it's", "don't", "R2D2", " ", "  ", "\n", "\t",
+        "\u00a0", "a", "+", "=", "{", "}", "'", "caf\u00e9",
+    ]
+
+    def test_examples(self):
+        cases = [
+            "",
+            "plain words only",
+            "Here is $x^2$ inline",
+            "Before $$\\frac{a}{b}$$ after",
+            "Some [latex]\\int_0^1 f(x) dx[/latex] text",
+            "$a [latex]b[/latex] c$",
+            "$a$$b$$",
+            "\\(x\\) and \\[y\\] and $z$",
+            "$   $ and $\n$",
+            "unclosed $ dollar and \\( paren",
+            "edge$x$word",
+        ]
+        for text in cases:
+            with self.subTest(text=text):
+                self.assertEqual(count_words(text), legacy_count_words(text))
+
+    def test_random_documents(self):
+        rng = random.Random(1234)
+        for _ in range(5000):
+            text = "".join(rng.choice(self.TOKENS) for _ in range(rng.randint(0, 40)))
+            self.assertEqual(count_words(text), legacy_count_words(text), text)
+
+    def test_long_math_heavy_text_is_not_quadratic(self):
+        text = "word $x$ " * 20000
+        self.assertEqual(count_words(text), 40000)
+
+
 class TestPostProcessorHeadings(unittest.TestCase):
     def test_extracts_toc_items(self):
         proc = PostProcessor({}, False)
@@ -342,3 +414,106 @@ class TestCollectGlossaryTerms(unittest.TestCase):
         terms, auto_link = collect_glossary_terms([])
         self.assertEqual(terms, {})
         self.assertFalse(auto_link)
+
+
+class TestStreamingPostProcessorEquivalence(unittest.TestCase):
+    TERMS = {
+        "api": {"term": "API", "definition": 'Application "Programming" <Interface>'},
+        "iface": {"term": "API", "definition": "Alias"},
+    }
+    FRAGMENTS = [
+        "<p>", "</p>", "<h2>", "</h2>", '<h1 id="intro">', "</h1>", "<h3>Deep</h3>",
+        '<img src="a.png">', "<img src='b.png' loading=\"eager\"/>", "<br>", "<br/>", "<br />",
+        '<details class="collapsible-block" open>', '<details class="collapsible-block">',
+        "</details>", "<summary>", "</summary>", '<span data-collapsible-readtime>-- min</span>',
+        '<a href="/x?a=1&amp;b=2">', "</a>", "<code>", "</code>", "<pre>", "</pre>",
+        '<div class="glossary-data">', "</div>", '<DIV CLASS="Loud">', "</DIV>",
+        '<p  class="spaced"  >', '<td colspan = "2">', '<x-widget data-empty="">', "<input disabled>",
+        "API", "the api docs", "it's", "&amp;", "&lt;", "&#39;", "R&D", "$x^2$", "$$a+b$$",
+        " [[api]] ", "[[api|interface]]", "[[missing]]", "\n  ", "plain words ", "<!-- note -->",
+        "<", " < 3", "<!DOCTYPE html>", "<a href=bare>", "<script>var a = '<b>';</script>", "<?pi?>",
+    ]
+
+    def _run(self, engine, source, auto_link):
+        proc = engine(self.TERMS, auto_link)
+        proc.feed(source)
+        proc.close()
+        return (
+            "".join(proc.output),
+            proc.toc_items,
+            proc.total_main_words,
+            proc.total_deep_words,
+            proc.collapsible_word_counts,
+        )
+
+    def assertEquivalent(self, source, auto_link=True):
+        self.assertEqual(
+            self._run(PostProcessor, source, auto_link),
+            self._run(HTMLParserPostProcessor, source, auto_link),
+            msg=repr(source),
+        )
+
+    def test_canonical_markup(self):
+        self.assertEquivalent(
+            '<div class="markdown-content"><h2>Intro</h2><p>The API is $x$ wide.</p>'
+            '<img src="/media/a.png" alt="A"></div>'
+        )
+
+    def test_attributes_are_normalised(self):
+        self.assertEquivalent("<P Title='it&#39;s \"quoted\"' data-x>Hi</P><br/>")
+
+    def test_unsupported_markup_replays_through_html_parser(self):
+        self.assertEquivalent("<!DOCTYPE html><p>a < b</p><script>x = '<p>';</script><a href=x>API</a>")
+
+    def test_random_documents(self):
+        rng = random.Random(1234)
+        for _ in range(500):
+            source = "".join(rng.choice(self.FRAGMENTS) for _ in range(rng.randint(0, 25)))
+            self.assertEquivalent(source, auto_link=rng.random() < 0.5)
+
+
+class FakeStreamValue(list):
+    @property
+    def raw_data(self):
+        return [{"type": block.block_type, "value": block.value, "id": "x"} for block in self]
+
+
+class TestRenderBodyBlocksCache(unittest.TestCase):
+    def setUp(self):
+        get_block_fragment_cache().clear()
+
+    def _body(self, *texts):
+        return FakeStreamValue(SimpleNamespace(block_type="quote", value=text) for text in texts)
+
+    def test_unchanged_blocks_reuse_fragments(self):
+        with patch(
+            "blog.post_processing.render_to_string",
+            side_effect=lambda _, ctx: f"<blockquote>{ctx['block'].value}</blockquote>",
+        ) as render_mock:
+            first = render_body_blocks(self._body("one", "two"))
+            second = render_body_blocks(self._body("one", "changed"))
+        self.assertEqual(first, ["<blockquote>one</blockquote>", "<blockquote>two</blockquote>"])
+        self.assertEqual(
+            second, ["<blockquote>one</blockquote>", "<blockquote>changed</blockquote>"]
+        )
+        self.assertEqual(render_mock.call_count, 3)
+
+    def test_image_file_or_title_change_misses_cache(self):
+        def image_block(file_name, title="Chart"):
+            image = SimpleNamespace(pk=1, title=title, file=SimpleNamespace(name=file_name))
+            return SimpleNamespace(block_type="image", value={"image": image, "caption": ""})
+
+        with patch("blog.post_processing.render_to_string", return_value="<img>") as render_mock:
+            render_body_blocks(FakeStreamValue([image_block("a.png")]))
+            render_body_blocks(FakeStreamValue([image_block("a.png")]))
+            render_body_blocks(FakeStreamValue([image_block("b.png")]))
+            # The title is the alt text when the block has no caption.
+            render_body_blocks(FakeStreamValue([image_block("b.png", title="Win rates")]))
+        self.assertEqual(render_mock.call_count, 3)
+
+    def test_plain_lists_render_without_cache(self):
+        blocks = [SimpleNamespace(block_type="quote", value="x")]
+        with patch("blog.post_processing.render_to_string", return_value="<p>x</p>") as render_mock:
+            render_body_blocks(blocks)
+            render_body_blocks(blocks)
+        self.assertEqual(render_mock.call_count, 2)
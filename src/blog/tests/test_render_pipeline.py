@@ -0,0 +1,37 @@
+from django.test import SimpleTestCase, override_settings
+
+from blog import render_pipeline
+from blog.render_pipeline import render_pipeline_fingerprint
+
+
+class TestRenderPipelineFingerprint(SimpleTestCase):
+    def test_is_computed_once_per_process(self):
+        self.assertIs(render_pipeline_fingerprint(), render_pipeline_fingerprint())
+        self.assertEqual(len(render_pipeline_fingerprint()), 64)
+
+    def test_changes_with_markdown_config(self):
+        baseline = render_pipeline_fingerprint.__wrapped__()
+        with override_settings(WAGTAILMARKDOWN={"extensions": ["extra"]}):
+            self.assertNotEqual(render_pipeline_fingerprint.__wrapped__(), baseline)
+
+    def test_changes_with_pipeline_version(self):
+        baseline = render_pipeline_fingerprint.__wrapped__()
+        original = render_pipeline.RENDER_PIPELINE_VERSION
+        render_pipeline.RENDER_PIPELINE_VERSION = original + 1
+        try:
+            self.assertNotEqual(render_pipeline_fingerprint.__wrapped__(), baseline)
+        finally:
+            render_pipeline.RENDER_PIPELINE_VERSION = original
+
+    def test_covers_block_templates(self):
+        self.assertIn("blog/blocks/render_block.html", render_pipeline._block_template_digests())
+
+    def test_covers_modules_that_shape_body_html(self):
+        sources = render_pipeline._source_digests()
+        for name in (
+            "post_processing.py",
+            "glossary_matching.py",
+            "shared_glossary.py",
+            "renditions.py",
+        ):
+            self.assertIn(name, sources)
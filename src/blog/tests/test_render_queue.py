@@ -0,0 +1,93 @@
+import threading
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from blog.models import BlogPage, precompute_blog_body_render_cache
+from blog.render_queue import RenderQueue
+
+
+class TestRenderQueue(SimpleTestCase):
+    def test_renders_enqueued_page(self):
+        rendered = []
+        queue = RenderQueue(render=rendered.append, debounce=0)
+        queue.enqueue(7)
+        self.assertTrue(queue.wait_until_idle(timeout=5))
+        self.assertEqual(rendered, [7])
+        self.assertEqual(queue.stats()["completed"], 1)
+        self.assertEqual(queue.stats()["depth"], 0)
+
+    def test_coalesces_repeated_publishes_of_one_page(self):
+        rendered = []
+        queue = RenderQueue(render=rendered.append, debounce=0.2)
+        for _ in range(5):
+            queue.enqueue(7)
+        queue.enqueue(8)
+        self.assertTrue(queue.wait_until_idle(timeout=5))
+        self.assertEqual(sorted(rendered), [7, 8])
+        stats = queue.stats()
+        self.assertEqual(stats["enqueued"], 2)
+        self.assertEqual(stats["coalesced"], 4)
+
+    def test_enqueue_without_extend_keeps_deadline(self):
+        queue = RenderQueue(render=lambda page_id: None, debounce=60)
+        queue.enqueue(7)
+        deadline = queue._pending[7]
+        queue.enqueue(7, extend=False)
+        self.assertEqual(queue._pending[7], deadline)
+        queue.enqueue(7)
+        self.assertGreater(queue._pending[7], deadline)
+
+    def test_reports_depth_while_rendering(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def render(page_id):
+            started.set()
+            release.wait(5)
+
+        queue = RenderQueue(render=render, debounce=0)
+        queue.enqueue(1)
+        self.assertTrue(started.wait(5))
+        queue.enqueue(2)
+        self.assertEqual(queue.stats()["depth"], 2)
+        release.set()
+        self.assertTrue(queue.wait_until_idle(timeout=5))
+        self.assertEqual(queue.stats()["depth"], 0)
+
+    def test_failed_render_is_counted_and_worker_survives(self):
+        rendered = []
+
+        def render(page_id):
+            if page_id == 1:
+                raise RuntimeError("boom")
+            rendered.append(page_id)
+
+        queue = RenderQueue(render=render, debounce=0)
+        with self.assertLogs("blog.render_queue", level="ERROR"):
+            queue.enqueue(1)
+            self.assertTrue(queue.wait_until_idle(timeout=5))
+        queue.enqueue(2)
+        self.assertTrue(queue.wait_until_idle(timeout=5))
+        self.assertEqual(rendered, [2])
+        self.assertEqual(queue.stats()["failed"], 1)
+
+
+class TestBackgroundPublish(TestCase):
+    @override_settings(BLOG_RENDER_IN_BACKGROUND=True)
+    def test_publish_signal_enqueues_after_commit(self):
+        page = BlogPage(title="Queued", slug="queued", body=[])
+        page.pk = 42
+        page.live = True
+
+        with (
+            patch("blog.models.render_blog_body") as render_mock,
+            patch("blog.render_queue.get_render_queue") as queue_mock,
+            self.captureOnCommitCallbacks(execute=True) as callbacks,
+        ):
+            precompute_blog_body_render_cache(sender=BlogPage, instance=page)
+            queue_mock.return_value.enqueue.assert_not_called()
+
+        self.assertEqual(len(callbacks), 1)
+        render_mock.assert_not_called()
+        queue_mock.return_value.enqueue.assert_called_once_with(42)
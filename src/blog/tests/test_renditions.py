@@ -0,0 +1,197 @@
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from wagtail.images import get_image_model
+from wagtail.images.tests.utils import get_test_image_file
+from wagtail.models import Site
+
+from blog import renditions
+from blog.models import BlogIndexPage, BlogPage
+from blog.post_processing import get_block_fragment_cache
+
+BODY_SPECS = set(renditions.responsive_specs(renditions.BODY_IMAGE_FILTER))
+FEATURED_SPECS = {
+    *renditions.responsive_specs(renditions.FEATURED_IMAGE_FILTER),
+    "fill-800x360",
+    "fill-1200x630",
+}
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BLOG_RENDITION_WORKERS=1)
+class TestRenditionWarmer(TestCase):
+    def setUp(self):
+        # Wagtail caches renditions by image id, which restart with each test.
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        image_model = get_image_model()
+        self.featured, self.inline, self.nested = (
+            image_model.objects.create(title=title, file=get_test_image_file())
+            for title in ("Featured", "Inline", "Nested")
+        )
+
+    def _page(self, slug="post", live=True):
+        page = BlogPage(
+            title="Post",
+            slug=slug,
+            live=live,
+            featured_image=self.featured,
+            body=[
+                ("image", {"image": self.inline, "caption": ""}),
+                (
+                    "collapsible",
+                    {
+                        "title": "More",
+                        "content": [("image", {"image": self.nested, "caption": ""})],
+                    },
+                ),
+            ],
+        )
+        self.index.add_child(instance=page)
+        return page
+
+    def _specs(self, image):
+        return set(image.renditions.values_list("filter_spec", flat=True))
+
+    def test_responsive_specs_cover_each_width_and_format(self):
+        specs = renditions.responsive_specs("width-{480,800}")
+
+        self.assertIn("width-480", specs)
+        self.assertIn("width-800|format-webp", specs)
+        self.assertEqual(len(specs), 2 * (1 + len(renditions.modern_formats())))
+
+    def test_collects_every_template_spec(self):
+        wanted = renditions.page_filter_specs(self._page())
+
+        self.assertEqual(wanted[self.featured.pk], FEATURED_SPECS)
+        self.assertEqual(wanted[self.inline.pk], BODY_SPECS)
+        self.assertEqual(wanted[self.nested.pk], BODY_SPECS)
+
+    def test_publish_generates_renditions(self):
+        page = self._page()
+        fallbacks = renditions.rendition_stats()["resolver_fallbacks"]
+
+        page.save_revision().publish()
+
+        # Warmed before the body render, which then generated none itself.
+        self.assertEqual(renditions.rendition_stats()["resolver_fallbacks"], fallbacks)
+        self.assertEqual(self._specs(self.featured), FEATURED_SPECS)
+        self.assertEqual(self._specs(self.inline), BODY_SPECS)
+        self.assertEqual(self._specs(self.nested), BODY_SPECS)
+
+    def test_existing_renditions_are_skipped(self):
+        page = self._page()
+        self.featured.get_rendition("width-800")
+
+        with patch.object(renditions, "_generate", wraps=renditions._generate) as generate:
+            result = renditions.warm_pages([page])
+            again = renditions.warm_pages([page])
+
+        generated = {
+            (call.args[0].pk, spec) for call in generate.call_args_list for spec in call.args[1]
+        }
+        total = len(FEATURED_SPECS) + 2 * len(BODY_SPECS)
+        self.assertNotIn((self.featured.pk, "width-800"), generated)
+        self.assertEqual(result["generated"], total - 1)
+        self.assertEqual(again, {"images": 3, "existing": total, "generated": 0, "failed": 0})
+
+    def test_command_warms_the_archive(self):
+        page = self._page()
+        page.save_revision().publish()
+        self._page("draft", live=False)
+        # Publishing warmed every rendition; leave the featured image's to the command.
+        self.featured.renditions.all().delete()
+        cache.clear()
+
+        out = StringIO()
+        call_command("warm_renditions", stdout=out)
+
+        self.assertIn(f"Generated {len(FEATURED_SPECS)} renditions for 1 pages", out.getvalue())
+        self.assertIn(f"{2 * len(BODY_SPECS)} already existed", out.getvalue())
+        self.assertEqual(self._specs(self.featured), FEATURED_SPECS)
+
+
+@override_settings(MEDIA_ROOT=tempfile.mkdtemp(), BLOG_RENDITION_WORKERS=1)
+class TestRenditionResolver(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_block_fragment_cache().clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+
+    def _page(self, image_count, slug="post"):
+        image_model = get_image_model()
+        images = [
+            image_model.objects.create(title=f"Image {index}", file=get_test_image_file())
+            for index in range(image_count)
+        ]
+        page = BlogPage(
+            title="Post",
+            slug=slug,
+            featured_image=images[0],
+            body=[("image", {"image": image, "caption": ""}) for image in images[1:]],
+        )
+        self.index.add_child(instance=page)
+        renditions.warm_pages([page])
+        get_block_fragment_cache().clear()
+        return BlogPage.objects.get(pk=page.pk)
+
+    def _rendition_queries(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return [
+            query for query in queries.captured_queries if "wagtailimages_rendition" in query["sql"]
+        ]
+
+    def test_body_render_uses_one_rendition_query(self):
+        for count in (3, 12):
+            with self.subTest(images=count):
+                page = self._page(count, slug=f"post-{count}")
+                self.assertEqual(len(self._rendition_queries(page._render_body)), 1)
+
+    def test_page_view_uses_one_rendition_query(self):
+        page = self._page(4)
+        page.refresh_render_cache()
+
+        queries = self._rendition_queries(lambda: self.client.get(page.url))
+
+        self.assertEqual(len(queries), 1)
+
+    def test_body_images_render_as_pictures(self):
+        page = self._page(3)
+
+        html = page._render_body()["body_html"]
+
+        for block in page.body:
+            image = block.value["image"]
+            # The <img> fallback is the rendition the template used before srcsets.
+            self.assertIn(f'src="{image.get_rendition("width-1200").url}"', html)
+            self.assertIn(f"{image.get_rendition('width-480|format-webp').url} 480w", html)
+        self.assertEqual(html.count('<source type="image/webp"'), 2)
+
+    def test_missing_renditions_fall_back_to_generation(self):
+        image = get_image_model().objects.create(title="Fresh", file=get_test_image_file())
+        resolver = renditions.RenditionResolver({image.pk: {"width-400"}})
+
+        resolved = resolver.resolve(image, "width-400")
+
+        self.assertEqual(resolved.width, 400)
+        self.assertTrue(image.renditions.filter(filter_spec="width-400").exists())
+
+    def test_savings_report_compares_transfer_sizes(self):
+        page = self._page(3)
+        page.save_revision().publish()
+
+        out = StringIO()
+        call_command("image_savings_report", "--viewport", "200", "--dpr", "1", stdout=out)
+
+        self.assertIn("3 image views on 1 pages at 200px x1", out.getvalue())
+        self.assertIn("% smaller", out.getvalue())
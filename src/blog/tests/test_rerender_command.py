@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from wagtail.models import Site
+
+from blog.models import BlogIndexPage, BlogPage
+from blog.render_pipeline import render_pipeline_fingerprint
+
+
+class TestRerenderBlogBodies(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.first = self._add_post("first", "# First\\n\\nHello there.")
+        self.second = self._add_post("second", "# Second\\n\\nGeneral Kenobi.")
+
+    def _add_post(self, slug, markdown):
+        page = BlogPage(title=slug.title(), slug=slug, body=[("markdown", markdown)])
+        self.index.add_child(instance=page)
+        page.save_revision().publish()
+        BlogPage.objects.filter(pk=page.pk).update(
+            body_rendered_html="<p>stale</p>",
+            body_render_cache_key="",
+            body_render_pipeline="",
+        )
+        return page
+
+    def _run(self, *args):
+        out = StringIO()
+        call_command("rerender_blog_bodies", "--processes", "1", *args, stdout=out)
+        return out.getvalue()
+
+    def test_rerenders_and_stores_all_pages(self):
+        output = self._run()
+
+        for page in (self.first, self.second):
+            page = BlogPage.objects.get(pk=page.pk)
+            self.assertNotIn("stale", page.body_rendered_html)
+            self.assertIn(page.title, page.body_rendered_html)
+            self.assertEqual(page.body_render_cache_key, page._compute_body_render_cache_key())
+            self.assertEqual(page.body_fingerprint, page.body_render_cache_key)
+        self.assertIn("Rendered 2/2 pages", output)
+        self.assertIn("pages/sec", output)
+
+    def test_page_ids_limits_the_run(self):
+        self._run("--page-ids", str(self.first.pk))
+
+        self.assertNotIn("stale", BlogPage.objects.get(pk=self.first.pk).body_rendered_html)
+        self.assertEqual(BlogPage.objects.get(pk=self.second.pk).body_rendered_html, "<p>stale</p>")
+
+    def test_dry_run_prints_diff_without_saving(self):
+        output = self._run("--dry-run", "--chunk-size", "1")
+
+        self.assertIn("-<p>stale</p>", output)
+        self.assertIn("2 would change", output)
+        self.assertEqual(BlogPage.objects.get(pk=self.first.pk).body_rendered_html, "<p>stale</p>")
+
+    def test_since_skips_older_pages(self):
+        output = self._run("--since", "2999-01-01")
+
+        self.assertIn("No blog pages to re-render.", output)
+
+    def test_stale_only_skips_pages_rendered_by_this_pipeline(self):
+        BlogPage.objects.filter(pk=self.first.pk).update(
+            body_render_pipeline=render_pipeline_fingerprint()
+        )
+
+        self._run("--stale-only")
+
+        self.assertEqual(BlogPage.objects.get(pk=self.first.pk).body_rendered_html, "<p>stale</p>")
+        second = BlogPage.objects.get(pk=self.second.pk)
+        self.assertNotIn("stale", second.body_rendered_html)
+        self.assertEqual(second.body_render_pipeline, render_pipeline_fingerprint())
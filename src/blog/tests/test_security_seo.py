@@ -1,20 +1,26 @@
+import importlib
 import os
 from types import SimpleNamespace
 from unittest import TestCase
 from unittest.mock import Mock, patch
 
+from django.apps import apps as django_apps
 from django.core.exceptions import ValidationError
 from django.http import HttpResponse
-from django.test import RequestFactory
+from django.test import RequestFactory, override_settings
 from django.test import TestCase as DjangoTestCase
-from wagtail.models import PageViewRestriction
+from wagtail.models import PageViewRestriction, Site
 
+from benchmarks.legacy import LegacyFrontendSecurityHeadersMiddleware, legacy_sanitize_html
+from blog.markdown_export import _render_block
 from blog.markdown_extensions.random_choice import RandomChoicePreprocessor
 from blog.middleware import FrontendSecurityHeadersMiddleware
-from blog.models import AppletEmbedBlock, BlogPage, precompute_blog_body_render_cache
+from blog.models import AppletEmbedBlock, BlogIndexPage, BlogPage, precompute_blog_body_render_cache
+from blog.render_pipeline import render_pipeline_fingerprint
 from blog.robots import robots_txt
+from blog.templatetags import blog_sanitize
 from blog.templatetags.blog_sanitize import sanitize_html
-from blog.views import _enforce_view_restrictions, _render_block
+from blog.views import _enforce_view_restrictions
 
 
 class TestRobotsTxt(TestCase):
@@ -43,6 +49,9 @@ class TestRandomChoiceDeterminism(TestCase):
 
 
 class TestRawHtmlSanitization(TestCase):
+    def setUp(self):
+        blog_sanitize.get_sanitized_cache().clear()
+
     def test_template_filter_strips_script_and_event_handlers(self):
         html = '<script>alert(1)</script><p onclick="alert(1)">Safe</p>'
         output = str(sanitize_html(html))
@@ -50,6 +59,33 @@ class TestRawHtmlSanitization(TestCase):
         self.assertNotIn("onclick", output.lower())
         self.assertIn(">Safe<", output)
 
+    def test_matches_a_fresh_cleaner(self):
+        samples = [
+            '<iframe src="https://example.com/embed" width="560"></iframe>',
+            '<div class="embed" style="color: red"><a href="javascript:alert(1)">x</a></div>',
+            "<!-- note --><table><tr><td>1</td></tr></table>",
+            "<p>Unclosed <em>tags",
+        ]
+        for html in samples:
+            with self.subTest(html=html):
+                self.assertEqual(str(sanitize_html(html)), legacy_sanitize_html(html))
+                self.assertEqual(str(sanitize_html(html)), legacy_sanitize_html(html))
+
+    def test_repeated_fragments_reuse_one_cleaner_and_the_memo(self):
+        sanitize_html("<p>warm</p>")
+        built = blog_sanitize.sanitizer_stats()["cleaners_built"]
+        with patch.object(blog_sanitize.Cleaner, "clean", side_effect=AssertionError("re-sanitized")):
+            self.assertEqual(str(sanitize_html("<p>warm</p>")), "<p>warm</p>")
+        sanitize_html("<p>cold</p>")
+
+        self.assertEqual(blog_sanitize.sanitizer_stats()["cleaners_built"], built)
+
+    def test_allowlist_changes_rebuild_the_cleaner(self):
+        html = '<span class="x">Hi</span>'
+        self.assertEqual(str(sanitize_html(html)), legacy_sanitize_html(html))
+        with override_settings(WAGTAILMARKDOWN={"allowed_tags": ["p"], "allowed_settings_mode": "override"}):
+            self.assertEqual(str(sanitize_html(html)), "Hi")
+
     def test_markdown_export_strips_raw_html_tags(self):
         block = SimpleNamespace(block_type="raw_html", value="<p>Hello <strong>world</strong></p>")
         self.assertEqual(_render_block(block), "Hello world")
@@ -130,6 +166,44 @@ class TestFrontendSecurityHeadersMiddleware(TestCase):
         self.assertIn("Content-Security-Policy", response)
         self.assertIn("upgrade-insecure-requests", response["Content-Security-Policy"])
 
+    def test_headers_match_per_request_policy(self):
+        def view(request):
+            return HttpResponse("ok")
+
+        for enforce in ("false", "true"):
+            for path in ("/blog/post/", "/admin/pages/", "/django-admin/", "/administrator/"):
+                with self.subTest(enforce=enforce, path=path), patch.dict(
+                    os.environ, {"CSP_ENFORCE": enforce}
+                ):
+                    request = RequestFactory().get(path)
+                    expected = LegacyFrontendSecurityHeadersMiddleware(view)(request)
+                    response = FrontendSecurityHeadersMiddleware(view)(request)
+                    self.assertEqual(dict(response.headers), dict(expected.headers))
+
+    def test_nonce_is_added_only_when_rendered(self):
+        def view(request):
+            return HttpResponse(f'<script nonce="{request.csp_nonce}"></script>')
+
+        middleware = FrontendSecurityHeadersMiddleware(view)
+        first = middleware(RequestFactory().get("/blog/post/"))
+        second = middleware(RequestFactory().get("/blog/post/"))
+
+        nonce = first.content.decode().split('"')[1]
+        policy = first["Content-Security-Policy-Report-Only"]
+        self.assertIn(f"script-src 'self' https://cdn.jsdelivr.net 'nonce-{nonce}';", policy)
+        self.assertNotIn(nonce, second["Content-Security-Policy-Report-Only"])
+        self.assertEqual(policy.count("nonce-"), 1)
+
+    def test_views_can_set_their_own_policy(self):
+        def view(request):
+            response = HttpResponse("ok")
+            response["Content-Security-Policy-Report-Only"] = "default-src 'none'"
+            return response
+
+        response = FrontendSecurityHeadersMiddleware(view)(RequestFactory().get("/blog/post/"))
+
+        self.assertEqual(response["Content-Security-Policy-Report-Only"], "default-src 'none'")
+
 
 class TestBlogPageModelFields(TestCase):
     def test_blogpage_has_featured_image_field(self):
@@ -172,6 +246,119 @@ class TestBlogPageRenderCaching(DjangoTestCase):
         render_mock.assert_called_once()
         self.assertEqual(rendered, payload)
 
+    def test_live_view_trusts_saved_body_fingerprint(self):
+        page = BlogPage(title="Fingerprint", slug="fingerprint", body=[])
+        page.body_fingerprint = "a" * 64
+        page.body_render_cache_key = "a" * 64
+        page.body_rendered_html = "<p>cached</p>"
+        request = RequestFactory().get("/blog/fingerprint/")
+
+        with patch.object(BlogPage, "_compute_body_render_cache_key") as hash_mock, patch(
+            "blog.models.render_blog_body"
+        ) as render_mock:
+            rendered = page.get_render_context(request=request)
+
+        hash_mock.assert_not_called()
+        render_mock.assert_not_called()
+        self.assertEqual(rendered["body_html"], "<p>cached</p>")
+
+    def test_preview_rehashes_body_instead_of_trusting_fingerprint(self):
+        page = BlogPage(title="Preview", slug="preview", body=[("heading", "Draft")])
+        page.body_fingerprint = "a" * 64
+        page.body_render_cache_key = "a" * 64
+        page.body_rendered_html = "<p>published</p>"
+        request = RequestFactory().get("/blog/preview/")
+        request.is_preview = True
+        payload = {
+            "body_html": "<h2>Draft</h2>",
+            "toc_items": [],
+            "toc_crumb": "",
+            "readtime_main": "1 min",
+            "readtime_deep": "1 min",
+        }
+
+        with patch("blog.models.render_blog_body", return_value=payload) as render_mock, patch(
+            "blog.models.BlogPage.objects.filter"
+        ) as filter_mock:
+            rendered = page.get_render_context(request=request)
+
+        render_mock.assert_called_once()
+        filter_mock.assert_not_called()
+        self.assertEqual(rendered["body_html"], "<h2>Draft</h2>")
+
+    def test_stale_pipeline_serves_cached_render_and_queues_refresh(self):
+        page = BlogPage(title="Stale", slug="stale", body=[])
+        page.pk = 42
+        page.live = True
+        page.body_fingerprint = "a" * 64
+        page.body_render_cache_key = "a" * 64
+        page.body_render_pipeline = "old"
+        page.body_rendered_html = "<p>old deploy</p>"
+        request = RequestFactory().get("/blog/stale/")
+
+        with (
+            patch("blog.models.render_blog_body") as render_mock,
+            patch("blog.render_queue.get_render_queue") as queue_mock,
+        ):
+            rendered = page.get_render_context(request=request)
+
+        render_mock.assert_not_called()
+        queue_mock.return_value.enqueue.assert_called_once_with(42, extend=False)
+        self.assertEqual(rendered["body_html"], "<p>old deploy</p>")
+
+    def test_current_pipeline_does_not_queue_refresh(self):
+        page = BlogPage(title="Fresh", slug="fresh", body=[])
+        page.pk = 42
+        page.live = True
+        page.body_fingerprint = "a" * 64
+        page.body_render_cache_key = "a" * 64
+        page.body_render_pipeline = render_pipeline_fingerprint()
+        page.body_rendered_html = "<p>fresh</p>"
+
+        with patch("blog.render_queue.get_render_queue") as queue_mock:
+            page.get_render_context(request=RequestFactory().get("/blog/fresh/"))
+
+        queue_mock.assert_not_called()
+
+    def test_save_refreshes_fingerprint_only_when_body_is_written(self):
+        page = BlogPage(title="Save", slug="save", body=[("heading", "Hello")])
+        with patch("wagtail.models.Page.save") as save_mock:
+            page.save(update_fields=["title"])
+            self.assertEqual(page.body_fingerprint, "")
+            page.save()
+        self.assertEqual(page.body_fingerprint, page._compute_body_render_cache_key())
+        self.assertEqual(save_mock.call_count, 2)
+
+    def test_migration_backfills_legacy_fingerprints(self):
+        migration = importlib.import_module("blog.migrations.0020_blogpage_body_fingerprint")
+        root = Site.objects.get(is_default_site=True).root_page
+        index = root.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        page = index.add_child(
+            instance=BlogPage(title="Legacy", slug="legacy", body=[("heading", "Hello")])
+        )
+        BlogPage.objects.filter(pk=page.pk).update(body_fingerprint="")
+
+        migration.backfill_body_fingerprints(django_apps, None)
+
+        page = BlogPage.objects.get(pk=page.pk)
+        self.assertEqual(page.body_fingerprint, page._compute_body_render_cache_key())
+
+    def test_markdown_export_heals_legacy_fingerprints(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        index = root.add_child(instance=BlogIndexPage(title="Blog", slug="blog"))
+        page = index.add_child(
+            instance=BlogPage(title="Legacy", slug="legacy", body=[("heading", "Hello")])
+        )
+        BlogPage.objects.filter(pk=page.pk).update(body_fingerprint="", body_render_cache_key="")
+
+        markdown = BlogPage.objects.get(pk=page.pk).get_markdown_body()
+        page = BlogPage.objects.get(pk=page.pk)
+        with patch("blog.models.render_markdown_blocks") as render_mock:
+            self.assertEqual(page.get_markdown_body(), markdown)
+
+        render_mock.assert_not_called()
+        self.assertEqual(page.body_fingerprint, page._compute_body_render_cache_key())
+
     def test_publish_signal_precomputes_cache(self):
         page = BlogPage(title="Publish", slug="publish", body=[])
         page.pk = 42
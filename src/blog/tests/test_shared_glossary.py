@@ -0,0 +1,182 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from wagtail.models import Site
+
+from blog import shared_glossary
+from blog.models import BlogIndexPage, BlogPage, GlossaryTerm, GlossaryTermUsage
+from blog.post_processing import render_blog_body
+
+
+class TestBuildTerms(SimpleTestCase):
+    def test_maps_terms_and_aliases_to_one_entry(self):
+        terms = shared_glossary.build_terms([(3, "Splat Zones", "Hold the zone.", "SZ, zones")])
+
+        self.assertEqual(set(terms), {"splat zones", "sz", "zones"})
+        self.assertIs(terms["sz"], terms["splat zones"])
+        self.assertEqual(terms["sz"]["shared_id"], 3)
+
+    def test_skips_rows_without_definition(self):
+        self.assertEqual(shared_glossary.build_terms([(1, "Ink", "", "")]), {})
+
+
+def stream(*blocks):
+    return BlogPage(body=list(blocks)).body
+
+
+class TestRenderWithSharedTerms(SimpleTestCase):
+    shared = shared_glossary.build_terms([(7, "Turf War", "Cover the most ground.", "")])
+
+    def test_links_shared_terms_and_reports_them(self):
+        body = stream(("markdown", "Try [[Turf War]] first."))
+
+        rendered = render_blog_body(body, shared_terms=self.shared)
+
+        self.assertIn('data-term-key="turf war"', rendered["body_html"])
+        self.assertIn("Cover the most ground.", rendered["body_html"])
+        self.assertEqual(rendered["glossary_term_ids"], [7])
+
+    def test_post_glossary_overrides_shared_definition(self):
+        body = stream(
+            ("markdown", "Try [[Turf War]] first."),
+            (
+                "glossary",
+                {
+                    "terms": [{"term": "Turf War", "definition": "Local meaning.", "aliases": ""}],
+                    "auto_link": False,
+                    "show_list": False,
+                },
+            ),
+        )
+
+        rendered = render_blog_body(body, shared_terms=self.shared)
+
+        self.assertIn("Local meaning.", rendered["body_html"])
+        self.assertNotIn("Cover the most ground.", rendered["body_html"])
+        self.assertEqual(rendered["glossary_term_ids"], [])
+
+    def test_unused_shared_terms_add_nothing(self):
+        body = stream(("markdown", "Nothing to see."))
+
+        rendered = render_blog_body(body, shared_terms=self.shared)
+
+        self.assertEqual(rendered["body_html"], render_blog_body(body)["body_html"])
+        self.assertEqual(rendered["glossary_term_ids"], [])
+
+
+class TestSharedGlossary(TestCase):
+    def setUp(self):
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+
+    def _add_post(self, slug, markdown, use_shared_glossary=True):
+        page = BlogPage(
+            title=slug.title(),
+            slug=slug,
+            body=[("markdown", markdown)],
+            use_shared_glossary=use_shared_glossary,
+        )
+        self.index.add_child(instance=page)
+        page.save_revision().publish()
+        return BlogPage.objects.get(pk=page.pk)
+
+    def test_terms_reload_when_version_changes(self):
+        self.assertEqual(shared_glossary.get_shared_terms(), {})
+
+        GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+
+        self.assertIn("ink", shared_glossary.get_shared_terms())
+
+    def test_terms_reload_after_edits_by_other_workers(self):
+        term = GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+        self.assertEqual(shared_glossary.get_shared_terms()["ink"]["definition"], "Paint.")
+
+        # No signals or cache writes: only the database says the term changed.
+        GlossaryTerm.objects.filter(pk=term.pk).update(
+            definition="Team colour.", updated_at=timezone.now() + timedelta(seconds=1)
+        )
+        self.assertEqual(shared_glossary.get_shared_terms()["ink"]["definition"], "Team colour.")
+
+        GlossaryTerm.objects.filter(pk=term.pk).delete()
+        self.assertEqual(shared_glossary.get_shared_terms(), {})
+
+    def test_publish_records_reverse_index(self):
+        term = GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+        page = self._add_post("linked", "Watch your [[Ink]].")
+        self._add_post("opted-out", "Watch your [[Ink]].", use_shared_glossary=False)
+
+        self.assertIn("Paint.", page.body_rendered_html)
+        self.assertEqual(list(term.usages.values_list("page_id", flat=True)), [page.pk])
+
+    def _enqueued_by(self, change):
+        with (
+            patch("blog.render_queue.get_render_queue") as queue_mock,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            change()
+        return [call.args[0] for call in queue_mock.return_value.enqueue.call_args_list]
+
+    def test_new_spelling_rerenders_every_opted_in_page(self):
+        term = GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+        linked = self._add_post("linked", "Watch your [[Ink]].")
+        mentions = self._add_post("mentions", "Watch your [[Splat]].")
+        unrelated = self._add_post("unrelated", "Nothing here.")
+        self._add_post("opted-out", "Watch your [[Splat]].", use_shared_glossary=False)
+
+        term.aliases = "Splat"
+
+        self.assertEqual(
+            self._enqueued_by(term.save), sorted([linked.pk, mentions.pk, unrelated.pk])
+        )
+
+    def test_new_spelling_reaches_escaped_text(self):
+        page = self._add_post("escaped", "Budget for [[R&D]].")
+        self.assertIn("R&amp;D", page.body_rendered_html)
+
+        term = GlossaryTerm(term="Research", definition="Finding out.", aliases="R&D")
+
+        self.assertEqual(self._enqueued_by(term.save), [page.pk])
+
+    def test_new_spelling_reaches_text_inside_other_links(self):
+        GlossaryTerm.objects.create(term="Splat", definition="Ink hitting the ground.")
+        page = self._add_post("overlap", "Play [[Splat]] Zones.")
+
+        term = GlossaryTerm(term="Splat Zones", definition="Hold the zone.")
+
+        self.assertEqual(self._enqueued_by(term.save), [page.pk])
+
+    def test_definition_edit_only_rerenders_linked_pages(self):
+        term = GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+        linked = self._add_post("linked", "Watch your [[Ink]].")
+        self._add_post("mentions", "Ink everywhere, never linked.")
+
+        term.definition = "Team colour."
+        with (
+            patch("blog.render_queue.get_render_queue") as queue_mock,
+            self.captureOnCommitCallbacks(execute=True),
+            CaptureQueriesContext(connection) as queries,
+        ):
+            term.save()
+
+        queue_mock.return_value.enqueue.assert_called_once_with(linked.pk)
+        self.assertFalse(
+            [query for query in queries.captured_queries if "body_rendered_html" in query["sql"]]
+        )
+
+    def test_term_delete_rerenders_linked_pages(self):
+        term = GlossaryTerm.objects.create(term="Ink", definition="Paint.")
+        linked = self._add_post("linked", "Watch your [[Ink]].")
+
+        with (
+            patch("blog.render_queue.get_render_queue") as queue_mock,
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            term.delete()
+
+        queue_mock.return_value.enqueue.assert_called_once_with(linked.pk)
+        self.assertFalse(GlossaryTermUsage.objects.exists())
@@ -0,0 +1,157 @@
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from wagtail.models import Page, PageViewRestriction, Site
+
+from blog import sitemap
+from blog.models import BlogIndexPage, BlogPage, SitemapEntry
+
+
+class TestSitemap(TestCase):
+    def setUp(self):
+        cache.clear()
+        root = Site.objects.get(is_default_site=True).root_page
+        self.index = BlogIndexPage(title="Blog", slug="blog")
+        root.add_child(instance=self.index)
+        self.index.save_revision().publish()
+        self.first = self._publish("first")
+
+    def _publish(self, slug, parent=None):
+        page = BlogPage(title=slug.title(), slug=slug, body=[])
+        (parent or self.index).add_child(instance=page)
+        with self.captureOnCommitCallbacks(execute=True):
+            page.save_revision().publish()
+        return page
+
+    def _get(self, url="/sitemap.xml", **headers):
+        return self.client.get(url, **headers)
+
+    def test_serves_stored_entries_without_walking_the_tree(self):
+        with patch.object(Page, "get_sitemap_urls", side_effect=AssertionError("tree walk")):
+            response = self._get()
+
+        self.assertEqual(response["Content-Type"], "application/xml")
+        self.assertContains(response, f"<loc>{self.first.full_url}</loc>")
+        self.assertContains(response, f"<loc>{self.index.full_url}</loc>")
+
+    def test_matches_wagtail_sitemap_urls(self):
+        response = self._get()
+
+        for page in Page.objects.live().public().filter(depth__gt=1).specific():
+            for url in page.get_sitemap_urls():
+                self.assertContains(response, f"<loc>{url['location']}</loc>")
+
+    def test_publish_and_unpublish_touch_only_that_entry(self):
+        before = dict(SitemapEntry.objects.values_list("page_id", "xml"))
+        second = self._publish("second")
+        self.assertContains(self._get(), second.full_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.unpublish()
+
+        self.assertNotContains(self._get(), second.full_url)
+        self.assertEqual(dict(SitemapEntry.objects.values_list("page_id", "xml")), before)
+
+    def test_slug_change_refreshes_descendants(self):
+        self._publish("child", parent=self.first)
+        self.first.slug = "renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.first.save_revision().publish()
+
+        response = self._get()
+
+        self.assertContains(response, "/blog/renamed/child/")
+        self.assertNotContains(response, "/blog/first/")
+
+    def test_view_restriction_removes_subtree(self):
+        child = self._publish("child", parent=self.first)
+        with self.captureOnCommitCallbacks(execute=True):
+            PageViewRestriction.objects.create(page=self.first, restriction_type="login")
+
+        response = self._get()
+
+        self.assertNotContains(response, self.first.full_url)
+        self.assertNotContains(response, child.full_url)
+        self.assertContains(response, self.index.full_url)
+
+    def test_site_changes_refresh_urls(self):
+        site = Site.objects.get(is_default_site=True)
+        site.hostname = "blog.example.com"
+        site.port = 8080
+        site.save()
+
+        self.assertContains(self._get(), "<loc>http://blog.example.com:8080/blog/first/</loc>")
+
+        site.root_page = self.index
+        site.save()
+        response = self._get()
+
+        self.assertContains(response, "<loc>http://blog.example.com:8080/first/</loc>")
+        self.assertNotContains(response, "/blog/first/")
+
+    def test_conditional_requests_get_not_modified(self):
+        response = self._get()
+
+        by_etag = self._get(HTTP_IF_NONE_MATCH=response["ETag"])
+        by_date = self._get(HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        self.assertEqual(by_etag.status_code, 304)
+        self.assertEqual(by_date.status_code, 304)
+        second = self._publish("second")
+        self.assertEqual(self._get(HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 200)
+
+        response = self._get()
+        later = timezone.now() + timedelta(seconds=5)
+        with patch.object(sitemap.timezone, "now", return_value=later):
+            with self.captureOnCommitCallbacks(execute=True):
+                second.unpublish()
+        self.assertEqual(
+            self._get(HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]).status_code, 200
+        )
+
+    def test_cached_document_is_served_with_few_queries(self):
+        self._get()
+        with self.assertNumQueries(2):
+            self._get()
+
+    def test_changes_by_other_workers_reach_the_cached_document(self):
+        self._get()
+        # Another worker's publish, without this process's signal handlers.
+        entry = SitemapEntry.objects.get(page_id=self.first.pk)
+        entry.xml = entry.xml.replace("</loc>", "</loc><priority>0.9</priority>")
+        entry.save()
+
+        self.assertContains(self._get(), "<priority>0.9</priority>")
+
+        SitemapEntry.objects.filter(page_id=self.first.pk).delete()
+
+        self.assertNotContains(self._get(), self.first.full_url)
+
+    def test_splits_into_index_past_max_urls(self):
+        self._publish("second")
+        with patch.object(sitemap, "MAX_URLS", 2):
+            index = self._get()
+            first = self._get("/sitemap-1.xml")
+            second = self._get("/sitemap-2.xml")
+            missing = self._get("/sitemap-9.xml")
+
+        self.assertContains(index, "<sitemapindex")
+        self.assertContains(index, "/sitemap-2.xml</loc>")
+        self.assertEqual(first.content.count(b"<url>"), 2)
+        self.assertEqual(second.content.count(b"<url>"), 2)
+        self.assertEqual(missing.status_code, 404)
+
+    def test_rebuild_command_restores_entries(self):
+        expected = set(SitemapEntry.objects.values_list("page_id", flat=True))
+        SitemapEntry.objects.all().delete()
+
+        out = StringIO()
+        call_command("rebuild_sitemap", stdout=out)
+
+        self.assertEqual(set(SitemapEntry.objects.values_list("page_id", flat=True)), expected)
+        self.assertIn(f"Stored {len(expected)} sitemap entries", out.getvalue())
@@ -1,8 +1,32 @@
 from django.templatetags.static import static
+from django.urls import path
 from django.utils.html import format_html
 from wagtail import hooks
 
+from . import page_cache, views
+from .models import BlogPage
+
 
 @hooks.register("insert_global_admin_css")
 def add_admin_share_preview_css():
     return format_html('<link rel="stylesheet" href="{}">', static("css/admin.css"))
+
+
+@hooks.register("register_admin_urls")
+def register_cache_stats_url():
+    return [path("blog/cache-stats/", views.cache_stats, name="blog_cache_stats")]
+
+
+@hooks.register("on_serve_page")
+def serve_blog_pages_from_cache(next_serve_page):
+    # Runs after the before_serve_page hooks, so view restrictions are already enforced.
+    def serve(page, request, args, kwargs):
+        if not isinstance(page, BlogPage):
+            return next_serve_page(page, request, args, kwargs)
+        return page_cache.serve_cached(
+            page,
+            request,
+            lambda: next_serve_page(page, request, args, kwargs),
+        )
+
+    return serve
@@ -3,6 +3,7 @@ Django settings for splattopblog project.
 """
 
 import os
+import tempfile
 from pathlib import Path
 from urllib.parse import parse_qs, urlparse
 
@@ -206,6 +207,42 @@ else:
         }
     }
 
+# Cache
+# Local-memory by default; CACHE_BACKEND=file shares entries between worker processes
+# on one node without needing an external service.
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "locmem").strip().lower()
+if CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.environ.get(
+                "CACHE_LOCATION",
+                str(Path(tempfile.gettempdir()) / "splattopblog-cache"),
+            ),
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "5000"))},
+        }
+    }
+elif CACHE_BACKEND == "locmem":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "splattopblog",
+            "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CACHE_MAX_ENTRIES", "5000"))},
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"Unsupported CACHE_BACKEND: {CACHE_BACKEND}")
+# Highlighted code listings survive restarts and are shared by workers on a node.
+CACHES["code_highlight"] = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": os.environ.get(
+        "CODE_HIGHLIGHT_CACHE_LOCATION",
+        str(Path(tempfile.gettempdir()) / "splattopblog-code-highlight"),
+    ),
+    "TIMEOUT": None,
+    "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("CODE_HIGHLIGHT_CACHE_MAX_ENTRIES", "10000"))},
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -295,6 +332,28 @@ WAGTAILSEARCH_BACKENDS = {
     }
 }
 
+# Blog render caching
+# Maximum number of rendered top-level block fragments kept in memory per process.
+BLOG_BLOCK_RENDER_CACHE_SIZE = int(os.environ.get("BLOG_BLOCK_RENDER_CACHE_SIZE", "2048"))
+# Highlighted code listings kept in memory per process, in front of the code_highlight cache.
+BLOG_CODE_HIGHLIGHT_CACHE_SIZE = int(os.environ.get("BLOG_CODE_HIGHLIGHT_CACHE_SIZE", "1024"))
+# Threads generating a post's image renditions on publish and in warm_renditions.
+BLOG_RENDITION_WORKERS = int(os.environ.get("BLOG_RENDITION_WORKERS", "4"))
+# Inline a blurred data URI placeholder behind media images in post bodies.
+BLOG_IMAGE_PLACEHOLDERS = get_env_bool("BLOG_IMAGE_PLACEHOLDERS", default=False)
+# Sanitized raw_html fragments kept in memory per process, keyed by content hash.
+BLOG_SANITIZE_CACHE_SIZE = int(os.environ.get("BLOG_SANITIZE_CACHE_SIZE", "1024"))
+# Full-response cache for anonymous views of live, unrestricted blog posts. Invalidation
+# only reaches other workers through a shared cache (CACHE_BACKEND=file); with locmem they
+# serve the old response for up to BLOG_PAGE_CACHE_TIMEOUT seconds.
+BLOG_PAGE_CACHE_ENABLED = get_env_bool("BLOG_PAGE_CACHE_ENABLED", default=False)
+BLOG_PAGE_CACHE_TIMEOUT = int(os.environ.get("BLOG_PAGE_CACHE_TIMEOUT", "600"))
+# Render bodies on publish in a background worker instead of the admin request.
+BLOG_RENDER_IN_BACKGROUND = get_env_bool("BLOG_RENDER_IN_BACKGROUND", default=False)
+BLOG_RENDER_QUEUE_DEBOUNCE = float(os.environ.get("BLOG_RENDER_QUEUE_DEBOUNCE", "0.5"))
+# Blog listing pagination: "offset" (?page=N) or "keyset" (?after=<cursor>, flat cost on deep pages).
+BLOG_INDEX_PAGINATION = os.environ.get("BLOG_INDEX_PAGINATION", "offset").strip().lower()
+
 # Wagtail Markdown settings
 WAGTAILMARKDOWN = {
     "autodownload_fontawesome": False,
@@ -306,6 +365,7 @@ WAGTAILMARKDOWN = {
         "extra",
         "blog.markdown_extensions.latex",
         "blog.markdown_extensions.random_choice",
+        "blog.markdown_extensions.codehilite_cache",
         "codehilite",
         "tables",
         "toc",
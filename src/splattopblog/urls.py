@@ -8,12 +8,12 @@ from django.contrib import admin
 from django.urls import include, path, re_path
 from wagtail import urls as wagtail_urls
 from wagtail.admin import urls as wagtailadmin_urls
-from wagtail.contrib.sitemaps.views import sitemap
 from wagtail.documents import urls as wagtaildocs_urls
 
 from blog import views as blog_views
 from blog.feeds import BlogAtomFeed, BlogFeed
 from blog.robots import robots_txt
+from blog.sitemap import sitemap_view
 
 handler404 = "blog.views.custom_404"
 handler500 = "blog.views.custom_500"
@@ -27,7 +27,8 @@ urlpatterns = [
     re_path(r"^(?P<page_path>.+)\.md$", blog_views.blog_page_markdown),
     path("feed/", BlogFeed(), name="blog-feed"),
     path("feed/atom/", BlogAtomFeed(), name="blog-atom-feed"),
-    path("sitemap.xml", sitemap, name="sitemap"),
+    path("sitemap.xml", sitemap_view, name="sitemap"),
+    path("sitemap-<int:section>.xml", sitemap_view, name="sitemap-section"),
 ]
 
 if settings.DEBUG or settings.SERVE_MEDIA: